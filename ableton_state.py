@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Ableton Live state mirror for Profesor Ableton
+Subscribes to AbletonOSC listeners (tempo, transport, tracks, selection)
+and keeps an in-memory copy updated by the deltas Live sends back, so
+questions about "my track" or "this clip" get the current set as
+context without asking Live on every request
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+from pythonosc import dispatcher, osc_server  # type: ignore
+
+from osc_bridge import AbletonOSCBridge
+
+SONG_PROPERTIES = ("tempo", "is_playing", "signature_numerator", "signature_denominator")
+TRACK_PROPERTIES = ("name", "mute", "solo", "arm")
+VIEW_PROPERTIES = ("selected_track", "selected_scene")
+MAX_SUMMARY_TRACKS = 16
+# Questions about the user's own set; general ones stay context-free so local and cached answers still apply
+SESSION_QUESTION = re.compile(r"\b(my|this|these|current|currently|selected|tempo|bpm|(the|that) (track|clip|device|song|set|project))\b",
+                              re.IGNORECASE)
+
+
+class AbletonState:
+    """Mirror of the Live set, fed by AbletonOSC replies and listener updates on the listen port."""
+
+    def __init__(self, bridge: AbletonOSCBridge, host: str = "0.0.0.0", port: Optional[int] = None):
+        self.bridge = bridge
+        self.host = host
+        # AbletonOSC replies to the sender's address on port 11001
+        self.port = int(os.getenv("ABLETON_STATE_PORT", "11001")) if port is None else port
+        # Without a reply to /live/test for two intervals Live is considered gone; on its return everything is resubscribed
+        self.heartbeat_interval = float(os.getenv("ABLETON_STATE_HEARTBEAT", "5"))
+        self.song: Dict[str, Any] = {}
+        self.tracks: Dict[int, Dict[str, Any]] = {}
+        self.selected_track: Optional[int] = None
+        self.selected_scene: Optional[int] = None
+        self.selected_clip: Optional[Dict[str, Any]] = None
+        self.connected = False
+        self.updates = 0
+        self.version = 0  # bumped on every change; the summary is rebuilt only when it moved
+        self._summary: Optional[str] = None
+        self._summary_version = -1
+        self._lock = threading.Lock()
+        self._track_count = threading.Condition(self._lock)  # notified when Live reports a new track count
+        self._create_lock = threading.Lock()  # one create_track at a time, so each names its own track
+        self._last_reply = 0.0
+        self._subscribed = 0  # tracks whose listeners are running
+        self._server: Optional[osc_server.BlockingOSCUDPServer] = None
+        self._stop = threading.Event()
+
+        self.dispatcher = dispatcher.Dispatcher()
+        self.dispatcher.map("/live/test", self._on_test)
+        for prop in SONG_PROPERTIES:
+            self.dispatcher.map(f"/live/song/get/{prop}", self._on_song, prop)
+        self.dispatcher.map("/live/song/get/num_tracks", self._on_num_tracks)
+        self.dispatcher.map("/live/song/get/track_names", self._on_track_names)
+        for prop in TRACK_PROPERTIES:
+            self.dispatcher.map(f"/live/track/get/{prop}", self._on_track, prop)
+        self.dispatcher.map("/live/track/get/devices/name", self._on_devices)
+        self.dispatcher.map("/live/view/get/selected_track", self._on_selected_track)
+        self.dispatcher.map("/live/view/get/selected_scene", self._on_selected_scene)
+        self.dispatcher.map("/live/view/get/selected_clip", self._on_selected_clip)
+        self.dispatcher.map("/live/clip/get/name", self._on_clip_name)
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        """Bind the listen port (OSError if taken), subscribe, and keep the subscription alive."""
+        if self.running:
+            return
+        self._server = osc_server.BlockingOSCUDPServer((self.host, self.port), self.dispatcher)
+        self.port = self._server.server_address[1]
+        self._stop.clear()
+        threading.Thread(target=self._server.serve_forever, name="ableton-state", daemon=True).start()
+        threading.Thread(target=self._heartbeat, name="ableton-heartbeat", daemon=True).start()
+        print(f"OK Ableton state mirror listening on port {self.port}")
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def subscribe(self):
+        """Ask for the whole state once and start the listeners that send deltas."""
+        messages = [(f"/live/song/start_listen/{prop}", ()) for prop in SONG_PROPERTIES]
+        messages += [(f"/live/view/start_listen/{prop}", ()) for prop in VIEW_PROPERTIES]
+        messages += [("/live/song/get/num_tracks", ()), ("/live/song/get/track_names", ())]
+        self.bridge.send_many(messages)
+
+    def _subscribe_tracks(self, first: int, count: int):
+        messages = []
+        for track in range(first, count):
+            messages += [(f"/live/track/start_listen/{prop}", (track,)) for prop in TRACK_PROPERTIES]
+            messages.append(("/live/track/get/devices/name", (track,)))
+        self.bridge.send_many(messages)
+
+    def create_track(self, kind: str = "audio", index: int = -1, name: Optional[str] = None,
+                     timeout: float = 2.0) -> Optional[int]:
+        """Create a track and name it once Live reports it; its index, or None if Live didn't confirm it in time.
+
+        AbletonOSC doesn't say where a new track went, so appended tracks are named at the track count
+        before the create. Calls are serialized: two appends in a burst would otherwise both name the same index.
+        """
+        with self._create_lock:
+            with self._lock:
+                before = self._subscribed
+            if not self.bridge.create_track(kind, index):
+                return None
+            self.bridge.send("/live/song/get/num_tracks")
+            with self._track_count:
+                if not self._track_count.wait_for(lambda: self._subscribed > before, timeout):
+                    return None
+                added = self._subscribed - before
+            if index < 0 and added != 1:
+                return None  # tracks were also added in Live meanwhile: which one is ours is unknown
+            target = index if 0 <= index <= before else before
+            if name:
+                self.bridge.send("/live/track/set/name", target, str(name))
+            return target
+
+    def _heartbeat(self):
+        while True:
+            if self.connected and time.monotonic() - self._last_reply > 2 * self.heartbeat_interval:
+                self.connected = False
+                self._changed()
+                print(">> Ableton stopped answering OSC - state mirror paused")
+            # Track count is polled along with the heartbeat: AbletonOSC has no listener for it
+            self.bridge.send_many([("/live/test", ()), ("/live/song/get/num_tracks", ())])
+            if self._stop.wait(self.heartbeat_interval):
+                return
+
+    def _changed(self):
+        self.version += 1
+
+    # -- Handlers (all run on the listener thread) ---------------------------
+
+    def _seen(self):
+        self.updates += 1
+        self._last_reply = time.monotonic()
+        if not self.connected:
+            # (Re)connected: listeners of an earlier Live session are gone, start over
+            with self._lock:
+                self.connected = True
+                self.tracks.clear()
+                self._subscribed = 0
+                self._changed()
+            print("OK Ableton answering OSC - subscribing to state updates")
+            self.subscribe()
+
+    def _on_test(self, address: str, *args: Any):
+        self._seen()
+
+    def _on_song(self, address: str, prop: List[str], *args: Any):
+        self._seen()
+        if args:
+            with self._lock:
+                self.song[prop[0]] = args[0]
+                self._changed()
+
+    def _on_num_tracks(self, address: str, *args: Any):
+        self._seen()
+        if not args:
+            return
+        count = int(args[0])
+        with self._lock:
+            subscribed = self._subscribed
+            if count == subscribed:
+                return
+            for track in [t for t in self.tracks if t >= count]:
+                del self.tracks[track]
+            for track in range(count):
+                self.tracks.setdefault(track, {"devices": []}).setdefault("name", f"Track {track + 1}")
+            self._subscribed = count
+            self._changed()
+            self._track_count.notify_all()
+        if count > subscribed:
+            self._subscribe_tracks(subscribed, count)
+
+    def _on_track_names(self, address: str, *args: Any):
+        self._seen()
+        with self._lock:
+            for track, name in enumerate(args):
+                self.tracks.setdefault(track, {"devices": []})["name"] = name
+            self._changed()
+
+    def _on_track(self, address: str, prop: List[str], *args: Any):
+        self._seen()
+        if len(args) >= 2:
+            with self._lock:
+                self.tracks.setdefault(int(args[0]), {"devices": []})[prop[0]] = args[1]
+                self._changed()
+
+    def _on_devices(self, address: str, *args: Any):
+        self._seen()
+        if args:
+            with self._lock:
+                self.tracks.setdefault(int(args[0]), {})["devices"] = list(args[1:])
+                self._changed()
+
+    def _on_selected_track(self, address: str, *args: Any):
+        self._seen()
+        if args:
+            with self._lock:
+                self.selected_track = int(args[0])
+                self._changed()
+            # Devices of the track being looked at may have changed since they were last asked for
+            self.bridge.send_many([("/live/track/get/devices/name", (self.selected_track,)),
+                                   ("/live/view/get/selected_clip", ())])
+
+    def _on_selected_scene(self, address: str, *args: Any):
+        self._seen()
+        if args:
+            with self._lock:
+                self.selected_scene = int(args[0])
+                self._changed()
+            self.bridge.send("/live/view/get/selected_clip")
+
+    def _on_selected_clip(self, address: str, *args: Any):
+        self._seen()
+        if len(args) >= 2:
+            track, scene = int(args[0]), int(args[1])
+            with self._lock:
+                self.selected_clip = {"track": track, "scene": scene, "name": None}
+                self._changed()
+            self.bridge.send("/live/clip/get/name", track, scene)
+
+    def _on_clip_name(self, address: str, *args: Any):
+        self._seen()
+        if len(args) >= 3:
+            with self._lock:
+                clip = self.selected_clip
+                if clip and (clip["track"], clip["scene"]) == (int(args[0]), int(args[1])):
+                    clip["name"] = args[2]
+                    self._changed()
+
+    # -- Readers -------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the mirror for clients."""
+        with self._lock:
+            return {"connected": self.connected, "song": dict(self.song),
+                    "tracks": [dict(self.tracks[t], index=t) for t in sorted(self.tracks)],
+                    "selected_track": self.selected_track, "selected_scene": self.selected_scene,
+                    "selected_clip": dict(self.selected_clip) if self.selected_clip else None}
+
+    def summary(self) -> Optional[str]:
+        """A few lines describing the set for prompts, None while Live is not connected."""
+        if not self.connected:
+            return None
+        if self._summary_version != self.version:
+            with self._lock:
+                self._summary_version = self.version
+                self._summary = self._describe()
+        return self._summary
+
+    def context_for(self, question: str) -> Optional[str]:
+        """The summary when the question is about the open set."""
+        return self.summary() if SESSION_QUESTION.search(question) else None
+
+    def _describe(self) -> str:
+        song = self.song
+        lines = []
+        if "tempo" in song:
+            signature = f" {song['signature_numerator']}/{song['signature_denominator']}" \
+                if "signature_numerator" in song and "signature_denominator" in song else ""
+            playing = ", playing" if song.get("is_playing") else ", stopped" if "is_playing" in song else ""
+            lines.append(f"Ableton Live now: {float(song['tempo']):g} BPM{signature}{playing}, {len(self.tracks)} tracks")
+        else:
+            lines.append(f"Ableton Live now: {len(self.tracks)} tracks")
+        track = self.tracks.get(self.selected_track) if self.selected_track is not None else None
+        if track is not None:
+            flags = [flag for flag in ("mute", "solo", "arm") if track.get(flag)]
+            devices = ", ".join(track.get("devices") or []) or "no devices"
+            lines.append(f"Selected track {self.selected_track + 1} '{track.get('name', '')}'"
+                         f"{' (' + ', '.join(flags) + ')' if flags else ''}: {devices}")
+        clip = self.selected_clip
+        if clip and clip.get("name"):
+            lines.append(f"Selected clip '{clip['name']}' (track {clip['track'] + 1}, scene {clip['scene'] + 1})")
+        names = [self.tracks[t].get("name", "") for t in sorted(self.tracks)[:MAX_SUMMARY_TRACKS]]
+        if names:
+            more = f" and {len(self.tracks) - len(names)} more" if len(self.tracks) > len(names) else ""
+            lines.append("Tracks: " + ", ".join(names) + more)
+        return "\n".join(lines)
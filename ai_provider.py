@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+AI providers for Profesor Ableton
+AIProvider asks Ollama, Grok, Groq, Claude and OpenAI in priority order within
+a request deadline, with theory-engine, answer-store and offline answers in
+front of them. Importing this module has no side effects, so tools such as
+prewarm_cache.py can build their own provider without starting the server.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, List
+
+import requests
+from groq import Groq  # type: ignore
+import anthropic  # type: ignore
+import openai  # type: ignore
+
+import music_theory
+import prompts
+from ableton_state import AbletonState
+from answer_store import AnswerStore
+from ollama_manager import OllamaManager
+from question_classifier import classify
+
+# Providers are skipped once less than this much of the request budget is left (seconds)
+MIN_PROVIDER_BUDGET = 0.5
+
+# Settings AIProvider.reload() compares to report what changed
+RELOADABLE_SETTINGS = ("providers", "ollama_model", "ollama_timeout", "request_deadline", "models")
+
+class AIProvider:
+    def __init__(self):
+        self.ollama_url = "http://localhost:11434"
+        self._load_settings()
+        self.ollama = OllamaManager(self.ollama_url, self.ollama_model)
+        # Answers to questions without project context, also filled by prewarm_cache.py
+        self.answers = AnswerStore()
+        
+        # API clients and the keys they were built with
+        self.grok_client = None
+        self.groq_client = None
+        self.claude_client = None
+        self.openai_client = None
+        self._client_keys: Dict[str, Optional[str]] = {}
+        self.session: Optional[AbletonState] = None
+        
+        # Initialize API clients
+        self._init_api_clients()
+        print(f">> AI Provider priority: {self.providers}")
+    
+    def _load_settings(self):
+        """Read provider order, models and timeouts from the environment."""
+        self.ollama_model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+        self.ollama_timeout = int(os.getenv("OLLAMA_TIMEOUT", "60"))
+        # Total time budget for one question across the whole fallback chain, 0 = no limit
+        self.request_deadline = float(os.getenv("REQUEST_DEADLINE", "30"))
+        
+        # (fast, strong) model per provider; the question classifier picks which one
+        self.models = {
+            "grok": (os.getenv("GROK_FAST_MODEL", "grok-3-mini"), os.getenv("GROK_STRONG_MODEL", "grok-4-latest")),
+            "groq": (os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant"), os.getenv("GROQ_STRONG_MODEL", "llama-3.3-70b-versatile")),
+            "claude": (os.getenv("CLAUDE_FAST_MODEL", "claude-3-haiku-20240307"), os.getenv("CLAUDE_STRONG_MODEL", "claude-sonnet-4-5")),
+            "openai": (os.getenv("OPENAI_FAST_MODEL", "gpt-3.5-turbo"), os.getenv("OPENAI_STRONG_MODEL", "gpt-4o")),
+        }
+        
+        # Provider priority
+        providers_str = os.getenv("AI_PROVIDERS", "groq,ollama,grok,claude,openai")
+        self.providers = [p.strip() for p in providers_str.split(",")]
+    
+    def _key_changed(self, provider: str, key: Optional[str]) -> bool:
+        """Remember the key a client is built with; False if it is unchanged."""
+        if provider in self._client_keys and self._client_keys[provider] == key:
+            return False
+        self._client_keys[provider] = key
+        return True
+        
+    def _init_api_clients(self) -> List[str]:
+        """Initialize API clients with keys from environment; only clients whose key changed are rebuilt."""
+        rebuilt = []
+        
+        # xAI Grok
+        xai_key = os.getenv("XAI_API_KEY")
+        if self._key_changed("grok", xai_key):
+            rebuilt.append("grok")
+            self.grok_client = None
+            if xai_key and xai_key != "your_xai_api_key_here":
+                try:
+                    # xAI uses OpenAI-compatible API, so we use openai client
+                    self.grok_client = openai.OpenAI(
+                        api_key=xai_key,
+                        base_url="https://api.x.ai/v1"
+                    )
+                    print("OK xAI Grok API client initialized")
+                except Exception as e:
+                    print(f"ERROR xAI Grok initialization failed: {e}")
+        
+        # Groq - GitHub version with placeholder
+        # Windows users: If .env doesn't work, replace this line with:
+        # groq_key = "your_groq_api_key_here"
+        groq_key = os.getenv("GROQ_API_KEY")
+        if self._key_changed("groq", groq_key):
+            rebuilt.append("groq")
+            self.groq_client = None
+            if groq_key and groq_key != "your_groq_api_key_here":
+                try:
+                    self.groq_client = Groq(api_key=groq_key)
+                    print("OK Groq API client initialized")
+                except Exception as e:
+                    print(f"ERROR Groq initialization failed: {e}")
+        
+        # Claude (Anthropic)
+        claude_key = os.getenv("ANTHROPIC_API_KEY")
+        if self._key_changed("claude", claude_key):
+            rebuilt.append("claude")
+            self.claude_client = None
+            if claude_key and claude_key != "your_anthropic_api_key_here":
+                try:
+                    self.claude_client = anthropic.Anthropic(api_key=claude_key)
+                    print("OK Claude API client initialized")
+                except Exception as e:
+                    print(f"ERROR Claude initialization failed: {e}")
+        
+        # OpenAI
+        openai_key = os.getenv("OPENAI_API_KEY")
+        if self._key_changed("openai", openai_key):
+            rebuilt.append("openai")
+            self.openai_client = None
+            if openai_key and openai_key != "your_openai_api_key_here":
+                try:
+                    self.openai_client = openai.OpenAI(api_key=openai_key)
+                    print("OK OpenAI API client initialized")
+                except Exception as e:
+                    print(f"ERROR OpenAI initialization failed: {e}")
+        return rebuilt
+    
+    def reload(self) -> List[str]:
+        """Re-read settings from the environment and rebuild only what changed.
+        
+        Requests already running keep the client objects they started with.
+        """
+        before = {name: getattr(self, name) for name in RELOADABLE_SETTINGS}
+        self._load_settings()
+        changed = [name for name in RELOADABLE_SETTINGS if getattr(self, name) != before[name]]
+        self.ollama.configure(self.ollama_model)
+        changed += [f"{provider} client" for provider in self._init_api_clients()]
+        if changed:
+            print(f"OK Config reloaded: {', '.join(changed)} changed")
+            print(f">> AI Provider priority: {self.providers}")
+        else:
+            print(">> Config reloaded: nothing changed")
+        return changed
+        
+    @staticmethod
+    def _with_timeout(client, timeout: Optional[float]):
+        """SDK client limited to the remaining budget; retries would overrun it."""
+        if timeout is None:
+            return client
+        return client.with_options(timeout=timeout, max_retries=0)
+    
+    @staticmethod
+    def _collect(name: str, pieces, cancel: Optional[threading.Event], timeout: Optional[float]) -> Optional[str]:
+        """Join streamed text; None if the request is cancelled or the budget runs out mid-stream."""
+        stop_at = time.monotonic() + timeout if timeout is not None else None
+        parts = []
+        for piece in pieces:
+            if cancel is not None and cancel.is_set():
+                print(f">> {name} request cancelled")
+                return None
+            if stop_at is not None and time.monotonic() > stop_at:
+                print(f"TIMEOUT {name} ran out of time while streaming")
+                return None
+            if piece:
+                parts.append(piece)
+        return "".join(parts).strip()
+    
+    def ask_ollama(self, question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                  cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+        """Send question to local Ollama model."""
+        timeout = self.ollama_timeout if timeout is None else min(self.ollama_timeout, timeout)
+        model = self.ollama.admit()
+        if model is None:
+            return None
+        try:
+            print(f">> Asking Ollama ({model}): {question[:50]}...")
+            
+            response = requests.post(f"{self.ollama_url}/api/generate", 
+                json={
+                    "model": model,
+                    "system": prompts.system_prompt(context),
+                    "prompt": question,
+                    "stream": True,
+                    "keep_alive": self.ollama.keep_alive,
+                    "options": {"num_predict": max_tokens}
+                }, timeout=timeout, stream=True)
+            
+            if response.status_code == 200:
+                try:
+                    lines = (json.loads(line).get("response", "") for line in response.iter_lines() if line)
+                    result = self._collect("Ollama", lines, cancel, timeout)
+                finally:
+                    response.close()
+                if result:
+                    print(f"OK Ollama responded: {result[:50]}...")
+                    return result
+                elif result is not None:
+                    print("ERROR Ollama returned empty response")
+            else:
+                print(f"ERROR Ollama HTTP error {response.status_code}: {response.text}")
+                
+        except requests.exceptions.Timeout:
+            print(f"TIMEOUT Ollama timeout after {timeout:g}s")
+        except requests.exceptions.ConnectionError:
+            print(">> Ollama connection failed - is 'ollama serve' running?")
+        except Exception as e:
+            print(f"ERROR Ollama error: {e}")
+        return None
+    
+    def ask_grok(self, question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                  cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+        """Send question to xAI Grok API."""
+        if not self.grok_client:
+            print("ERROR Grok client not initialized - check XAI_API_KEY")
+            return None
+            
+        try:
+            print(f">> Asking Grok ({self.models['grok'][strong]}): {question[:50]}...")
+            
+            stream = self._with_timeout(self.grok_client, timeout).chat.completions.create(
+                model=self.models["grok"][strong],
+                messages=prompts.chat_messages(question, context),
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True
+            )
+            
+            try:
+                result = self._collect("Grok", (c.choices[0].delta.content for c in stream if c.choices), cancel, timeout)
+            finally:
+                stream.close()
+            if result:
+                print(f"OK Grok responded: {result[:50]}...")
+                return result
+            elif result is not None:
+                print("ERROR Grok returned empty response")
+                
+        except Exception as e:
+            print(f"ERROR Grok error: {e}")
+        return None
+    
+    def ask_groq(self, question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                  cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+        """Send question to Groq API."""
+        if not self.groq_client:
+            print("ERROR Groq client not initialized - check API key")
+            return None
+            
+        try:
+            print(f">> Asking Groq ({self.models['groq'][strong]}): {question[:50]}...")
+            
+            stream = self._with_timeout(self.groq_client, timeout).chat.completions.create(
+                model=self.models["groq"][strong],
+                messages=prompts.chat_messages(question, context),
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True
+            )
+            
+            try:
+                result = self._collect("Groq", (c.choices[0].delta.content for c in stream if c.choices), cancel, timeout)
+            finally:
+                stream.close()
+            if result:
+                print(f"OK Groq responded: {result[:50]}...")
+                return result
+            elif result is not None:
+                print("ERROR Groq returned empty response")
+                
+        except Exception as e:
+            print(f"ERROR Groq error: {e}")
+        return None
+    
+    def ask_claude(self, question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                  cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+        """Send question to Claude API."""
+        if not self.claude_client:
+            print("ERROR Claude client not initialized - check API key")
+            return None
+            
+        try:
+            print(f">> Asking Claude ({self.models['claude'][strong]}): {question[:50]}...")
+            
+            stream = self._with_timeout(self.claude_client, timeout).messages.create(
+                model=self.models["claude"][strong],
+                max_tokens=max_tokens,
+                system=prompts.claude_system(context),
+                messages=[
+                    {"role": "user", "content": question}
+                ],
+                stream=True
+            )
+            
+            try:
+                result = self._collect("Claude", self._claude_text(stream), cancel, timeout)
+            finally:
+                stream.close()
+            if result:
+                print(f"OK Claude responded: {result[:50]}...")
+                return result
+            elif result is not None:
+                print("ERROR Claude returned empty response")
+                
+        except Exception as e:
+            print(f"ERROR Claude error: {e}")
+        return None
+    
+    @staticmethod
+    def _claude_text(stream):
+        """Text deltas of a Claude stream; reports prompt cache reads from the opening event."""
+        for event in stream:
+            if event.type == "message_start":
+                cached = getattr(event.message.usage, "cache_read_input_tokens", None)
+                if cached:
+                    print(f">> Claude prompt cache hit: {cached} tokens")
+            elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                yield event.delta.text
+    
+    def ask_openai(self, question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                  cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+        """Send question to OpenAI API."""
+        if not self.openai_client:
+            print("ERROR OpenAI client not initialized - check API key")
+            return None
+            
+        try:
+            print(f">> Asking OpenAI ({self.models['openai'][strong]}): {question[:50]}...")
+            
+            stream = self._with_timeout(self.openai_client, timeout).chat.completions.create(
+                model=self.models["openai"][strong],
+                messages=prompts.chat_messages(question, context),
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True
+            )
+            
+            try:
+                result = self._collect("OpenAI", (c.choices[0].delta.content for c in stream if c.choices), cancel, timeout)
+            finally:
+                stream.close()
+            if result:
+                print(f"OK OpenAI responded: {result[:50]}...")
+                return result
+            elif result is not None:
+                print("ERROR OpenAI returned empty response")
+                
+        except Exception as e:
+            print(f"ERROR OpenAI error: {e}")
+        return None
+    
+    def get_answer(self, question: str, preferred_model: str = None, context: Optional[str] = None,
+                   deadline: Optional[float] = None, cancel: Optional[threading.Event] = None) -> str:
+        """Try to get answer from available providers in priority order, within `deadline` seconds."""
+        print(f">> Looking for answer to: {question}")
+        if preferred_model:
+            print(f">> Preferred model: {preferred_model}")
+        
+        live = self.session.context_for(question) if self.session is not None else None
+        if live:
+            # Current tempo, selected track and devices from the mirror - no round trip to Live
+            context = f"{context}\n\n{live}" if context else live
+        
+        if not context:
+            # Chord/scale/note questions have exact local answers
+            theory = music_theory.answer(question)
+            if theory:
+                print(">> Answered by the theory engine")
+                return f">> [Theory] {theory}"
+            cached = self.answers.get(question)
+            if cached:
+                print(">> Answer from cache")
+                return cached
+        
+        # Answer length and fast/strong model follow the question's complexity
+        plan = classify(question, has_context=bool(context))
+        print(f">> Question tier: {plan['tier']} (max_tokens {plan['max_tokens']}, {'strong' if plan['strong'] else 'fast'} models)")
+        
+        # Use preferred model first if specified
+        providers_to_try = []
+        if preferred_model and preferred_model in self.providers:
+            providers_to_try.append(preferred_model)
+            # Add other providers as fallback
+            providers_to_try.extend([p for p in self.providers if p != preferred_model])
+        else:
+            providers_to_try = self.providers
+        
+        budget = self.request_deadline
+        if deadline is not None:
+            # Clients may ask for less time than REQUEST_DEADLINE, never for more or for none
+            if float(deadline) <= 0:
+                raise ValueError("deadline must be a positive number of seconds")
+            budget = min(float(deadline), budget) if budget > 0 else float(deadline)
+        expires = time.monotonic() + budget if budget > 0 else None
+        
+        for provider in providers_to_try:
+            if cancel is not None and cancel.is_set():
+                return ">> Request cancelled"
+            
+            # Each provider only gets what is left of the request budget
+            remaining = None
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining < MIN_PROVIDER_BUDGET:
+                    print(f"TIMEOUT Request deadline of {budget:g}s reached - using offline answer")
+                    return self.get_fallback_answer(question)
+            
+            if provider == "ollama":
+                answer = self.ask_ollama(question, remaining, plan["max_tokens"], plan["strong"], cancel, context)
+                if answer:
+                    return self._remember(question, context, f">> [Ollama] {answer}", "ollama")
+                elif preferred_model == "ollama":
+                    return ">> ERROR Ollama not running. Start with 'ollama serve' or switch to Groq (free)"
+                    
+            elif provider == "grok":
+                answer = self.ask_grok(question, remaining, plan["max_tokens"], plan["strong"], cancel, context)
+                if answer:
+                    return self._remember(question, context, f">> [Grok] {answer}", "grok")
+                elif preferred_model == "grok":
+                    return ">> ERROR xAI Grok requires paid API key. Get credits at https://console.x.ai/ or switch to Groq (free)"
+                    
+            elif provider == "groq":
+                answer = self.ask_groq(question, remaining, plan["max_tokens"], plan["strong"], cancel, context)
+                if answer:
+                    return self._remember(question, context, f">> [Groq] {answer}", "groq")
+                    
+            elif provider == "claude":
+                answer = self.ask_claude(question, remaining, plan["max_tokens"], plan["strong"], cancel, context)
+                if answer:
+                    return self._remember(question, context, f">> [Claude] {answer}", "claude")
+                elif preferred_model == "claude":
+                    return ">> ERROR Claude requires paid API key. Get one at https://console.anthropic.com/ or switch to Groq (free)"
+                    
+            elif provider == "openai":
+                answer = self.ask_openai(question, remaining, plan["max_tokens"], plan["strong"], cancel, context)
+                if answer:
+                    return self._remember(question, context, f">> [OpenAI] {answer}", "openai")
+                elif preferred_model == "openai":
+                    return ">> ERROR OpenAI requires paid API key. Get one at https://platform.openai.com/ or switch to Groq (free)"
+        
+        print("ERROR All AI providers failed")
+        return self.get_fallback_answer(question)
+    
+    def _remember(self, question: str, context: Optional[str], answer: str, provider: str) -> str:
+        """Store a provider answer for later askers (not when it depends on project context)."""
+        if not context:
+            try:
+                self.answers.put(question, answer, provider)
+            except Exception as e:
+                print(f"ERROR Could not store answer: {e}")
+        return answer
+    
+    def get_fallback_answer(self, question: str) -> str:
+        """Offline answer used when no provider answered in time."""
+        return self.get_local_answer(question) or "ERROR Sorry, all AI providers are currently unavailable. Get a free API key at https://console.groq.com/keys or https://console.x.ai and add it to your .env file."
+    
+    def get_local_answer(self, question: str) -> Optional[str]:
+        """Simple offline responses for common Ableton questions, None if the topic is not covered."""
+        question_lower = question.lower()
+        if ("arranged view" in question_lower or "arrangement view" in question_lower or 
+            "aranged view" in question_lower or ("otvorim" in question_lower and "view" in question_lower) or
+            ("otvaram" in question_lower and "view" in question_lower) or "tab key" in question_lower):
+            return ">> Arranged View in Ableton Live is the timeline view where you build your full song structure. It shows audio and MIDI clips arranged horizontally across time, allowing you to create intro, verse, chorus, outro sections. Switch between Session View (clip launcher) and Arrangement View using Tab key. Press TAB to switch between views."
+        elif "eq" in question_lower and "ableton" in question_lower:
+            return ">> EQ (Equalizer) in Ableton Live is used to adjust frequency content of audio. Ableton has EQ Eight (8-band) and EQ Three (3-band). Use it to cut unwanted frequencies, boost desired ones, or create space in your mix. High-pass filters remove low rumble, low-pass filters remove harshness."
+        elif "compressor" in question_lower or "compression" in question_lower:
+            return ">> Compressor in Ableton reduces dynamic range by lowering loud parts. Key settings: Threshold (when compression starts), Ratio (how much compression), Attack (how fast), Release (how fast it stops). Use for evening out levels, adding punch, or gluing mix elements together."
+        elif "session view" in question_lower or ("session" in question_lower and "view" in question_lower):
+            return ">> Session View in Ableton Live is the clip launcher view where you can trigger clips in real-time. Each track has clip slots that can contain audio or MIDI clips. Perfect for live performance, jamming, and experimenting with song ideas. Press TAB to switch to Arrangement View."
+        elif "reverb" in question_lower:
+            return ">> Reverb in Ableton simulates acoustic spaces and adds depth to sounds. Use Reverb device or sends/returns for efficiency. Key parameters: Room Size, Decay Time, Pre-Delay, Dry/Wet. Sends allow multiple tracks to use same reverb, saving CPU and creating cohesive space."
+        elif "delay" in question_lower:
+            return ">> Delay in Ableton creates echoes and rhythmic effects. Simple Delay for basic echoes, Ping Pong Delay for stereo bouncing, Echo for complex modulated delays. Key settings: Time (sync to tempo), Feedback (number of repeats), Dry/Wet mix."
+        elif "midi" in question_lower and ("što" in question_lower or "what" in question_lower):
+            return ">> MIDI (Musical Instrument Digital Interface) is a protocol for sending musical information between devices. In Ableton, MIDI clips contain note data, not audio. MIDI notes trigger sounds from instruments. You can edit notes in MIDI Editor, adjust velocity, timing, and duration."
+        elif ("ne znam" in question_lower or "početnik" in question_lower or "beginner" in question_lower or 
+              ("korak po korak" in question_lower) or ("step by step" in question_lower) or 
+              ("kako početi" in question_lower) or ("getting started" in question_lower) or
+              ("voditi" in question_lower) or ("guide" in question_lower)):
+            return """>> ABLETON LIVE - POČETNI VODIČ:
+
+1. OSNOVNI LAYOUT:
+   - Session View (clip launcher) - za jamiranje i eksperimente
+   - Arrangement View (timeline) - za stvaranje kompletne pjesme
+   - Prebacivanje: TAB tipka
+
+2. PRVI KORACI:
+   - Stvori novi Live Set (File > New)
+   - Dodaj Audio Track (Ctrl+T)
+   - Povuci audio fajl u track ili record mikrofon
+   - Play dugme ili Space za reprodukciju
+
+3. OSNOVNI WORKFLOW:
+   - Record: R tipka ili Record dugme
+   - Play/Stop: Space tipka
+   - Tempo: mijenjaj BPM gore lijevo
+   - Volume: fader-i desno od track-a
+
+4. SLJEDEĆI KORACI:
+   - Dodaj MIDI track za virtuelne instrumente
+   - Eksperimentiraj s built-in zvukovima (Drums, Bass, Keys)
+   - Koristi Audio Effects (Reverb, Delay, EQ)
+   - Snimaj sve u Arrangement View za finalnu pjesmu
+
+SAVJET: Počni s jednostavnim - jedan drum loop, jedna melodija!"""
+        elif ("kako napraviti" in question_lower and ("beat" in question_lower or "ritam" in question_lower)):
+            return ">> KAKO NAPRAVITI BEAT: 1) Dodaj MIDI track (Ctrl+Shift+T) 2) Povuci Drum Kit iz browser-a 3) Double-click za otvoriti MIDI clip 4) Crtan note-ove: Kick (C1), Snare (D1), Hi-hat (F#1) 5) Koristi kvantizaciju (Ctrl+U) za savršen timing 6) Eksperimentiraj s velocity za dinamiku"
+        elif ("kako snimiti" in question_lower or ("record" in question_lower and "audio" in question_lower)):
+            return ">> SNIMANJE AUDIO: 1) Dodaj Audio Track (Ctrl+T) 2) Spoji mikrofon/instrument u audio interface 3) Odaberi Input (IO sekcija) 4) Uključi Monitor (Auto/In/Off) 5) Pritisni Record (R) i Play (Space) 6) Snimaj! Savjeti: Postavi levels, koristi click track (metronom)"
+        elif ("browser" in question_lower or ("kako naći" in question_lower and "sound" in question_lower)):
+            return ">> ABLETON BROWSER: Lijeva strana - sve tvoje zvukove! PLACES (folderi), CATEGORIES (tipovi), PACKS (kolekcije). Povuci-i-stavi iz browsera u track-ove. Pretraži tipkom, koristi Tags za brže pronalaženje. HOT SWAP - zamijeni zvuk bez prekidanja reproduce!"
+        return None
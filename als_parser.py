@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Incremental Ableton Live Set (.als) reader for Profesor Ableton
+Streams the gzip-compressed XML through an event-based expat parser and
+keeps only a compact project index (tracks, devices, clips, tempo, samples)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Optional, Dict, Any, List
+from xml.parsers import expat
+
+CHUNK_SIZE = 1 << 20
+INDEX_VERSION = 1
+
+TRACK_TAGS = {"AudioTrack": "audio", "MidiTrack": "midi", "GroupTrack": "group", "ReturnTrack": "return"}
+MASTER_TAGS = {"MasterTrack", "MainTrack"}  # MainTrack since Live 12
+CLIP_TAGS = {"AudioClip": "audio", "MidiClip": "midi"}
+PLUGIN_TAGS = {"PluginDevice", "AuPluginDevice"}
+PLUGIN_INFO_TAGS = {"Vst3PluginInfo", "AuPluginInfo"}
+# Tags whose nesting we need to know about while streaming
+TRACKED_TAGS = {"FreezeSequencer", "ArrangerAutomation", "Tempo", "Devices"}
+
+MAX_CLIP_NAMES = 20
+MAX_SUMMARY_TRACKS = 40
+
+# Internal device tag -> name shown in Live's browser
+DEVICE_NAMES = {
+    "Eq8": "EQ Eight", "FilterEQ3": "EQ Three", "Compressor2": "Compressor",
+    "GlueCompressor": "Glue Compressor", "MultibandDynamics": "Multiband Dynamics",
+    "DrumGroupDevice": "Drum Rack", "InstrumentGroupDevice": "Instrument Rack",
+    "AudioEffectGroupDevice": "Audio Effect Rack", "MidiEffectGroupDevice": "MIDI Effect Rack",
+    "OriginalSimpler": "Simpler", "MultiSampler": "Sampler", "InstrumentVector": "Wavetable",
+    "UltraAnalog": "Analog", "StereoGain": "Utility", "AutoFilter": "Auto Filter",
+    "PingPongDelay": "Ping Pong Delay", "Redux2": "Redux", "CrossDelay": "Simple Delay",
+    "MidiArpeggiator": "Arpeggiator", "MidiScale": "Scale", "MidiChord": "Chord",
+    "AutoPan": "Auto Pan", "BeatRepeat": "Beat Repeat", "SpectrumAnalyzer": "Spectrum",
+}
+
+
+class _SetIndexBuilder:
+    """expat callbacks that build the index while the XML streams past."""
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.depth = {tag: 0 for tag in TRACKED_TAGS}
+        self.creator = ""
+        self.tempo: Optional[float] = None
+        self.tracks: List[Dict[str, Any]] = []
+        self.samples: Dict[str, None] = {}  # ordered set
+        self.file_ref: Optional[Dict[str, str]] = None  # paths of the sample FileRef being read
+
+        self.track: Optional[Dict[str, Any]] = None
+        self.track_level = -1
+        self.in_master = False
+        self.master_level = -1
+        self.device: Optional[Dict[str, Any]] = None
+        self.device_level = -1
+        self.clip: Optional[Dict[str, Any]] = None
+        self.clip_level = -1
+
+    def start(self, tag: str, attrs: Dict[str, str]):
+        level = len(self.stack)
+        parent = self.stack[-1] if self.stack else ""
+        value = attrs.get("Value")
+        self.stack.append(tag)
+        if tag in self.depth:
+            self.depth[tag] += 1
+
+        if level == 0 and tag == "Ableton":
+            self.creator = attrs.get("Creator", "")
+        elif tag in TRACK_TAGS and parent == "Tracks":
+            self.track = {"name": "", "type": TRACK_TAGS[tag], "devices": [],
+                          "session_clips": 0, "arrangement_clips": 0, "clip_names": []}
+            self.track_level = level
+        elif tag in MASTER_TAGS and parent == "LiveSet":
+            self.in_master = True
+            self.master_level = level
+        elif self.in_master and tag == "Manual" and parent == "Tempo" and value and self.tempo is None:
+            self.tempo = float(value)
+        elif self.track is not None:
+            self._track_element(tag, parent, level, value)
+
+        if tag == "FileRef" and parent == "SampleRef":
+            # The sample itself; FileRefs deeper in SampleRef (SourceContext/OriginalFileRef) are skipped
+            self.file_ref = {}
+        elif value and parent == "FileRef" and self.file_ref is not None and tag in ("Path", "RelativePath"):
+            self.file_ref[tag] = value
+
+    def _track_element(self, tag: str, parent: str, level: int, value: Optional[str]):
+        track = self.track
+        if tag == "EffectiveName" and parent == "Name" and level == self.track_level + 2:
+            track["name"] = value or track["name"]
+        elif parent == "Devices" and self.depth["Devices"] == 1 and self.device is None:
+            # Top-level device; devices nested inside racks are not listed
+            self.device = {"name": DEVICE_NAMES.get(tag, tag), "plugin": tag in PLUGIN_TAGS}
+            self.device_level = level
+            track["devices"].append(self.device)
+        elif self.device is not None and value:
+            if tag == "UserName" and level == self.device_level + 1:
+                self.device["name"] = value
+            elif self.device["plugin"] and (tag == "PlugName" or (tag == "Name" and parent in PLUGIN_INFO_TAGS)):
+                self.device["name"] = value
+        elif tag in CLIP_TAGS and not self.depth["FreezeSequencer"] and self.clip is None:
+            self.clip = {"name": "", "arrangement": bool(self.depth["ArrangerAutomation"])}
+            self.clip_level = level
+        elif self.clip is not None and tag == "Name" and level == self.clip_level + 1:
+            self.clip["name"] = value or ""
+
+    def end(self, tag: str):
+        self.stack.pop()
+        level = len(self.stack)
+        if tag in self.depth:
+            self.depth[tag] -= 1
+
+        if tag == "FileRef" and self.file_ref is not None:
+            # One sample per FileRef: the absolute path, or the set-relative one when that is all there is
+            path = self.file_ref.get("Path") or self.file_ref.get("RelativePath")
+            if path:
+                self.samples.setdefault(path.replace("\\", "/"), None)
+            self.file_ref = None
+        elif self.clip is not None and level == self.clip_level:
+            track = self.track
+            track["arrangement_clips" if self.clip["arrangement"] else "session_clips"] += 1
+            if self.clip["name"] and len(track["clip_names"]) < MAX_CLIP_NAMES:
+                track["clip_names"].append(self.clip["name"])
+            self.clip = None
+        elif self.device is not None and level == self.device_level:
+            self.device = None
+        elif self.track is not None and level == self.track_level:
+            self.track["devices"] = [d["name"] for d in self.track["devices"]]
+            self.tracks.append(self.track)
+            self.track = None
+        elif self.in_master and level == self.master_level:
+            self.in_master = False
+
+
+def parse_set(path: str) -> Dict[str, Any]:
+    """Stream-parse a .als file (gzip XML, or plain XML) into a compact index."""
+    builder = _SetIndexBuilder()
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = builder.start
+    parser.EndElementHandler = builder.end
+    parser.buffer_text = True
+
+    with open(path, "rb") as raw:
+        compressed = raw.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.Parse(chunk, False)
+    parser.Parse(b"", True)
+
+    stat = os.stat(path)
+    return {
+        "version": INDEX_VERSION,
+        "file": os.path.basename(path),
+        "path": os.path.abspath(path),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "creator": builder.creator,
+        "tempo": builder.tempo,
+        "tracks": builder.tracks,
+        "samples": list(builder.samples),
+    }
+
+
+def summarize(index: Dict[str, Any]) -> str:
+    """Compact text summary of a Live Set for prompt injection."""
+    tracks = index["tracks"]
+    counts: Dict[str, int] = {}
+    for track in tracks:
+        counts[track["type"]] = counts.get(track["type"], 0) + 1
+    kinds = ", ".join(f"{n} {'MIDI' if kind == 'midi' else kind}" for kind, n in counts.items())
+    tempo = f"{index['tempo']:g} BPM" if index["tempo"] else "unknown tempo"
+    creator = f" ({index['creator']})" if index["creator"] else ""
+
+    lines = [f"Live Set '{index['file']}'{creator}: {tempo}, {len(tracks)} tracks ({kinds})."]
+    for track in tracks[:MAX_SUMMARY_TRACKS]:
+        kind = "MIDI" if track["type"] == "midi" else track["type"]
+        devices = ", ".join(track["devices"]) or "no devices"
+        clips = track["session_clips"] + track["arrangement_clips"]
+        lines.append(f"- {track['name'] or 'Unnamed'} [{kind}]: {devices}; {clips} clips")
+    if len(tracks) > MAX_SUMMARY_TRACKS:
+        lines.append(f"- ... and {len(tracks) - MAX_SUMMARY_TRACKS} more tracks")
+
+    samples = index["samples"]
+    if samples:
+        examples = ", ".join(os.path.basename(s) for s in samples[:8])
+        lines.append(f"Samples: {len(samples)} referenced (e.g. {examples}).")
+    return "\n".join(lines)
+
+
+class LiveSetIndex:
+    """Live Set indexes cached in memory and on disk by path and mtime."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "sets")
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _cache_file(self, path: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _is_fresh(index: Optional[Dict[str, Any]], stat: os.stat_result) -> bool:
+        return (index is not None and index.get("version") == INDEX_VERSION
+                and index.get("mtime") == stat.st_mtime and index.get("size") == stat.st_size)
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """Return the index for a .als file, parsing only when it changed."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            index = self._memory.get(path)
+        if self._is_fresh(index, stat):
+            return index
+
+        cache_file = self._cache_file(path)
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if self._is_fresh(index, stat):
+                print(f">> Live Set index loaded from cache: {os.path.basename(path)}")
+                with self._lock:
+                    self._memory[path] = index
+                return index
+        except (OSError, ValueError):
+            pass
+
+        print(f">> Parsing Live Set: {path}")
+        index = parse_set(path)
+        with self._lock:
+            self._memory[path] = index
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+        except OSError as e:
+            print(f"ERROR Could not write Live Set cache: {e}")
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python als_parser.py project.als")
+        sys.exit(1)
+    print(summarize(LiveSetIndex().load(sys.argv[1])))
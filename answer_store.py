@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Persistent answer cache for Profesor Ableton
+SQLite file in the cache dir, keyed by the normalized question, shared by
+the server (reads and live answers) and prewarm_cache.py (bulk answers)
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple, FrozenSet, Set
+
+# Only words that don't change what is asked; question words and verbs stay ("what is EQ" is not "how to use EQ")
+FILLER = frozenset("a an the please pls just hey hi so um".split())
+CONTRACTIONS = {"what's": "what is", "whats": "what is", "how's": "how is", "where's": "where is",
+                "it's": "it is", "that's": "that is", "i'm": "i am"}
+# Every question is about Ableton, so "... in Ableton" adds nothing (but "what is Ableton" keeps it)
+IN_ABLETON = re.compile(r"\b(?:in|with|on|using) ableton(?: live)?(?: \d+)?\b")
+WORD = re.compile(r"[\w#']+")
+KEY_VERSION = 2  # bumped when question_key() changes; stored keys are then recomputed
+
+
+def question_key(question: str) -> Tuple[str, FrozenSet[str]]:
+    """Normalized key plus the set of its words.
+
+    The key keeps word order ("compress before EQ" is not "EQ before compress")
+    and the question words; only case, contractions, filler words and a trailing
+    "in Ableton" are ignored. The set is for similarity checks.
+    """
+    text = IN_ABLETON.sub(" ", question.lower().replace("\u2019", "'"))
+    tokens = [t for w in WORD.findall(text) for t in CONTRACTIONS.get(w, w).split() if t not in FILLER]
+    return " ".join(tokens), frozenset(tokens)
+
+
+class AnswerStore:
+    """Answers by question key; ANSWER_CACHE_DAYS=0 turns the store off."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "answers.sqlite")
+        self.max_age = float(os.getenv("ANSWER_CACHE_DAYS", "120")) * 86400
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            # WAL: the server reads while prewarm_cache.py writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS answers ("
+                       "key TEXT PRIMARY KEY, question TEXT, answer TEXT, provider TEXT, created REAL)")
+            if db.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+                self._rekey(db)
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _rekey(db: sqlite3.Connection):
+        """Recompute every key from its question; of rows that now share a key the newest is kept."""
+        rows = db.execute("SELECT question, answer, provider, created FROM answers ORDER BY created").fetchall()
+        keyed = [(question_key(row[0])[0],) + tuple(row) for row in rows]
+        with db:
+            db.execute("DELETE FROM answers")
+            db.executemany("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)", [row for row in keyed if row[0]])
+            db.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def get(self, question: str) -> Optional[str]:
+        """Cached answer for a question, None if missing or expired."""
+        key = question_key(question)[0]
+        if not self.enabled or not key:
+            return None
+        with self._lock:
+            row = self._conn().execute("SELECT answer FROM answers WHERE key = ? AND created >= ?",
+                                       (key, time.time() - self.max_age)).fetchone()
+        return row[0] if row else None
+
+    def put(self, question: str, answer: str, provider: str = ""):
+        key = question_key(question)[0]
+        if not self.enabled or not key:
+            return
+        with self._lock:
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                       (key, question, answer, provider, time.time()))
+            db.commit()
+
+    def fresh_keys(self) -> Set[str]:
+        """Keys with an unexpired answer (prewarm_cache.py skips these when resuming)."""
+        if not self.enabled:
+            return set()
+        with self._lock:
+            rows = self._conn().execute("SELECT key FROM answers WHERE created >= ?",
+                                        (time.time() - self.max_age,)).fetchall()
+        return {row[0] for row in rows}
+
+    def count(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Chunked loudness and spectrum analysis of bounced mixes for Profesor Ableton
+Streams a memory-mapped WAV/AIFF in fixed-size chunks and computes integrated
+loudness (BS.1770 gating), true peak, crest factor and a long-term averaged
+spectrum with batched NumPy FFTs. Memory use does not grow with file length.
+"""
+
+import os
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from audio_io import AudioFile
+
+BLOCK_SECONDS = 0.4   # BS.1770 gating block
+HOP_SECONDS = 0.1     # 75% overlap
+BLOCKS_PER_CHUNK = 100
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+HIST_MIN, HIST_MAX, HIST_STEP = -70.0, 10.0, 0.01
+
+OVERSAMPLE = 4
+TRUE_PEAK_SEGMENT = 16384  # power of two keeps the FFTs fast
+TRUE_PEAK_MARGIN = 1024    # frames ignored at segment edges (FFT resampling ringing)
+SPECTRUM_FFT = 4096
+
+# Report bands (Hz) for the long-term spectrum
+BANDS: List[Tuple[str, float, float]] = [
+    ("sub", 20, 60), ("bass", 60, 250), ("low-mids", 250, 500), ("mids", 500, 2000),
+    ("high-mids", 2000, 4000), ("presence", 4000, 6000), ("air", 6000, 20000),
+]
+
+
+def _biquad_power(b: Tuple[float, float, float], a: Tuple[float, float, float], freqs: np.ndarray, rate: int) -> np.ndarray:
+    """|H(f)|^2 of a biquad."""
+    z = np.exp(-1j * 2 * np.pi * freqs / rate)
+    h = (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+    return np.abs(h) ** 2
+
+
+def k_weighting_power(freqs: np.ndarray, rate: int) -> np.ndarray:
+    """Power response of the BS.1770 K-weighting at any sample rate (libebur128 parameterization)."""
+    # Stage 1: high shelf (+4 dB above ~1.7 kHz)
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    # Stage 2: RLB high-pass (~38 Hz)
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    hp_b = (1.0, -2.0, 1.0)
+    hp_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    return _biquad_power(shelf_b, shelf_a, freqs, rate) * _biquad_power(hp_b, hp_a, freqs, rate)
+
+
+def channel_weights(channels: int) -> np.ndarray:
+    """BS.1770 channel weights (5.1: L R C LFE Ls Rs)."""
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    return np.ones(channels)
+
+
+def _db(value: float) -> float:
+    return float(10 * np.log10(value)) if value > 0 else float("-inf")
+
+
+def _finite(value: float, digits: int = 1) -> Optional[float]:
+    """Rounded value, None for -inf (nothing measured) so reports stay valid JSON."""
+    return round(value, digits) if np.isfinite(value) else None
+
+
+class _LoudnessMeter:
+    """Gated loudness from a fixed-size histogram of block loudness values.
+
+    Energy is measured per 100 ms sub-block (K-weighting applied in the frequency
+    domain); each 400 ms gating block is the mean of four consecutive sub-blocks.
+    """
+
+    def __init__(self, rate: int, channels: int):
+        self.hop = int(round(HOP_SECONDS * rate))
+        self.sub_blocks = int(round(BLOCK_SECONDS / HOP_SECONDS))
+        freqs = np.fft.rfftfreq(self.hop, 1.0 / rate)
+        # Parseval weights for a one-sided spectrum, folded with K-weighting
+        fold = np.full(len(freqs), 2.0)
+        fold[0] = 1.0
+        if self.hop % 2 == 0:
+            fold[-1] = 1.0
+        self.spectral_weight = (k_weighting_power(freqs, rate) * fold / self.hop ** 2).astype(np.float32)
+        self.channel_weights = channel_weights(channels).astype(np.float32)
+        self._tail = np.zeros(0, dtype=np.float64)
+        bins = int(round((HIST_MAX - HIST_MIN) / HIST_STEP))
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.energy = np.zeros(bins, dtype=np.float64)
+        self.max_momentary = float("-inf")
+
+    def add(self, frames: np.ndarray):
+        """Add consecutive, non-overlapping frames (a multiple of the hop size)."""
+        count = len(frames) // self.hop
+        if not count:
+            return
+        sub = frames[:count * self.hop].reshape(count, self.hop, -1).transpose(0, 2, 1)
+        mean_square = (np.abs(np.fft.rfft(sub, axis=-1)) ** 2 * self.spectral_weight).sum(axis=-1)
+        energies = np.concatenate((self._tail, (mean_square * self.channel_weights).sum(axis=-1)))
+        self._tail = energies[-(self.sub_blocks - 1):]
+        if len(energies) < self.sub_blocks:
+            return
+        energy = np.lib.stride_tricks.sliding_window_view(energies, self.sub_blocks).mean(axis=1)
+        with np.errstate(divide="ignore"):
+            loudness = -0.691 + 10 * np.log10(energy)
+        self.max_momentary = max(self.max_momentary, float(loudness.max()))
+        valid = loudness >= ABSOLUTE_GATE
+        index = np.clip(np.floor((loudness[valid] - HIST_MIN) / HIST_STEP), 0, len(self.counts) - 1).astype(np.int64)
+        np.add.at(self.counts, index, 1)
+        np.add.at(self.energy, index, energy[valid])
+
+    def integrated(self) -> float:
+        total = self.counts.sum()
+        if not total:
+            return float("-inf")
+        relative = -0.691 + _db(self.energy.sum() / total) + RELATIVE_GATE
+        first = int(np.clip(np.ceil((relative - HIST_MIN) / HIST_STEP), 0, len(self.counts)))
+        count = self.counts[first:].sum()
+        return -0.691 + _db(self.energy[first:].sum() / count) if count else float("-inf")
+
+
+def _true_peak(chunk: np.ndarray, first: bool, last: bool) -> float:
+    """Max absolute value after 4x FFT oversampling of overlapping power-of-two segments.
+
+    Each segment drops TRUE_PEAK_MARGIN frames of resampling ringing on both sides;
+    the chunk's own outer margins are covered by the neighbouring chunks.
+    """
+    m = TRUE_PEAK_MARGIN
+    x = np.pad(chunk, ((m if first else 0, m if last else 0), (0, 0)))
+    inner = TRUE_PEAK_SEGMENT - 2 * m
+    segments = max(1, -(-(len(x) - 2 * m) // inner))
+    x = np.pad(x, ((0, segments * inner + 2 * m - len(x)), (0, 0)))
+    windows = np.lib.stride_tricks.sliding_window_view(x, TRUE_PEAK_SEGMENT, axis=0)[::inner]
+    upsampled = np.fft.irfft(np.fft.rfft(windows, axis=-1), TRUE_PEAK_SEGMENT * OVERSAMPLE, axis=-1)
+    return float(np.abs(upsampled[..., m * OVERSAMPLE:(TRUE_PEAK_SEGMENT - m) * OVERSAMPLE]).max()) * OVERSAMPLE
+
+
+def analyze_audio(path: str, blocks_per_chunk: int = BLOCKS_PER_CHUNK) -> Dict[str, Any]:
+    """Stream a WAV/AIFF file and return loudness, peak and spectrum statistics."""
+    started = time.perf_counter()
+    audio = AudioFile(path)
+    rate, channels = audio.sample_rate, audio.channels
+    meter = _LoudnessMeter(rate, channels)
+    step = meter.hop * blocks_per_chunk
+    chunk_frames = step + 2 * TRUE_PEAK_MARGIN
+
+    sum_squares = np.zeros(channels, dtype=np.float64)
+    sample_peak = np.zeros(channels, dtype=np.float64)
+    true_peak = 0.0
+    spectrum_sum = np.zeros(SPECTRUM_FFT // 2 + 1, dtype=np.float64)
+    spectrum_frames = 0
+    window = np.hanning(SPECTRUM_FFT).astype(np.float32)
+
+    try:
+        for start, chunk in audio.chunks(chunk_frames, overlap=chunk_frames - step):
+            last = start + chunk_frames >= audio.frames
+            fresh = chunk if last else chunk[:step]  # frames not shared with the next chunk
+
+            sum_squares += np.einsum("ij,ij->j", fresh, fresh, dtype=np.float64)
+            sample_peak = np.maximum(sample_peak, np.abs(fresh).max(axis=0))
+            true_peak = max(true_peak, _true_peak(chunk, start == 0, last))
+            meter.add(fresh)
+
+            mono = fresh.mean(axis=1)
+            frames = len(mono) // SPECTRUM_FFT
+            if frames:
+                batch = mono[:frames * SPECTRUM_FFT].reshape(frames, SPECTRUM_FFT) * window
+                spectrum_sum += (np.abs(np.fft.rfft(batch, axis=1)) ** 2).sum(axis=0)
+                spectrum_frames += frames
+    finally:
+        audio.close()
+
+    duration = audio.duration
+    rms = np.sqrt(sum_squares / max(1, audio.frames))
+    overall_rms = float(np.sqrt(np.mean(rms ** 2)))
+    peak = float(sample_peak.max()) if channels else 0.0
+
+    freqs = np.fft.rfftfreq(SPECTRUM_FFT, 1.0 / rate)
+    ltas = spectrum_sum / max(1, spectrum_frames)
+    total_power = float(ltas[(freqs >= 20) & (freqs <= 20000)].sum())
+    bands = []
+    for name, low, high in BANDS:
+        power = float(ltas[(freqs >= low) & (freqs < min(high, rate / 2))].sum())
+        share = power / total_power if total_power > 0 else 0.0
+        bands.append({"band": name, "low_hz": low, "high_hz": high,
+                      "share_db": round(_db(share), 1) if share > 0 else None})
+
+    # Spectral tilt: dB per octave fitted over 1/3-octave band levels (50 Hz - 16 kHz)
+    centers = 50 * 2 ** (np.arange(0, 28) / 3)
+    centers = centers[centers < min(16000, rate / 2.5)]
+    levels = []
+    for fc in centers:
+        sel = (freqs >= fc / 2 ** (1 / 6)) & (freqs < fc * 2 ** (1 / 6))
+        levels.append(_db(float(ltas[sel].sum())) if ltas[sel].sum() > 0 else np.nan)
+    levels = np.array(levels)
+    ok = np.isfinite(levels)
+    tilt = float(np.polyfit(np.log2(centers[ok]), levels[ok], 1)[0]) if ok.sum() > 2 else 0.0
+
+    elapsed = time.perf_counter() - started
+    return {
+        "file": os.path.basename(path),
+        "sample_rate": rate,
+        "channels": channels,
+        "bits": audio.bits,
+        "duration_seconds": round(duration, 2),
+        # Loudness needs at least one 400 ms gating block
+        "too_short": audio.frames < meter.hop * meter.sub_blocks,
+        "silent": peak <= 1e-12,
+        "integrated_lufs": _finite(meter.integrated()),
+        "max_momentary_lufs": _finite(meter.max_momentary),
+        "sample_peak_dbfs": round(20 * np.log10(max(peak, 1e-12)), 2),
+        "true_peak_dbtp": round(20 * np.log10(max(true_peak, 1e-12)), 2),
+        "rms_dbfs": round(20 * np.log10(max(overall_rms, 1e-12)), 2),
+        "crest_factor_db": round(20 * np.log10(max(peak, 1e-12) / max(overall_rms, 1e-12)), 2),
+        "channel_rms_dbfs": [round(20 * np.log10(max(r, 1e-12)), 2) for r in rms],
+        "spectrum_bands": bands,
+        "spectral_tilt_db_per_octave": round(tilt, 2),
+        "analysis_seconds": round(elapsed, 3),
+        "realtime_factor": round(duration / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def summarize(report: Dict[str, Any]) -> str:
+    """Compact mix report for an LLM prompt."""
+    if report["too_short"]:
+        return (f"Mix '{report['file']}' is too short to measure ({report['duration_seconds']} s) - "
+                f"loudness and spectrum need at least {BLOCK_SECONDS:g} s of audio.")
+    if report["silent"]:
+        return f"Mix '{report['file']}' is silent - nothing to measure."
+    minutes, seconds = divmod(int(round(report["duration_seconds"])), 60)
+    if report["integrated_lufs"] is None:
+        loudness = "Loudness: too quiet to measure (below the -70 LUFS gate)."
+    else:
+        loudness = (f"Loudness: {report['integrated_lufs']} LUFS integrated, "
+                    f"max momentary {report['max_momentary_lufs']} LUFS.")
+    lines = [
+        f"Mix '{report['file']}': {minutes}:{seconds:02d}, {report['sample_rate']} Hz, "
+        f"{report['channels']} ch, {report['bits']}-bit.",
+        loudness,
+        f"Peaks: true peak {report['true_peak_dbtp']} dBTP, sample peak {report['sample_peak_dbfs']} dBFS, "
+        f"RMS {report['rms_dbfs']} dBFS, crest factor {report['crest_factor_db']} dB.",
+    ]
+    bands = ", ".join(f"{b['band']} {b['share_db']} dB" for b in report["spectrum_bands"] if b["share_db"] is not None)
+    if bands:
+        lines.append(f"Long-term spectrum (share of total energy): {bands}.")
+    lines.append(f"Spectral tilt: {report['spectral_tilt_db_per_octave']} dB/octave "
+                 f"(pink noise is -3 dB/octave; flatter sounds brighter, steeper sounds darker).")
+    if len(report["channel_rms_dbfs"]) == 2:
+        left, right = report["channel_rms_dbfs"]
+        lines.append(f"Channel balance: L {left} dBFS, R {right} dBFS RMS.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python audio_analyzer.py mix.wav")
+        sys.exit(1)
+    result = analyze_audio(sys.argv[1])
+    print(summarize(result))
+    print(f">> Analyzed in {result['analysis_seconds']}s ({result['realtime_factor']}x real time)")
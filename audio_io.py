@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped WAV/AIFF access for Profesor Ableton's audio analysis
+Parses RIFF/RF64 and AIFF/AIFC headers and exposes sample frames as
+NumPy views, so files are read in chunks instead of loaded whole
+"""
+
+import os
+import struct
+from typing import Optional, Iterator, Tuple
+
+import numpy as np
+
+AUDIO_EXTENSIONS = (".wav", ".wave", ".aif", ".aiff", ".aifc")
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _extended_to_float(data: bytes) -> float:
+    """Decode an 80-bit IEEE 754 extended float (AIFF sample rate)."""
+    exponent = int.from_bytes(data[0:2], "big")
+    mantissa = int.from_bytes(data[2:10], "big")
+    sign = -1.0 if exponent & 0x8000 else 1.0
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+class AudioFile:
+    """Header info plus a memory-mapped view of the sample data."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sample_rate = 0
+        self.channels = 0
+        self.bits = 0
+        self.frames = 0
+        self.is_float = False
+        self.big_endian = False
+        self.data_offset = 0
+        self._raw: Optional[np.ndarray] = None
+
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if header[:4] in (b"RIFF", b"RF64") and header[8:12] == b"WAVE":
+                self._parse_wav(f, header[:4] == b"RF64")
+            elif header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+                self._parse_aiff(f, header[8:12] == b"AIFC")
+            else:
+                raise ValueError(f"Unsupported audio format: {os.path.basename(path)}")
+
+        if not (self.sample_rate and self.channels and self.bits):
+            raise ValueError(f"Incomplete audio header: {os.path.basename(path)}")
+        if self.bits not in (8, 16, 24, 32, 64):
+            raise ValueError(f"Unsupported bit depth {self.bits}: {os.path.basename(path)}")
+
+        # Truncated files: trust the bytes actually present
+        available = os.path.getsize(path) - self.data_offset
+        self.frames = max(0, min(self.frames, available // self.frame_bytes))
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.bits // 8
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def _parse_wav(self, f, rf64: bool):
+        data_size_64 = None
+        data_size = 0
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"ds64" and rf64:
+                body = f.read(size)
+                data_size_64 = struct.unpack("<Q", body[8:16])[0]
+            elif chunk_id == b"fmt ":
+                body = f.read(size)
+                fmt, self.channels, self.sample_rate = struct.unpack("<HHI", body[:8])
+                self.bits = struct.unpack("<H", body[14:16])[0]
+                if fmt == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    fmt = struct.unpack("<H", body[24:26])[0]
+                if fmt not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                    raise ValueError(f"Compressed WAV (format {fmt:#x}) not supported")
+                self.is_float = fmt == WAVE_FORMAT_IEEE_FLOAT
+            elif chunk_id == b"data":
+                self.data_offset = f.tell()
+                data_size = data_size_64 if (rf64 and size == 0xFFFFFFFF and data_size_64) else size
+                break
+            else:
+                f.seek(size, os.SEEK_CUR)
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        if self.channels and self.bits:
+            self.frames = data_size // self.frame_bytes
+
+    def _parse_aiff(self, f, aifc: bool):
+        self.big_endian = True
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            chunk_id, size = chunk[:4], struct.unpack(">I", chunk[4:])[0]
+            if chunk_id == b"COMM":
+                body = f.read(size)
+                self.channels, self.frames, self.bits = struct.unpack(">HIH", body[:8])
+                self.sample_rate = int(round(_extended_to_float(body[8:18])))
+                if aifc and len(body) >= 22:
+                    compression = body[18:22]
+                    if compression == b"sowt":
+                        self.big_endian = False
+                    elif compression in (b"fl32", b"FL32", b"fl64", b"FL64"):
+                        self.is_float = True
+                    elif compression not in (b"NONE", b"twos"):
+                        raise ValueError(f"Compressed AIFC ({compression.decode('latin-1')}) not supported")
+            elif chunk_id == b"SSND":
+                offset = struct.unpack(">I", f.read(4))[0]
+                f.read(4)  # block size
+                self.data_offset = f.tell() + offset
+                break
+            else:
+                f.seek(size, os.SEEK_CUR)
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+
+    def raw(self) -> np.ndarray:
+        """Memory-mapped (frames, channels[, 3]) view of the undecoded samples."""
+        if self._raw is None:
+            order = ">" if self.big_endian else "<"
+            if self.bits == 24:
+                dtype, shape = np.uint8, (self.frames, self.channels, 3)
+            elif self.is_float:
+                dtype, shape = np.dtype(f"{order}f{self.bits // 8}"), (self.frames, self.channels)
+            elif self.bits == 8:
+                # WAV 8-bit is unsigned, AIFF 8-bit is signed
+                dtype, shape = (np.int8 if self.big_endian else np.uint8), (self.frames, self.channels)
+            else:
+                dtype, shape = np.dtype(f"{order}i{self.bits // 8}"), (self.frames, self.channels)
+            if self.frames == 0:
+                self._raw = np.zeros(shape, dtype=dtype)
+            else:
+                self._raw = np.memmap(self.path, dtype=dtype, mode="r", offset=self.data_offset, shape=shape)
+        return self._raw
+
+    def read(self, start: int = 0, count: Optional[int] = None) -> np.ndarray:
+        """Decode frames [start, start + count) to float32 in [-1, 1], shape (n, channels)."""
+        end = self.frames if count is None else min(self.frames, start + count)
+        block = self.raw()[start:end]
+        if self.bits == 24:
+            b = block.astype(np.int32)
+            if self.big_endian:
+                values = (b[..., 0] << 24) | (b[..., 1] << 16) | (b[..., 2] << 8)
+            else:
+                values = (b[..., 2] << 24) | (b[..., 1] << 16) | (b[..., 0] << 8)
+            return values.astype(np.float32) / 2147483648.0
+        if self.is_float:
+            return block.astype(np.float32)
+        if self.bits == 8 and not self.big_endian:
+            return (block.astype(np.float32) - 128.0) / 128.0
+        return block.astype(np.float32) / float(2 ** (self.bits - 1))
+
+    def chunks(self, chunk_frames: int, overlap: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (start frame, float32 block) pairs of fixed size; consecutive blocks overlap by `overlap` frames."""
+        step = chunk_frames - overlap
+        if step <= 0:
+            raise ValueError("overlap must be smaller than chunk size")
+        start = 0
+        while start < self.frames:
+            yield start, self.read(start, chunk_frames)
+            if start + chunk_frames >= self.frames:
+                break
+            start += step
+
+    def close(self):
+        """Drop the memory map (it is recreated on the next read)."""
+        self._raw = None
+
+
+def is_audio_file(name: str) -> bool:
+    return name.lower().endswith(AUDIO_EXTENSIONS)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Record/replay of provider calls for Profesor Ableton
+In record mode every ask_* call of AIProvider is appended to a gzipped
+JSON-lines cassette together with how long it took; in replay mode the
+same calls are answered from the cassette, optionally with the recorded
+timing, so benchmarks and regression runs need no network
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional, Dict, List, Any, Callable
+
+PROVIDERS = ("ollama", "grok", "groq", "claude", "openai")
+MODES = ("off", "record", "replay")
+
+
+def request_key(provider: str, question: str, context: Optional[str], max_tokens: int, strong: bool) -> str:
+    raw = json.dumps([provider, question, context or "", max_tokens, bool(strong)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """One cassette file, either being recorded or replayed."""
+
+    def __init__(self, path: Optional[str] = None, mode: str = "replay", speed: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}")
+        self.path = path or os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "cassette.jsonl.gz")
+        self.mode = mode
+        self.speed = speed  # replay: 1 = recorded timing, 2 = twice as fast, 0 = instant
+        self.recorded = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._next: Dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            print(f"ERROR Cassette {self.path} not found - every call will miss")
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._calls[entry["key"]].append(entry)
+        print(f">> Replaying {sum(len(v) for v in self._calls.values())} calls from {self.path}")
+
+    def _record(self, entry: Dict[str, Any]):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Appending gzip members keeps the file valid after every call
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def _replay(self, key: str, timeout: Optional[float], cancel: Optional[threading.Event]) -> Optional[str]:
+        with self._lock:
+            calls = self._calls.get(key)
+            if not calls:
+                self.misses += 1
+                return None
+            # Repeats of a request get its recordings in order, then start over
+            entry = calls[self._next[key] % len(calls)]
+            self._next[key] += 1
+        latency = entry["latency"] / self.speed if self.speed > 0 else 0.0
+        timed_out = timeout is not None and latency > timeout
+        delay = min(latency, timeout) if timed_out else latency
+        if delay > 0:
+            if cancel is not None:
+                if cancel.wait(delay):
+                    return None
+            else:
+                time.sleep(delay)
+        return None if timed_out else entry["answer"]
+
+    def wrap(self, provider: str, ask: Callable) -> Callable:
+        """ask_* replacement with the same signature."""
+        def call(question: str, timeout: Optional[float] = None, max_tokens: int = 500, strong: bool = False,
+                 cancel: Optional[threading.Event] = None, context: Optional[str] = None) -> Optional[str]:
+            key = request_key(provider, question, context, max_tokens, strong)
+            if self.mode == "replay":
+                answer = self._replay(key, timeout, cancel)
+                print(f">> Cassette {'replayed' if answer else 'no answer for'} {provider}: {question[:50]}")
+                return answer
+            started = time.monotonic()
+            answer = ask(question, timeout, max_tokens, strong, cancel, context)
+            if cancel is None or not cancel.is_set():
+                # Failures are kept too: they are part of the traffic being reproduced
+                self._record({"key": key, "provider": provider, "question": question, "max_tokens": max_tokens,
+                              "strong": bool(strong), "latency": round(time.monotonic() - started, 4),
+                              "answer": answer, "time": time.time()})
+            return answer
+        return call
+
+    def install(self, ai) -> "Cassette":
+        """Wrap every ask_* method of an AIProvider instance."""
+        if self.mode != "off":
+            for provider in PROVIDERS:
+                setattr(ai, f"ask_{provider}", self.wrap(provider, getattr(ai, f"ask_{provider}")))
+            print(f">> Cassette {self.mode}: {self.path}")
+        if self.mode == "replay":
+            # Replayed answers must not land in (or be short-circuited by) the real answer store
+            ai.answers.max_age = 0
+            print(">> Answer store off while replaying")
+        return self
+
+
+def from_env() -> Cassette:
+    """Cassette configured by CASSETTE_MODE, CASSETTE_PATH and CASSETTE_SPEED."""
+    return Cassette(os.getenv("CASSETTE_PATH") or None, os.getenv("CASSETTE_MODE", "off").lower(),
+                    float(os.getenv("CASSETTE_SPEED", "1")))
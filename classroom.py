@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Classroom rooms for Profesor Ableton workshops
+Tracks who is in a class (instructors and students) and keeps the room's
+recent answers, so a question asked again by another student is answered
+from the room instead of by another provider call
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set, List, FrozenSet
+
+from answer_store import question_key
+
+MAX_ANSWERS = 200
+MATCH_THRESHOLD = 0.8
+
+
+def _in_order(a: List[str], b: List[str], common: FrozenSet[str]) -> bool:
+    """True if the words both questions share appear in the same order in each."""
+    return [w for w in a if w in common] == [w for w in b if w in common]
+
+
+class ClassRoom:
+    """Members of one class plus the answers given in it recently."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.students: Set[str] = set()
+        self.instructors: Set[str] = set()
+        self.inflight: Dict[str, Any] = {}  # question key -> event set when the answer is stored
+        self.answer_ttl = float(os.getenv("CLASS_ANSWER_TTL", "900"))
+        self._answers: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, sid: str, role: str):
+        (self.instructors if role == "instructor" else self.students).add(sid)
+
+    def remove(self, sid: str):
+        self.students.discard(sid)
+        self.instructors.discard(sid)
+
+    @property
+    def size(self) -> int:
+        return len(self.students) + len(self.instructors)
+
+    def _expire(self):
+        cutoff = time.time() - self.answer_ttl
+        while self._answers:
+            key, entry = next(iter(self._answers.items()))
+            if entry["time"] >= cutoff:
+                break
+            del self._answers[key]
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """Recent answer to the same (or nearly the same) question, if any."""
+        self._expire()
+        key, words = question_key(question)
+        if not words:
+            return None
+        entry = self._answers.get(key)
+        if entry is not None:
+            return entry
+        # Nearly the same wording: content-word overlap (Jaccard), with the shared words in the same
+        # order - "compress before EQ" must not get the answer to "EQ before compress"
+        tokens = key.split()
+        best, best_score = None, MATCH_THRESHOLD
+        for candidate_key, candidate in self._answers.items():
+            common = words & candidate["words"]
+            score = len(common) / len(words | candidate["words"])
+            if score >= best_score and _in_order(tokens, candidate_key.split(), common):
+                best, best_score = candidate, score
+        return best
+
+    def remember(self, question: str, answer: str, role: str):
+        key, words = question_key(question)
+        if not words:
+            return
+        self._answers.pop(key, None)
+        self._answers[key] = {"question": question, "answer": answer, "role": role, "words": words, "time": time.time()}
+        while len(self._answers) > MAX_ANSWERS:
+            self._answers.popitem(last=False)
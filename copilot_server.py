@@ -1,408 +1,501 @@
+import atexit
+import hmac
+import itertools
 import json
 import os
-import requests
+import threading
+import time
 import psutil
-from typing import Optional, Dict, Any, List
-from dotenv import load_dotenv
+from typing import Optional, Dict, Any, List, Tuple
+from dotenv import dotenv_values, find_dotenv
 
 try:
     import socketio  # type: ignore
     import eventlet  # type: ignore
-    from groq import Groq  # type: ignore
-    import anthropic  # type: ignore
-    import openai  # type: ignore
+    import eventlet.tpool  # type: ignore
+    import eventlet.event  # type: ignore
+    from ai_provider import AIProvider
+    from midi_analyzer import MidiAnalyzer, summarize as summarize_midi
+    from midi_transform import transform_files, summarize as summarize_transform
+    import music_theory
+    from midi_input import MidiInput, FileSource, PortSource
+    from osc_bridge import AbletonOSCBridge
+    from ableton_state import AbletonState
+    from als_parser import LiveSetIndex, summarize as summarize_set
+    from sample_indexer import SampleIndex, format_results as format_samples, sample_folders
+    from audio_analyzer import analyze_audio, summarize as summarize_audio
+    from masking_analyzer import analyze_masking, summarize as summarize_masking, ADVICE_QUESTION
+    import transport_codec
+    from profiling import Profiler
+    from classroom import ClassRoom
+    from answer_store import question_key
+    import local_socket
+    import prompts
+    import cassette
 except ImportError as e:
     print(f"Error: Missing required packages - {e}")
     print("Install with: pip install -r requirements.txt")
     exit(1)
 
+ENV_FILE = find_dotenv() or ".env"
+# Variables set outside .env win over it, at startup and on every reload
+PROCESS_ENV_KEYS = frozenset(os.environ)
+env_file_values: Dict[str, str] = {}
+
+def apply_env_file():
+    """Copy .env into os.environ, dropping variables that were removed from it."""
+    global env_file_values
+    values = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None and k not in PROCESS_ENV_KEYS}
+    for key in set(env_file_values) - set(values):
+        os.environ.pop(key, None)
+    os.environ.update(values)
+    env_file_values = values
+
 # Load environment variables - skip if .env file has issues
 try:
-    load_dotenv()
+    apply_env_file()
 except:
     print("Warning: Could not load .env file, using defaults")
 
-class AIProvider:
-    def __init__(self):
-        self.ollama_url = "http://localhost:11434"
-        self.ollama_model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
-        self.ollama_timeout = int(os.getenv("OLLAMA_TIMEOUT", "60"))
-        
-        # API clients
-        self.grok_client = None
-        self.groq_client = None
-        self.claude_client = None
-        self.openai_client = None
-        
-        # Initialize API clients
-        self._init_api_clients()
-        
-        # Provider priority
-        providers_str = os.getenv("AI_PROVIDERS", "groq,ollama,grok,claude,openai")
-        self.providers = [p.strip() for p in providers_str.split(",")]
-        print(f">> AI Provider priority: {self.providers}")
-        
-    def _init_api_clients(self):
-        """Initialize API clients with keys from environment."""
-        # xAI Grok
-        xai_key = os.getenv("XAI_API_KEY")
-        if xai_key and xai_key != "your_xai_api_key_here":
-            try:
-                # xAI uses OpenAI-compatible API, so we use openai client
-                self.grok_client = openai.OpenAI(
-                    api_key=xai_key,
-                    base_url="https://api.x.ai/v1"
-                )
-                print("OK xAI Grok API client initialized")
-            except Exception as e:
-                print(f"ERROR xAI Grok initialization failed: {e}")
-        
-        # Groq - GitHub version with placeholder
-        # Windows users: If .env doesn't work, replace this line with:
-        # groq_key = "your_groq_api_key_here"
-        groq_key = os.getenv("GROQ_API_KEY")
-        if groq_key and groq_key != "your_groq_api_key_here":
-            try:
-                self.groq_client = Groq(api_key=groq_key)
-                print("OK Groq API client initialized")
-            except Exception as e:
-                print(f"ERROR Groq initialization failed: {e}")
-        
-        # Claude (Anthropic)
-        claude_key = os.getenv("ANTHROPIC_API_KEY")
-        if claude_key and claude_key != "your_anthropic_api_key_here":
-            try:
-                self.claude_client = anthropic.Anthropic(api_key=claude_key)
-                print("OK Claude API client initialized")
-            except Exception as e:
-                print(f"ERROR Claude initialization failed: {e}")
-        
-        # OpenAI
-        openai_key = os.getenv("OPENAI_API_KEY")
-        if openai_key and openai_key != "your_openai_api_key_here":
-            try:
-                self.openai_client = openai.OpenAI(api_key=openai_key)
-                print("OK OpenAI API client initialized")
-            except Exception as e:
-                print(f"ERROR OpenAI initialization failed: {e}")
-        
-    def ask_ollama(self, question: str) -> Optional[str]:
-        """Send question to local Ollama model."""
-        try:
-            print(f">> Asking Ollama ({self.ollama_model}): {question[:50]}...")
-            
-            response = requests.post(f"{self.ollama_url}/api/generate", 
-                json={
-                    "model": self.ollama_model,
-                    "prompt": f"As an Ableton Live expert, answer briefly and helpfully: {question}",
-                    "stream": False
-                }, timeout=self.ollama_timeout)
-            
-            if response.status_code == 200:
-                result = response.json().get("response", "").strip()
-                if result:
-                    print(f"OK Ollama responded: {result[:50]}...")
-                    return result
-                else:
-                    print("ERROR Ollama returned empty response")
-            else:
-                print(f"ERROR Ollama HTTP error {response.status_code}: {response.text}")
-                
-        except requests.exceptions.Timeout:
-            print(f"TIMEOUT Ollama timeout after {self.ollama_timeout}s")
-        except requests.exceptions.ConnectionError:
-            print(">> Ollama connection failed - is 'ollama serve' running?")
-        except Exception as e:
-            print(f"ERROR Ollama error: {e}")
-        return None
-    
-    def ask_grok(self, question: str) -> Optional[str]:
-        """Send question to xAI Grok API."""
-        if not self.grok_client:
-            print("ERROR Grok client not initialized - check XAI_API_KEY")
-            return None
-            
-        try:
-            print(f">> Asking Grok: {question[:50]}...")
-            
-            response = self.grok_client.chat.completions.create(
-                model="grok-4-latest",  # Latest Grok model
-                messages=[
-                    {"role": "system", "content": "You are Profesor Ableton, a groovy music guru from the comic underground scene! You're an expert Ableton Live producer who talks like a cool, laid-back comic book character. Use phrases like 'Far out!', 'Righteous!', 'That's heavy, man!' and give solid Ableton advice with comic book flair. Keep it helpful but fun!"},
-                    {"role": "user", "content": question}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            result = response.choices[0].message.content.strip()
-            if result:
-                print(f"OK Grok responded: {result[:50]}...")
-                return result
-            else:
-                print("ERROR Grok returned empty response")
-                
-        except Exception as e:
-            print(f"ERROR Grok error: {e}")
-        return None
-    
-    def ask_groq(self, question: str) -> Optional[str]:
-        """Send question to Groq API."""
-        if not self.groq_client:
-            print("ERROR Groq client not initialized - check API key")
-            return None
-            
-        try:
-            print(f">> Asking Groq: {question[:50]}...")
-            
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",  # Updated fast Groq model
-                messages=[
-                    {"role": "system", "content": "You are Profesor Ableton, a groovy music guru from the comic underground scene! You're an expert Ableton Live producer who talks like a cool, laid-back comic book character. Use phrases like 'Far out!', 'Righteous!', 'That's heavy, man!' and give solid Ableton advice with comic book flair. Keep it helpful but fun!"},
-                    {"role": "user", "content": question}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            result = response.choices[0].message.content.strip()
-            if result:
-                print(f"OK Groq responded: {result[:50]}...")
-                return result
-            else:
-                print("ERROR Groq returned empty response")
-                
-        except Exception as e:
-            print(f"ERROR Groq error: {e}")
-        return None
-    
-    def ask_claude(self, question: str) -> Optional[str]:
-        """Send question to Claude API."""
-        if not self.claude_client:
-            print("ERROR Claude client not initialized - check API key")
-            return None
-            
-        try:
-            print(f">> Asking Claude: {question[:50]}...")
-            
-            response = self.claude_client.messages.create(
-                model="claude-3-haiku-20240307",  # Fast Claude model
-                max_tokens=500,
-                system="You are an expert Ableton Live music producer. Answer questions briefly and helpfully.",
-                messages=[
-                    {"role": "user", "content": question}
-                ]
-            )
-            
-            result = response.content[0].text.strip()
-            if result:
-                print(f"OK Claude responded: {result[:50]}...")
-                return result
-            else:
-                print("ERROR Claude returned empty response")
-                
-        except Exception as e:
-            print(f"ERROR Claude error: {e}")
-        return None
+# Create AI provider, analyzers and socket.io server. Worker processes of
+# transform_midi/analyze_masking run this file as __mp_main__ and need none of it.
+if __name__ != "__mp_main__":
+    ai = AIProvider()
+    # CASSETTE_MODE=record|replay: provider calls go to/come from a cassette file
+    provider_cassette = cassette.from_env().install(ai)
+    midi_analyzer = MidiAnalyzer()
+    osc = AbletonOSCBridge()
+    # Mirror of the open Live set; AIProvider adds it to questions about "my track", "this clip"...
+    ableton = AbletonState(osc)
+    ai.session = ableton
+    live_sets = LiveSetIndex()
+    live_midi = MidiInput()
+    samples = SampleIndex()
+
+class ClientState:
+    """Everything the server keeps per connection, in one small object per sid."""
+    __slots__ = ("codec", "context", "requests", "room", "role")
     
-    def ask_openai(self, question: str) -> Optional[str]:
-        """Send question to OpenAI API."""
-        if not self.openai_client:
-            print("ERROR OpenAI client not initialized - check API key")
-            return None
-            
-        try:
-            print(f">> Asking OpenAI: {question[:50]}...")
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Affordable OpenAI model
-                messages=[
-                    {"role": "system", "content": "You are Profesor Ableton, a groovy music guru from the comic underground scene! You're an expert Ableton Live producer who talks like a cool, laid-back comic book character. Use phrases like 'Far out!', 'Righteous!', 'That's heavy, man!' and give solid Ableton advice with comic book flair. Keep it helpful but fun!"},
-                    {"role": "user", "content": question}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            result = response.choices[0].message.content.strip()
-            if result:
-                print(f"OK OpenAI responded: {result[:50]}...")
-                return result
-            else:
-                print("ERROR OpenAI returned empty response")
-                
-        except Exception as e:
-            print(f"ERROR OpenAI error: {e}")
+    def __init__(self, codec: str):
+        self.codec = codec                                  # "json" or "msgpack", negotiated at connect
+        self.context: Optional[str] = None                  # project summary injected into questions
+        self.requests: Dict[str, threading.Event] = {}      # in-flight request id -> cancel flag
+        self.room: Optional[str] = None                     # class joined with join_class
+        self.role: Optional[str] = None                     # "instructor" or "student"
+
+clients: Dict[str, ClientState] = {}
+classes: Dict[str, ClassRoom] = {}
+MAX_PENDING_PER_CLIENT = int(os.getenv("MAX_PENDING_PER_CLIENT", "2"))
+request_ids = itertools.count(1)
+profiler = Profiler()
+sio = socketio.Server()
+app = socketio.WSGIApp(sio)
+
+def emit_to(sid, event, payload):
+    """Emit to one client in the codec it negotiated at connect."""
+    state = clients.get(sid)
+    if state is None:
+        return  # disconnected meanwhile
+    if state.codec == transport_codec.MSGPACK:
+        payload = transport_codec.encode(payload)
+    sio.emit(event, payload, to=sid)
+
+def emit_to_class(name: str, event, payload, skip_sid=None):
+    """Fan a payload out to a whole class; each codec has its own Socket.IO room, so it is encoded once."""
+    sio.emit(event, payload, room=f"{name}/{transport_codec.JSON}", skip_sid=skip_sid)
+    if transport_codec.MSGPACK_AVAILABLE:
+        sio.emit(event, transport_codec.encode(payload), room=f"{name}/{transport_codec.MSGPACK}", skip_sid=skip_sid)
+
+def leave_class(sid, state: ClientState) -> Optional[str]:
+    """Take a client out of its class; empty classes are dropped."""
+    name = state.room
+    if name is None:
         return None
-    
-    def get_answer(self, question: str, preferred_model: str = None) -> str:
-        """Try to get answer from available providers in priority order."""
-        print(f">> Looking for answer to: {question}")
-        if preferred_model:
-            print(f">> Preferred model: {preferred_model}")
-        
-        # Use preferred model first if specified
-        providers_to_try = []
-        if preferred_model and preferred_model in self.providers:
-            providers_to_try.append(preferred_model)
-            # Add other providers as fallback
-            providers_to_try.extend([p for p in self.providers if p != preferred_model])
-        else:
-            providers_to_try = self.providers
-        
-        for provider in providers_to_try:
-            if provider == "ollama":
-                answer = self.ask_ollama(question)
-                if answer:
-                    return f">> [Ollama] {answer}"
-                elif preferred_model == "ollama":
-                    return ">> ERROR Ollama not running. Start with 'ollama serve' or switch to Groq (free)"
-                    
-            elif provider == "grok":
-                answer = self.ask_grok(question)
-                if answer:
-                    return f">> [Grok] {answer}"
-                elif preferred_model == "grok":
-                    return ">> ERROR xAI Grok requires paid API key. Get credits at https://console.x.ai/ or switch to Groq (free)"
-                    
-            elif provider == "groq":
-                answer = self.ask_groq(question)
-                if answer:
-                    return f">> [Groq] {answer}"
-                    
-            elif provider == "claude":
-                answer = self.ask_claude(question)
-                if answer:
-                    return f">> [Claude] {answer}"
-                elif preferred_model == "claude":
-                    return ">> ERROR Claude requires paid API key. Get one at https://console.anthropic.com/ or switch to Groq (free)"
-                    
-            elif provider == "openai":
-                answer = self.ask_openai(question)
-                if answer:
-                    return f">> [OpenAI] {answer}"
-                elif preferred_model == "openai":
-                    return ">> ERROR OpenAI requires paid API key. Get one at https://platform.openai.com/ or switch to Groq (free)"
-        
-        print("ERROR All AI providers failed")
-        
-        # Simple fallback responses for common Ableton questions
-        question_lower = question.lower()
-        if ("arranged view" in question_lower or "arrangement view" in question_lower or 
-            "aranged view" in question_lower or ("otvorim" in question_lower and "view" in question_lower) or
-            ("otvaram" in question_lower and "view" in question_lower) or "tab key" in question_lower):
-            return ">> Arranged View in Ableton Live is the timeline view where you build your full song structure. It shows audio and MIDI clips arranged horizontally across time, allowing you to create intro, verse, chorus, outro sections. Switch between Session View (clip launcher) and Arrangement View using Tab key. Press TAB to switch between views."
-        elif "eq" in question_lower and "ableton" in question_lower:
-            return ">> EQ (Equalizer) in Ableton Live is used to adjust frequency content of audio. Ableton has EQ Eight (8-band) and EQ Three (3-band). Use it to cut unwanted frequencies, boost desired ones, or create space in your mix. High-pass filters remove low rumble, low-pass filters remove harshness."
-        elif "compressor" in question_lower or "compression" in question_lower:
-            return ">> Compressor in Ableton reduces dynamic range by lowering loud parts. Key settings: Threshold (when compression starts), Ratio (how much compression), Attack (how fast), Release (how fast it stops). Use for evening out levels, adding punch, or gluing mix elements together."
-        elif "session view" in question_lower or ("session" in question_lower and "view" in question_lower):
-            return ">> Session View in Ableton Live is the clip launcher view where you can trigger clips in real-time. Each track has clip slots that can contain audio or MIDI clips. Perfect for live performance, jamming, and experimenting with song ideas. Press TAB to switch to Arrangement View."
-        elif "reverb" in question_lower:
-            return ">> Reverb in Ableton simulates acoustic spaces and adds depth to sounds. Use Reverb device or sends/returns for efficiency. Key parameters: Room Size, Decay Time, Pre-Delay, Dry/Wet. Sends allow multiple tracks to use same reverb, saving CPU and creating cohesive space."
-        elif "delay" in question_lower:
-            return ">> Delay in Ableton creates echoes and rhythmic effects. Simple Delay for basic echoes, Ping Pong Delay for stereo bouncing, Echo for complex modulated delays. Key settings: Time (sync to tempo), Feedback (number of repeats), Dry/Wet mix."
-        elif "midi" in question_lower and ("što" in question_lower or "what" in question_lower):
-            return ">> MIDI (Musical Instrument Digital Interface) is a protocol for sending musical information between devices. In Ableton, MIDI clips contain note data, not audio. MIDI notes trigger sounds from instruments. You can edit notes in MIDI Editor, adjust velocity, timing, and duration."
-        elif ("ne znam" in question_lower or "početnik" in question_lower or "beginner" in question_lower or 
-              ("korak po korak" in question_lower) or ("step by step" in question_lower) or 
-              ("kako početi" in question_lower) or ("getting started" in question_lower) or
-              ("voditi" in question_lower) or ("guide" in question_lower)):
-            return """>> ABLETON LIVE - POČETNI VODIČ:
+    room = classes.get(name)
+    if room is not None:
+        room.remove(sid)
+        if room.size == 0:
+            del classes[name]
+    sio.leave_room(sid, f"{name}/{state.codec}")
+    state.room = state.role = None
+    return name
 
-1. OSNOVNI LAYOUT:
-   - Session View (clip launcher) - za jamiranje i eksperimente
-   - Arrangement View (timeline) - za stvaranje kompletne pjesme
-   - Prebacivanje: TAB tipka
+def shared_answer(room: ClassRoom, question: str) -> Tuple[Optional[Dict[str, Any]], Optional[Any]]:
+    """Recent class answer to this question, or the event to send once this client has answered it.
 
-2. PRVI KORACI:
-   - Stvori novi Live Set (File > New)
-   - Dodaj Audio Track (Ctrl+T)
-   - Povuci audio fajl u track ili record mikrofon
-   - Play dugme ili Space za reprodukciju
+    While a classmate is answering the same question this waits for them; if their answer failed,
+    the first waiter to wake up takes the question over and the others keep waiting for it.
+    """
+    key = question_key(question)[0]
+    while True:
+        shared = room.lookup(question)
+        if shared is not None or not key:
+            return shared, None
+        mine = eventlet.event.Event()
+        waiting = room.inflight.setdefault(key, mine)
+        if waiting is mine:
+            return None, mine
+        waiting.wait()
 
-3. OSNOVNI WORKFLOW:
-   - Record: R tipka ili Record dugme
-   - Play/Stop: Space tipka
-   - Tempo: mijenjaj BPM gore lijevo
-   - Volume: fader-i desno od track-a
+def share_answer(sid, state: ClientState, room: ClassRoom, question: str, answer: str):
+    """Keep a class answer for later askers; instructor answers also go to everyone."""
+    if answer.startswith(("ERROR", ">> ERROR", ">> Request cancelled")):
+        return
+    if not state.context:  # answers about one client's own project are not shared
+        room.remember(question, answer, state.role)
+    if state.role == "instructor":
+        emit_to_class(room.name, "class_answer", {"message": answer, "question": question, "type": "class_answer"}, skip_sid=sid)
 
-4. SLJEDEĆI KORACI:
-   - Dodaj MIDI track za virtuelne instrumente
-   - Eksperimentiraj s built-in zvukovima (Drums, Bass, Keys)
-   - Koristi Audio Effects (Reverb, Delay, EQ)
-   - Snimaj sve u Arrangement View za finalnu pjesmu
+def reload_config() -> List[str]:
+    """Re-read .env and update the AI providers in place; clients and caches are untouched."""
+    apply_env_file()
+    changed = ai.reload()
+    if "ollama" in ai.providers:
+        ai.ollama.start()
+    return changed
 
-SAVJET: Počni s jednostavnim - jedan drum loop, jedna melodija!"""
-        elif ("kako napraviti" in question_lower and ("beat" in question_lower or "ritam" in question_lower)):
-            return ">> KAKO NAPRAVITI BEAT: 1) Dodaj MIDI track (Ctrl+Shift+T) 2) Povuci Drum Kit iz browser-a 3) Double-click za otvoriti MIDI clip 4) Crtan note-ove: Kick (C1), Snare (D1), Hi-hat (F#1) 5) Koristi kvantizaciju (Ctrl+U) za savršen timing 6) Eksperimentiraj s velocity za dinamiku"
-        elif ("kako snimiti" in question_lower or ("record" in question_lower and "audio" in question_lower)):
-            return ">> SNIMANJE AUDIO: 1) Dodaj Audio Track (Ctrl+T) 2) Spoji mikrofon/instrument u audio interface 3) Odaberi Input (IO sekcija) 4) Uključi Monitor (Auto/In/Off) 5) Pritisni Record (R) i Play (Space) 6) Snimaj! Savjeti: Postavi levels, koristi click track (metronom)"
-        elif ("browser" in question_lower or ("kako naći" in question_lower and "sound" in question_lower)):
-            return ">> ABLETON BROWSER: Lijeva strana - sve tvoje zvukove! PLACES (folderi), CATEGORIES (tipovi), PACKS (kolekcije). Povuci-i-stavi iz browsera u track-ove. Pretraži tipkom, koristi Tags za brže pronalaženje. HOT SWAP - zamijeni zvuk bez prekidanja reproduce!"
-        else:
-            return "ERROR Sorry, all AI providers are currently unavailable. Get a free API key at https://console.groq.com/keys or https://console.x.ai and add it to your .env file."
+def watch_config(interval: float):
+    """Reload the config whenever .env changes on disk."""
+    def mtime():
+        try:
+            return os.stat(ENV_FILE).st_mtime
+        except OSError:
+            return None
+    last = mtime()
+    while True:
+        time.sleep(interval)
+        current = mtime()
+        if current != last:
+            last = current
+            print(f">> {ENV_FILE} changed - reloading config")
+            try:
+                reload_config()
+            except Exception as e:
+                print(f"ERROR Config reload failed: {e}")
 
-# Create AI provider and socket.io server
-ai = AIProvider()
-sio = socketio.Server()
-app = socketio.WSGIApp(sio)
+def check_admin(params: Dict[str, Any], action: str):
+    """Admin commands need params.token when ADMIN_TOKEN is set."""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if admin_token and not hmac.compare_digest(str(params.get("token", "")), admin_token):
+        raise PermissionError(f"{action} requires a valid admin token")
+
+def cancel_requests(sid, request_id: Optional[str] = None) -> int:
+    """Flag one (or every) in-flight request of a client as cancelled."""
+    state = clients.get(sid)
+    pending = state.requests if state else {}
+    targets = [request_id] if request_id is not None else list(pending)
+    cancelled = 0
+    for rid in targets:
+        event = pending.get(rid)
+        if event is not None and not event.is_set():
+            event.set()
+            cancelled += 1
+    return cancelled
 
 @sio.event
-def connect(sid, environ):
-    print(f">> AI Copilot connected: {sid}")
+def connect(sid, environ, auth=None):
+    clients[sid] = ClientState(transport_codec.negotiate(auth))
+    print(f">> AI Copilot connected: {sid} ({clients[sid].codec})")
 
 @sio.event
 def disconnect(sid):
     print(f">> AI Copilot disconnected: {sid}")
+    # Nobody is waiting for these answers any more
+    cancel_requests(sid)
+    state = clients.pop(sid, None)
+    if state is not None:
+        leave_class(sid, state)
 
 @sio.event
+@profiler.profiled
 def command(sid, data):
     """Process AI command and return response."""
+    state = clients.get(sid) or ClientState(transport_codec.JSON)
+    pending = state.requests
+    request_id = None
     try:
-        command = json.loads(data) if isinstance(data, str) else data
+        command = json.loads(data) if isinstance(data, str) else transport_codec.decode(data)
         action = command.get("action")
         params = command.get("params", {})
-        print(f">> Command received: {action} with params: {params}")
+        shown = {k: ("***" if k == "token" else v) for k, v in params.items()}
+        print(f">> Command received: {action} with params: {shown}")
+        
+        # Backpressure: a client gets a few requests in flight, not an unbounded backlog
+        if action != "cancel":
+            requested = str(command.get("request_id") or next(request_ids))
+            if requested in pending:
+                # Reusing an id would take over the other request's cancel event
+                response = {"error": f"Request {requested} is already in flight - use a new request_id", "type": "duplicate_request", "request_id": requested}
+                emit_to(sid, "response", response)
+                return response
+            if len(pending) >= MAX_PENDING_PER_CLIENT:
+                response = {"error": f"Overloaded - {len(pending)} requests still in flight, wait or cancel", "type": "overloaded", "request_id": requested}
+                emit_to(sid, "response", response)
+                return response
+            # Only a registered request is removed from pending when it finishes
+            request_id = requested
+            cancel = pending[request_id] = threading.Event()
 
-        if action == "ask_ai":
+        if action == "cancel":
+            # Stop one request (request_id) or all of this client's requests
+            target = params.get("request_id")
+            cancelled = cancel_requests(sid, str(target) if target is not None else None)
+            response = {"message": f">> Cancelled {cancelled} request(s)", "type": "cancelled"}
+            
+        elif action == "ask_ai":
             # Direct question to AI with preferred model
             question = params.get("question", "")
             preferred_model = params.get("preferred_model", None)
-            ai_response = ai.get_answer(question, preferred_model)
-            response = {"message": ai_response, "type": "ai_answer"}
+            room = classes.get(state.room) if state.room else None
+            live = live_midi.answer(question)
+            shared, mine = shared_answer(room, question) if live is None and room is not None and not state.context else (None, None)
+            if live is not None:
+                # About what is being played right now - answered from the MIDI input analyzer
+                response = {"message": f">> [Live MIDI] {live}", "type": "ai_answer", "live_midi": live_midi.state()}
+            elif shared is not None:
+                # Answered in this class recently - no provider call
+                response = {"message": shared["answer"], "type": "ai_answer", "shared": True, "shared_from": shared["role"]}
+                if state.role == "instructor":
+                    emit_to_class(room.name, "class_answer", {"message": shared["answer"], "question": question, "type": "class_answer"}, skip_sid=sid)
+            else:
+                draft = ai.get_local_answer(question) if params.get("progressive") else None
+                if draft:
+                    # Known topic: send the local answer now, the provider answer replaces it
+                    emit_to(sid, "draft", {"message": draft, "type": "draft", "request_id": request_id})
+                try:
+                    # Provider calls block, so they run in a worker thread and drafts keep flowing meanwhile
+                    ai_response = eventlet.tpool.execute(ai.get_answer, question, preferred_model,
+                                                         state.context, params.get("deadline"), cancel)
+                    if room is not None:
+                        share_answer(sid, state, room, question, ai_response)
+                finally:
+                    if mine is not None:
+                        # Classmates who asked the same thing meanwhile were waiting for this answer
+                        key = question_key(question)[0]
+                        if room.inflight.get(key) is mine:
+                            room.inflight.pop(key)
+                        mine.send()
+                response = {"message": ai_response, "type": "ai_answer", "replaces_draft": bool(draft)}
             
         elif action == "add_track":
-            response = {"message": f"Adding audio track: {params.get('name', 'AI Track')}", "explanation": "Audio track is a channel in Ableton for sounds (e.g. drums, vocals)."}
+            name = params.get('name', 'AI Track')
+            kind = params.get('type', 'audio')
+            index = int(params.get('index', -1))
+            if ableton.connected:
+                # The mirror sees the new track arrive, so the name goes to the index Live reports (waits in a worker thread)
+                target = eventlet.tpool.execute(ableton.create_track, kind, index, name)
+                queued = named = target is not None
+                reason = "Live did not confirm the new track"
+            else:
+                queued = osc.create_track(kind, index, name)
+                named = index >= 0
+                reason = "track index unknown without the Ableton state mirror, pass 'index'"
+            message = f"Adding {kind} track: {name}" if named else f"Adding {kind} track (name '{name}' not applied - {reason})"
+            response = {"message": message, "explanation": "Audio track is a channel in Ableton for sounds (e.g. drums, vocals).", "queued": queued, "named": named}
+            
+        elif action == "set_tempo":
+            bpm = float(params.get('bpm', 120))
+            queued = osc.set_tempo(bpm)
+            response = {"message": f"Setting tempo to {bpm:g} BPM", "explanation": "Tempo is the speed of your song in beats per minute.", "queued": queued}
+            
+        elif action == "fire_clip":
+            track, clip = int(params.get('track', 0)), int(params.get('clip', 0))
+            queued = osc.fire_clip(track, clip)
+            response = {"message": f"Launching clip {clip} on track {track}", "explanation": "Firing a clip starts it in Session View, quantized to the global launch quantization.", "queued": queued}
+            
+        elif action == "set_device_parameter":
+            queued = osc.set_device_parameter(int(params.get('track', 0)), int(params.get('device', 0)),
+                                              int(params.get('parameter', 0)), float(params.get('value', 0)))
+            response = {"message": f"Setting parameter {params.get('parameter', 0)} of device {params.get('device', 0)} on track {params.get('track', 0)} to {params.get('value', 0)}", "explanation": "Device parameters are the knobs of instruments and effects.", "queued": queued}
             
         elif action == "explain_midi":
-            response = {"message": "MIDI is a language for notes. E.g. number 60 is C4 (middle C on piano).", "explanation": "MIDI sends note and control signals, not sound – like instructions for instruments!"}
+            notes = params.get("notes")
+            if notes:
+                # Note numbers -> names, frequencies and the chord they form
+                response = {"message": music_theory.describe_notes([int(n) for n in notes]), "explanation": "MIDI note numbers count semitones, 60 is C4 (middle C, C3 in Ableton)."}
+            else:
+                response = {"message": "MIDI is a language for notes. E.g. number 60 is C4 (middle C on piano).", "explanation": "MIDI sends note and control signals, not sound – like instructions for instruments!"}
+            
+        elif action == "analyze_midi":
+            # Analyze a .mid file, optionally answering a question about it; parsing runs in a worker thread
+            analysis = eventlet.tpool.execute(midi_analyzer.analyze, params.get("path", ""))
+            summary = summarize_midi(analysis)
+            question = params.get("question")
+            if question:
+                # In a worker thread, like ask_ai, so other clients and cancel keep being served
+                ai_response = eventlet.tpool.execute(ai.get_answer, question, params.get("preferred_model"), summary,
+                                                     params.get("deadline"), cancel)
+            else:
+                ai_response = f">> {summary}"
+            response = {"message": ai_response, "type": "midi_analysis", "analysis": analysis}
+            
+        elif action == "transform_midi":
+            # Quantize/groove/transpose .mid files or whole folders; the process pool runs from a worker thread
+            paths = params.get("paths") or ([params["path"]] if params.get("path") else [])
+            if not paths:
+                raise ValueError("transform_midi needs 'path' or 'paths'")
+            result = eventlet.tpool.execute(transform_files, paths, params.get("transforms", {}),
+                                            client_output_dir(params.get("output")), params.get("workers"))
+            response = {"message": f">> {summarize_transform(result)}", "type": "midi_transform", "result": result}
+            
+        elif action == "midi_input":
+            # Live MIDI input: start a port or .mid replay source, stop it, or read the analyzer state
+            op = params.get("op", "status")
+            if op == "start":
+                if params.get("source", "port") == "file":
+                    source = FileSource(params.get("path", ""), float(params.get("speed", 1)), bool(params.get("loop")))
+                else:
+                    source = PortSource(params.get("name"))
+                live_midi.start(source, params.get("bpm"), params.get("grid"))
+            elif op == "stop":
+                live_midi.stop()
+            elif op != "status":
+                raise ValueError("midi_input op must be start, stop or status")
+            state_now = live_midi.state()
+            chord = (state_now.get("chord") or {}).get("symbol") if live_midi.running else None
+            response = {"message": f">> MIDI input {'running' if live_midi.running else 'stopped'}" + (f", playing {chord}" if chord else ""),
+                        "type": "midi_input", "state": state_now}
+            
+        elif action == "ableton_state":
+            # What the server currently knows about the open Live set
+            summary = ableton.summary()
+            response = {"message": f">> {summary}" if summary else ">> Ableton is not connected over OSC",
+                        "type": "ableton_state", "state": ableton.snapshot()}
+            
+        elif action == "analyze_set":
+            # Index a Live Set (parsed in a worker thread); its summary is used as context for later questions
+            index = eventlet.tpool.execute(live_sets.load, params.get("path", ""))
+            summary = summarize_set(index)
+            state.context = summary
+            question = params.get("question")
+            if question:
+                # In a worker thread, like ask_ai, so other clients and cancel keep being served
+                ai_response = eventlet.tpool.execute(ai.get_answer, question, params.get("preferred_model"), summary,
+                                                     params.get("deadline"), cancel)
+            else:
+                ai_response = f">> {summary}"
+            response = {"message": ai_response, "type": "set_analysis", "tracks": len(index["tracks"]), "tempo": index["tempo"]}
+            
+        elif action == "index_samples":
+            # Rescan sample folders in the background; only new or changed files are analyzed
+            folders = params.get("folders") or sample_folders()
+            if not folders:
+                response = {"message": "ERROR No sample folders - pass 'folders' or set SAMPLE_FOLDERS in .env"}
+            else:
+                threading.Thread(target=samples.scan, args=(folders,), daemon=True).start()
+                response = {"message": f">> Indexing samples in: {', '.join(folders)}", "type": "sample_index"}
+            
+        elif action == "find_samples":
+            results = samples.query(params.get("query", ""), params.get("like"), int(params.get("limit", 10)))
+            response = {"message": f">> {format_samples(results)}", "type": "sample_results", "results": results}
+            
+        elif action == "analyze_audio":
+            # Loudness/spectrum report of a bounced mix; runs in a worker thread so the server stays responsive
+            report = eventlet.tpool.execute(analyze_audio, params.get("path", ""))
+            summary = summarize_audio(report)
+            question = params.get("question")
+            if question and not (report["too_short"] or report["silent"]):
+                # In a worker thread, like ask_ai, so other clients and cancel keep being served
+                ai_response = eventlet.tpool.execute(ai.get_answer, question, params.get("preferred_model"), summary,
+                                                     params.get("deadline"), cancel)
+            else:
+                ai_response = f">> {summary}"
+            response = {"message": ai_response, "type": "audio_analysis", "report": report}
+            
+        elif action == "analyze_masking":
+            # Which stems fight for the same frequencies, then EQ/sidechain advice based on that
+            paths = params.get("paths") or ([params["path"]] if params.get("path") else [])
+            report = eventlet.tpool.execute(analyze_masking, paths, params.get("workers"))
+            summary = summarize_masking(report)
+            if report["pairs"]:
+                question = params.get("question") or ADVICE_QUESTION
+                ai_response = eventlet.tpool.execute(ai.get_answer, question, params.get("preferred_model"), summary,
+                                                     params.get("deadline"), cancel)
+            else:
+                ai_response = f">> {summary}"  # nothing clashes, so there is nothing to advise on
+            response = {"message": ai_response, "type": "masking_analysis", "summary": summary, "report": report}
+            
+        elif action == "join_class":
+            # Workshop mode: instructor answers go to the whole class, repeated questions are served from the class
+            name = str(params.get("room", "")).strip()
+            if not name:
+                raise ValueError("join_class needs a 'room' name")
+            role = "instructor" if params.get("role") == "instructor" else "student"
+            if role == "instructor":
+                check_admin(params, action)
+            leave_class(sid, state)
+            room = classes.setdefault(name, ClassRoom(name))
+            room.add(sid, role)
+            state.room, state.role = name, role
+            sio.enter_room(sid, f"{name}/{state.codec}")
+            response = {"message": f">> Joined class '{name}' as {role} ({room.size} connected)", "type": "class_joined", "room": name, "role": role, "members": room.size}
+            
+        elif action == "leave_class":
+            name = leave_class(sid, state)
+            response = {"message": f">> Left class '{name}'" if name else ">> Not in a class", "type": "class_left"}
+            
+        elif action == "reload_config":
+            # Pick up .env changes without restarting
+            check_admin(params, action)
+            changed = reload_config()
+            response = {"message": f">> Config reloaded: {', '.join(changed) or 'nothing changed'}", "type": "config", "changed": changed}
+            
+        elif action == "profile":
+            # Switch profiling on/off at runtime; profiles are written to COPILOT_CACHE_DIR/profiles
+            check_admin(params, action)
+            status = profiler.configure(params.get("enabled"), params.get("sample_rate"),
+                                        params.get("tracemalloc"), params.get("block_ms"))
+            if params.get("snapshot"):
+                status["snapshot"] = profiler.dump_snapshot()
+            response = {"message": f">> Profiling {'on' if status['enabled'] else 'off'}: {status}", "type": "profile", "status": status}
             
         elif action == "ableton_help":
             # Contextual help for Ableton
             topic = params.get("topic", "general")
-            ai_response = ai.get_answer(f"Explain {topic} in Ableton Live production")
+            ai_response = eventlet.tpool.execute(ai.get_answer, prompts.render("ableton_help", topic=topic),
+                                                 None, None, params.get("deadline"), cancel)
             response = {"message": ai_response, "type": "ableton_help"}
             
         else:
-            response = {"message": "Available commands: ask_ai, ableton_help, add_track, explain_midi", "explanation": "Use 'ask_ai' for general questions!"}
+            response = {"message": "Available commands: ask_ai, ableton_help, add_track, set_tempo, fire_clip, set_device_parameter, explain_midi, analyze_midi, transform_midi, midi_input, ableton_state, analyze_set, index_samples, find_samples, analyze_audio, analyze_masking, cancel, reload_config, profile, join_class, leave_class", "explanation": "Use 'ask_ai' for general questions!"}
         
-        sio.emit("response", response, to=sid)
+        if request_id is not None:
+            response["request_id"] = request_id
+            if cancel.is_set():
+                print(f">> Request {request_id} was cancelled - response dropped")
+                return response
+        emit_to(sid, "response", response)
         print(f">> Response sent: {response.get('message', '')[:100]}...")
         return response
     except Exception as e:
-        error_response = {"error": str(e)}
+        error_response = {"error": str(e), "request_id": request_id}
         print(f"ERROR Error in command: {e}")
-        sio.emit("response", error_response, to=sid)
+        emit_to(sid, "response", error_response)
         return error_response
+    finally:
+        if request_id is not None:
+            pending.pop(request_id, None)
+
+def client_output_dir(output: Optional[str]) -> Optional[str]:
+    """Output folder asked for by a client; only allowed inside MIDI_OUTPUT_ROOT."""
+    if not output:
+        return None  # default: 'transformed' next to each input
+    root = os.getenv("MIDI_OUTPUT_ROOT")
+    if not root:
+        raise ValueError("'output' is disabled - set MIDI_OUTPUT_ROOT on the server to allow it")
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, output))
+    if os.path.commonpath([resolved, root]) != root:
+        raise ValueError(f"'output' must be inside {root}")
+    return resolved
 
-def find_free_port(start_port=12345):
+def find_free_port(start_port=12345, host="localhost"):
     """Find a free port starting from start_port."""
     import socket
     for port in range(start_port, start_port + 10):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('localhost', port))
+                s.bind((host, port))
                 return port
         except OSError:
             continue
@@ -411,6 +504,7 @@ def find_free_port(start_port=12345):
 if __name__ == "__main__":
     print(" Starting Ableton AI Copilot Server...")
     print(">> Available providers:", ai.providers)
+    print(f">> System prompt: ~{prompts.PERSONA_TOKENS} tokens (cacheable prefix with project context)")
     
     # Memory info
     memory = psutil.virtual_memory()
@@ -418,13 +512,55 @@ if __name__ == "__main__":
     
     # Memory save mode check
     if os.getenv("MEMORY_SAVE_MODE") == "true":
-        print(">> Memory save mode: Ollama disabled")
+        print(">> Memory save mode: Ollama is not preloaded and unloads after each answer")
+    
+    # Preload the local model and watch memory while the server runs
+    if "ollama" in ai.providers:
+        ai.ollama.start()
+    
+    # Profiling can also be switched on later with the 'profile' command
+    if os.getenv("PROFILE_ENABLED") == "true":
+        profiler.configure(enabled=True)
+    
+    # Apply .env edits (enable_ollama.py etc.) without a restart
+    watch_interval = float(os.getenv("CONFIG_WATCH_INTERVAL", "2"))
+    if watch_interval > 0:
+        threading.Thread(target=watch_config, args=(watch_interval,), daemon=True).start()
     
-    # Find free port
-    port = find_free_port(12345)
+    # Follow the open Live set (AbletonOSC replies and listener updates); ABLETON_STATE_PORT=0 turns it off
+    if ableton.port:
+        try:
+            ableton.start()
+        except OSError as e:
+            print(f"ERROR Ableton state port {ableton.port} not available: {e}")
+    
+    # Listen to a keyboard from the start; the midi_input command can switch sources later
+    midi_port = os.getenv("MIDI_INPUT_PORT")
+    if midi_port:
+        try:
+            live_midi.start(PortSource(None if midi_port == "default" else midi_port),
+                            float(os.getenv("MIDI_INPUT_BPM", "120")), os.getenv("MIDI_INPUT_GRID", "1/16"))
+        except Exception as e:
+            print(f"ERROR MIDI input {midi_port} not available: {e}")
+    
+    # Find free port; SERVER_HOST=0.0.0.0 lets students on other machines join a class
+    host = os.getenv("SERVER_HOST", "localhost")
+    port = find_free_port(12345, host)
     if port is None:
         print("ERROR: Could not find free port!")
         exit(1)
     
-    print(f">> Server running on http://localhost:{port}")
-    eventlet.wsgi.server(eventlet.listen(("localhost", port)), app)
\ No newline at end of file
+    # Same-machine clients (the GUI) skip TCP through a Unix socket where the platform has them
+    if local_socket.available():
+        try:
+            # No access log: with the polling transport it would print every message
+            eventlet.spawn(eventlet.wsgi.server, local_socket.listen(), app, log_output=False)
+            atexit.register(local_socket.cleanup)
+            print(f">> Local clients: unix socket {local_socket.socket_path()}")
+        except OSError as e:
+            print(f">> Unix socket not available ({e}) - TCP only")
+    
+    if host not in ("localhost", "127.0.0.1", "::1"):
+        print(f">> Listening on {host} - reachable from the network" + ("" if os.getenv("ADMIN_TOKEN") else ", set ADMIN_TOKEN!"))
+    print(f">> Server running on http://{host}:{port}")
+    eventlet.wsgi.server(eventlet.listen((host, port)), app)
\ No newline at end of file
@@ -41,7 +41,7 @@ def update_env_file():
     
     print("OK Ollama disabled in .env file")
     print(">> Memory usage should be much lower now")
-    print(">> Restart the server: python copilot_server.py")
+    print(">> A running server picks this up automatically (or start it: python copilot_server.py)")
 
 if __name__ == "__main__":
     update_env_file()
@@ -33,7 +33,7 @@ def update_env_file():
     
     print("OK Ollama re-enabled in .env file")
     print(">> Make sure you have enough RAM for Ollama")
-    print(">> Restart the server: python copilot_server.py")
+    print(">> A running server picks this up automatically (or start it: python copilot_server.py)")
     print(">> Start Ollama: ollama serve")
 
 if __name__ == "__main__":
@@ -57,6 +57,7 @@ def main():
     """Fix emojis in all Python files."""
     python_files = [
         "copilot_server.py",
+        "ai_provider.py",
         "gui_copilot.py", 
         "launch_copilot.py"
     ]
@@ -1,19 +1,24 @@
+import time
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import socketio
+import importlib.util
+import os
 import threading
 import json
 import signal
 import sys
 from datetime import datetime
-try:
-    import pystray
-    from PIL import Image, ImageDraw
-    TRAY_AVAILABLE = True
-except ImportError:
-    TRAY_AVAILABLE = False
+import transport_codec
+
+# socketio (with local_socket), pystray and PIL are imported after the window is up (see connect_to_server/setup_tray)
+TRAY_AVAILABLE = bool(importlib.util.find_spec("pystray") and importlib.util.find_spec("PIL"))
+if not TRAY_AVAILABLE:
     print("⚠️ System tray not available - install with: pip install pystray Pillow")
 
+ICON_PATH = os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "tray_icon.png")
+
 class AbletonCopilotGUI:
     def __init__(self):
         self.root = tk.Tk()
@@ -27,8 +32,8 @@ class AbletonCopilotGUI:
         self.root.attributes('-topmost', True)
         self.root.after(100, lambda: self.root.attributes('-topmost', False))
         
-        # SocketIO client
-        self.sio = socketio.SimpleClient()
+        # SocketIO client (created by the connect thread)
+        self.sio = None
         self.connected = False
         
         # Current AI model
@@ -44,10 +49,22 @@ class AbletonCopilotGUI:
         # Setup signal handling
         self.setup_signal_handlers()
         
+        # Startup phases: window and input first, connection right away, tray after the first frame
+        self.mark_startup("modules loaded")
         self.setup_ui()
-        self.setup_tray()
+        self.mark_startup("window built")
         self.connect_to_server()
     
+    def mark_startup(self, phase):
+        """Print how long after launch a startup phase finished."""
+        print(f">> Startup: {phase} after {(time.perf_counter() - STARTUP_T0) * 1000:.0f} ms")
+    
+    def after_first_frame(self):
+        """Non-critical setup, once the window has been drawn."""
+        self.mark_startup("first frame")
+        if TRAY_AVAILABLE:
+            threading.Thread(target=self.setup_tray, daemon=True).start()
+    
     def setup_signal_handlers(self):
         """Setup signal handlers to ignore Ctrl+C."""
         def signal_handler(sig, frame):
@@ -58,7 +75,14 @@ class AbletonCopilotGUI:
         signal.signal(signal.SIGINT, signal_handler)
     
     def create_tray_icon(self):
-        """Create a simple icon for system tray."""
+        """Create a simple icon for system tray (drawn once, then loaded from the cache)."""
+        from PIL import Image, ImageDraw
+        if os.path.exists(ICON_PATH):
+            try:
+                return Image.open(ICON_PATH)
+            except OSError:
+                pass
+        
         # Create a simple 64x64 icon
         image = Image.new('RGB', (64, 64), color='#2b2b2b')
         draw = ImageDraw.Draw(image)
@@ -67,6 +91,11 @@ class AbletonCopilotGUI:
         draw.ellipse([20, 20, 44, 44], fill='#0066cc')
         draw.text((26, 26), "♪", fill='white')
         
+        try:
+            os.makedirs(os.path.dirname(ICON_PATH), exist_ok=True)
+            image.save(ICON_PATH)
+        except OSError:
+            pass
         return image
     
     def setup_tray(self):
@@ -75,6 +104,7 @@ class AbletonCopilotGUI:
             return
             
         try:
+            import pystray
             icon_image = self.create_tray_icon()
             
             # Create menu
@@ -98,6 +128,7 @@ class AbletonCopilotGUI:
             tray_thread.start()
             
             print("OK System tray icon created")
+            self.mark_startup("tray ready")
             
         except Exception as e:
             print(f"ERROR Failed to create system tray: {e}")
@@ -262,14 +293,35 @@ class AbletonCopilotGUI:
     def connect_to_server(self):
         """Connect to Copilot server."""
         def connect():
+            import socketio
+            import local_socket
+            
+            # A server on this machine is reached over its Unix socket, no port probing
+            if local_socket.available() and os.path.exists(local_socket.socket_path()):
+                try:
+                    print(f"Trying to connect to {local_socket.socket_path()}")
+                    self.sio = socketio.SimpleClient(**local_socket.client_options())
+                    self.sio.connect(local_socket.URL, auth=transport_codec.client_auth())
+                    self.connected = True
+                    self.mark_startup("connected")
+                    self.root.after(0, self.update_status, ">> Connected")
+                    self.add_output("🎵 GROOVY! Profesor Ableton is online (local socket)!", "system")
+                    return
+                except Exception as e:
+                    print(f"Failed to connect to local socket: {e}")
+            
+            self.sio = socketio.SimpleClient()
+            
             # Try multiple ports in case server is running on different port
             ports_to_try = [12345, 12346, 12347, 12348, 12349]
             
             for port in ports_to_try:
                 try:
                     print(f"Trying to connect to localhost:{port}")
-                    self.sio.connect(f'http://localhost:{port}')
+                    # Offer MessagePack when installed; older servers ignore it and keep JSON
+                    self.sio.connect(f'http://localhost:{port}', auth=transport_codec.client_auth())
                     self.connected = True
+                    self.mark_startup("connected")
                     self.root.after(0, self.update_status, ">> Connected")
                     self.add_output(f"🎵 GROOVY! Profesor Ableton is online on port {port}!", "system")
                     return
@@ -345,21 +397,37 @@ class AbletonCopilotGUI:
                     'action': 'ask_ai',
                     'params': {
                         'question': question,
-                        'preferred_model': self.current_model
+                        'preferred_model': self.current_model,
+                        'progressive': True
                     }
                 })
                 
-                # Wait for response
-                response = self.sio.receive(timeout=60)
-                if response:
+                # Wait for response; known topics get a local draft first
+                draft_tag = None
+                while True:
+                    response = self.sio.receive(timeout=60)
+                    if not response:
+                        self.root.after(0, self.add_output, "TIMEOUT Timeout - no response", "error")
+                        break
                     event, data = response
+                    data = transport_codec.decode(data)
+                    if event == 'class_answer':
+                        # Instructor answer shared with the class while we were waiting
+                        self.root.after(0, self.add_output, f"🎓 Class: {data.get('question', '')}\n>> {data.get('message', '')}", "ai")
+                        continue
+                    if event == 'draft':
+                        draft_tag = f"draft{id(data)}"
+                        self.root.after(0, self.add_output, f">> Draft: {data.get('message', '')}", "ai", draft_tag)
+                        continue
                     if event == 'response':
                         ai_response = data.get('message', 'No response')
-                        self.root.after(0, self.add_output, f">> AI: {ai_response}", "ai")
+                        if draft_tag:
+                            self.root.after(0, self.replace_output, draft_tag, f">> AI: {ai_response}")
+                        else:
+                            self.root.after(0, self.add_output, f">> AI: {ai_response}", "ai")
                     else:
                         self.root.after(0, self.add_output, f"❓ Unexpected response: {data}", "error")
-                else:
-                    self.root.after(0, self.add_output, "TIMEOUT Timeout - no response", "error")
+                    break
                     
             except Exception as e:
                 self.root.after(0, self.add_output, f"ERROR Error: {e}", "error")
@@ -368,19 +436,35 @@ class AbletonCopilotGUI:
         
         threading.Thread(target=send, daemon=True).start()
     
-    def add_output(self, text, msg_type="normal"):
+    def add_output(self, text, msg_type="normal", tag=None):
         """Add text to output."""
         self.output_text.config(state='normal')
         
         timestamp = datetime.now().strftime("%H:%M:%S")
         formatted_text = f"[{timestamp}] {text}\n\n"
         
-        self.output_text.insert(tk.END, formatted_text)
+        self.output_text.insert(tk.END, formatted_text, tag or ())
         
         # Scroll to bottom
         self.output_text.see(tk.END)
         self.output_text.config(state='disabled')
     
+    def replace_output(self, tag, text):
+        """Replace a draft answer in place with the final one."""
+        ranges = self.output_text.tag_ranges(tag)
+        if not ranges:
+            self.add_output(text, "ai")
+            return
+        self.output_text.config(state='normal')
+        
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.output_text.delete(ranges[0], ranges[1])
+        self.output_text.insert(ranges[0], f"[{timestamp}] {text}\n\n")
+        self.output_text.tag_delete(tag)
+        
+        self.output_text.see(tk.END)
+        self.output_text.config(state='disabled')
+    
     def clear_output(self):
         """Clear output."""
         self.output_text.config(state='normal')
@@ -449,6 +533,8 @@ class AbletonCopilotGUI:
         self.root.lift()
         self.root.focus_force()
         
+        # Runs once the event loop is idle, i.e. after the window has been drawn
+        self.root.after_idle(self.after_first_frame)
         self.root.mainloop()
     
     def on_closing(self):
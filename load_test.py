@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Profesor Ableton server
+Opens many concurrent Socket.IO clients (like test_ai_client.py, but hundreds
+at once), replays a weighted question mix at a target request rate and reports
+throughput, latency percentiles, time-to-first-chunk and error rate.
+
+Offline capacity planning with fake providers:
+    python load_test.py --fake-server --clients 200 --rate 50 --duration 30
+Against a running server:
+    python load_test.py --url http://localhost:12345 --clients 50 --rate 10
+Replaying provider traffic recorded with CASSETTE_MODE=record:
+    python load_test.py --fake-server --cassette .copilot_cache/cassette.jsonl.gz
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+import socketio
+
+import transport_codec
+
+# Default mix: the commands test_ai_client.py sends
+DEFAULT_MIX = [
+    {"action": "ask_ai", "params": {"question": "What is EQ in Ableton?"}, "weight": 4},
+    {"action": "ableton_help", "params": {"topic": "compressor"}, "weight": 2},
+    {"action": "ask_ai", "params": {"question": "How to make a bass line?"}, "weight": 3},
+    {"action": "explain_midi", "params": {}, "weight": 1},
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadGenerator:
+    """Open-loop load: request i is due at start + i / rate, sent by whichever client is free."""
+
+    def __init__(self, url: str, clients: int, rate: float, duration: float, mix: List[Dict[str, Any]], timeout: float,
+                 codec: str = transport_codec.JSON):
+        self.url = url
+        self.codec = codec
+        self.clients = clients
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix
+        self.weights = [m.get("weight", 1) for m in mix]
+        self.timeout = timeout
+        # Without drafts the server sends one message per request, so first chunk = latency
+        self.progressive = any(m.get("params", {}).get("progressive") for m in mix)
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._start = 0.0
+        self.latencies: List[float] = []
+        self.first_chunk: List[float] = []
+        self.send_lag: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.completed = 0
+        self.connected = 0
+
+    def _error(self, kind: str):
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def _next_slot(self) -> Optional[float]:
+        """Due time of the next request, or None when the test is over."""
+        with self._lock:
+            due = self._start + self._next / self.rate
+            if due >= self._start + self.duration:
+                return None
+            self._next += 1
+            return due
+
+    def _mark_start(self):
+        """Runs once, when every client has connected (or failed to)."""
+        self._start = time.perf_counter()
+
+    def _client(self, ready: threading.Barrier):
+        sio = socketio.SimpleClient()
+        try:
+            sio.connect(self.url, auth={"codecs": [self.codec]})
+            with self._lock:
+                self.connected += 1
+        except Exception:
+            self._error("connect")
+            ready.wait()
+            return
+        ready.wait()
+
+        numbers = itertools.count(1)
+        try:
+            while True:
+                due = self._next_slot()
+                if due is None:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                command = random.choices(self.mix, weights=self.weights)[0]
+                request_id = str(next(numbers))
+                sent = time.perf_counter()
+                first = None
+                try:
+                    sio.emit("command", {"action": command["action"], "params": command.get("params", {}),
+                                         "request_id": request_id})
+                    while True:
+                        event, data = sio.receive(timeout=max(0.001, sent + self.timeout - time.perf_counter()))
+                        data = transport_codec.decode(data)
+                        if not isinstance(data, dict) or data.get("request_id") != request_id:
+                            continue  # late answer to a request that timed out, or a cancel confirmation
+                        now = time.perf_counter()
+                        if first is None:
+                            first = now
+                        if event == "response":
+                            break
+                except socketio.exceptions.TimeoutError:
+                    self._error("timeout")
+                    try:
+                        sio.emit("command", {"action": "cancel", "params": {"request_id": request_id}})
+                    except Exception:
+                        self._error("transport")
+                        break
+                    continue
+                except Exception:
+                    self._error("transport")
+                    break
+
+                with self._lock:
+                    self.send_lag.append(sent - due)
+                    if isinstance(data, dict) and "error" in data:
+                        kind = "overloaded" if data.get("type") == "overloaded" else "server_error"
+                        self.errors[kind] = self.errors.get(kind, 0) + 1
+                    else:
+                        self.completed += 1
+                        self.latencies.append(now - sent)
+                        self.first_chunk.append(first - sent)
+        finally:
+            try:
+                sio.disconnect()
+            except Exception:
+                pass
+
+    def run(self) -> Dict[str, Any]:
+        ready = threading.Barrier(self.clients + 1, action=self._mark_start)
+        threads = [threading.Thread(target=self._client, args=(ready,), daemon=True) for _ in range(self.clients)]
+        print(f">> Connecting {self.clients} clients to {self.url}...")
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        print(f"OK {self.connected} clients connected, sending {self.rate} req/s for {self.duration}s")
+
+        for thread in threads:
+            thread.join(self.duration + self.timeout + 10)
+        elapsed = time.perf_counter() - self._start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        failed = sum(self.errors.values()) - self.errors.get("connect", 0)
+        attempted = self.completed + failed
+
+        def ms(values, pct):
+            value = percentile(values, pct)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "clients": self.clients,
+            "connected": self.connected,
+            "target_rate": self.rate,
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": attempted,
+            "completed": self.completed,
+            "throughput_rps": round(self.completed / elapsed, 2) if elapsed > 0 else 0.0,
+            "error_rate": round(failed / attempted, 4) if attempted else 0.0,
+            "errors": self.errors,
+            "latency_ms": {p: ms(self.latencies, p) for p in (50, 95, 99)},
+            # None without --progressive: there is no earlier chunk than the answer itself
+            "first_chunk_ms": {p: ms(self.first_chunk, p) for p in (50, 95, 99)} if self.progressive else None,
+            "send_lag_ms": {p: ms(self.send_lag, p) for p in (50, 95, 99)},
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    latency, first, lag = report["latency_ms"], report["first_chunk_ms"], report["send_lag_ms"]
+    print("\n📊 Load test results")
+    print(f"   Clients:       {report['connected']}/{report['clients']} connected")
+    print(f"   Requests:      {report['requests']} sent, {report['completed']} completed in {report['elapsed_seconds']}s")
+    print(f"   Throughput:    {report['throughput_rps']} req/s (target {report['target_rate']})")
+    print(f"   Error rate:    {report['error_rate'] * 100:.2f}% {report['errors'] or ''}")
+    print(f"   Latency:       p50 {latency[50]} ms, p95 {latency[95]} ms, p99 {latency[99]} ms")
+    if first is None:
+        print("   First chunk:   same as latency (no drafts without --progressive)")
+    else:
+        print(f"   First chunk:   p50 {first[50]} ms, p95 {first[95]} ms, p99 {first[99]} ms")
+    print(f"   Schedule lag:  p50 {lag[50]} ms, p95 {lag[95]} ms, p99 {lag[99]} ms (clients busy = backlog)")
+
+
+# -- Fake provider server --------------------------------------------------
+
+def serve_fake(port: int, latency: float, jitter: float, error_rate: float, cassette_path: Optional[str] = None):
+    """Run copilot_server with every provider replaced by a local fake (or a cassette replay)."""
+    os.environ.setdefault("AI_PROVIDERS", "groq,ollama,grok,claude,openai")
+    os.environ["ANSWER_CACHE_DAYS"] = "0"  # fake answers must not reach the real answer store
+    if cassette_path:
+        os.environ["CASSETTE_MODE"] = "replay"
+        os.environ["CASSETTE_PATH"] = cassette_path
+    import eventlet  # type: ignore
+    import copilot_server
+
+    if cassette_path:
+        print(f">> Cassette replay server on http://localhost:{port}")
+        eventlet.wsgi.server(eventlet.listen(("localhost", port)), copilot_server.app, log_output=False)
+        return
+
+    def fake_provider(name):
+        def ask(question, timeout=None, max_tokens=500, strong=False, cancel=None, context=None):
+            # Blocking sleep, like the real SDK calls (the server is not monkey-patched)
+            delay = max(0.0, random.gauss(latency, jitter))
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                print(f"TIMEOUT Fake {name} timeout after {timeout:g}s")
+                return None
+            time.sleep(delay)
+            if cancel is not None and cancel.is_set():
+                return None
+            if random.random() < error_rate:
+                print(f"ERROR Fake {name} failure")
+                return None
+            return f"Far out! Fake {name} answer to: {question[:40]}"
+        return ask
+
+    for name in ("ollama", "grok", "groq", "claude", "openai"):
+        setattr(copilot_server.ai, f"ask_{name}", fake_provider(name))
+    print(f">> Fake provider server on http://localhost:{port} (latency {latency}s ± {jitter}s)")
+    eventlet.wsgi.server(eventlet.listen(("localhost", port)), copilot_server.app, log_output=False)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profesor Ableton load generator")
+    parser.add_argument("--url", default="http://localhost:12345", help="server URL")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent Socket.IO clients")
+    parser.add_argument("--rate", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="test length in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--mix", help="JSON file: [{\"action\": ..., \"params\": {...}, \"weight\": n}, ...]")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--codec", choices=[transport_codec.JSON, transport_codec.MSGPACK], default=transport_codec.JSON,
+                        help="payload codec offered at connect")
+    parser.add_argument("--progressive", action="store_true", help="ask for local drafts (counted as first chunk)")
+    parser.add_argument("--fake-server", action="store_true", help="start a local server with fake providers")
+    parser.add_argument("--fake-latency", type=float, default=0.8, help="fake provider mean latency (s)")
+    parser.add_argument("--fake-jitter", type=float, default=0.2, help="fake provider latency std dev (s)")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="fraction of fake provider failures")
+    parser.add_argument("--cassette", help="with --fake-server: replay provider calls from this cassette (CASSETTE_SPEED applies)")
+    parser.add_argument("--serve-fake", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_fake:
+        serve_fake(args.port, args.fake_latency, args.fake_jitter, args.fake_error_rate, args.cassette)
+        return
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix, "r", encoding="utf-8") as f:
+            mix = json.load(f)
+    if args.progressive:
+        mix = [dict(m, params=dict(m.get("params", {}), progressive=True)) if m["action"] == "ask_ai" else m for m in mix]
+
+    server = None
+    url = args.url
+    if args.fake_server:
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, __file__, "--serve-fake", "--port", str(port),
+                                   "--fake-latency", str(args.fake_latency), "--fake-jitter", str(args.fake_jitter),
+                                   "--fake-error-rate", str(args.fake_error_rate)]
+                                  + (["--cassette", os.path.abspath(args.cassette)] if args.cassette else []),
+                                  stdout=subprocess.DEVNULL)
+        url = f"http://localhost:{port}"
+        if not _wait_for_port(port):
+            print("ERROR Fake server did not start")
+            server.terminate()
+            sys.exit(1)
+
+    try:
+        report = LoadGenerator(url, args.clients, args.rate, args.duration, mix, args.timeout, args.codec).run()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unix domain socket transport for Profesor Ableton
+The server listens on a socket file next to its TCP port; a GUI on the
+same machine connects through it (no TCP stack, no port probing) and falls
+back to TCP when the socket is missing or the platform has no AF_UNIX
+"""
+
+import importlib.util
+import os
+import socket
+import tempfile
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+# Host part of the URL is only used for the Host header; traffic goes to socket_path()
+URL = "http://localhost"
+
+
+def socket_path() -> str:
+    """COPILOT_SOCKET, or a per-user file in the temp directory."""
+    return os.getenv("COPILOT_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"profesor-ableton-{os.getuid() if hasattr(os, 'getuid') else 0}.sock")
+
+
+def available() -> bool:
+    """AF_UNIX exists here and COPILOT_SOCKET isn't 'off'."""
+    return hasattr(socket, "AF_UNIX") and socket_path() != "off"
+
+
+def _connect(timeout=None) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(socket_path())
+    return sock
+
+
+def listen():
+    """Server side: eventlet listening socket on socket_path() (a stale file is replaced)."""
+    import eventlet  # type: ignore
+
+    path = socket_path()
+    if os.path.exists(path):
+        try:
+            _connect(1).close()
+            raise OSError(f"another server is listening on {path}")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)  # left over from a server that didn't exit cleanly
+    # Only this user's GUI may connect - created 0600 rather than chmod-ed after bind,
+    # so there is no moment where another user can connect
+    old_umask = os.umask(0o177)
+    try:
+        return eventlet.listen(path, family=socket.AF_UNIX)
+    finally:
+        os.umask(old_umask)
+
+
+def cleanup():
+    try:
+        os.unlink(socket_path())
+    except OSError:
+        pass
+
+
+# -- Client side -------------------------------------------------------------
+
+class _UnixConnection(HTTPConnection):
+    def _new_conn(self):
+        return _connect(self.timeout if isinstance(self.timeout, (int, float)) else None)
+
+
+class _UnixConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixConnection
+
+
+class UnixAdapter(HTTPAdapter):
+    """requests adapter that sends every request to socket_path()."""
+
+    def __init__(self):
+        super().__init__()
+        # Long-poll GET and message POSTs run side by side
+        self._pool = _UnixConnectionPool("localhost", maxsize=4)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._pool
+
+    def get_connection(self, url, proxies=None):
+        return self._pool
+
+    def close(self):
+        self._pool.close()
+        super().close()
+
+
+def client_options() -> Dict[str, Any]:
+    """socketio.Client/SimpleClient kwargs that route polling and websocket through the socket."""
+    session = requests.Session()
+    session.mount("http://", UnixAdapter())
+    options: Dict[str, Any] = {"http_session": session}
+    if importlib.util.find_spec("websocket"):
+        # websocket-client takes a ready socket; a later automatic reconnect stays on polling
+        options["websocket_extra_options"] = {"socket": _connect(5)}
+    return options
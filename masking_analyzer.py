@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Frequency masking between exported stems for Profesor Ableton
+Each stem is streamed from its memory-mapped file in chunks and turned into
+1/3-octave band levels on a common 50 ms grid with batched NumPy FFTs (one
+process per stem). Pairs of stems are then compared band by band to find
+where both are loud at the same time, e.g. kick and bass fighting at 60 Hz.
+Stems must be exported from the same start point.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from audio_io import AudioFile, is_audio_file
+
+HOP_SECONDS = 0.05
+WINDOW_HOPS = 2  # 100 ms windows, 50% overlap
+FRAMES_PER_CHUNK = 256  # ~13 s of audio decoded at a time
+# 1/3-octave bands from 31.5 Hz to 16 kHz (lower bands need longer windows than the 50 ms grid allows)
+CENTERS = 1000 * 2 ** (np.arange(-15, 13) / 3)
+ACTIVE_DB = -60.0  # band level below which a stem counts as silent there
+RELEVANT_DB = 24.0  # ...or this far below the stem's own loudest band levels
+CLASH_DB = 10.0  # both stems within this many dB of each other = they compete
+TOP_BANDS = 3
+MERGE_SECONDS = 0.5  # clash regions closer than this are reported as one
+MIN_REGION_SECONDS = 1.0
+MAX_PAIRS = 5
+ADVICE_QUESTION = ("These stems mask each other in the regions listed. Give concrete EQ cuts/boosts "
+                   "(frequency, gain, Q) and sidechain settings to separate them.")
+
+
+def band_name(center: float) -> str:
+    return f"{center / 1000:.1f} kHz" if center >= 1000 else f"{center:.0f} Hz"
+
+
+def _band_matrix(rate: int, n_fft: int) -> np.ndarray:
+    """(bins, bands) 0/1 matrix summing FFT power bins into the 1/3-octave bands."""
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / rate)
+    low, high = CENTERS * 2 ** (-1 / 6), CENTERS * 2 ** (1 / 6)
+    return ((freqs[:, None] >= low) & (freqs[:, None] < high)).astype(np.float32)
+
+
+def band_levels(path: str) -> Dict[str, Any]:
+    """Band levels (dB, frames x bands) of one stem, streamed chunk by chunk."""
+    audio = AudioFile(path)
+    rate = audio.sample_rate
+    hop = int(round(HOP_SECONDS * rate))
+    window = hop * WINDOW_HOPS
+    n_fft = 1 << (window - 1).bit_length()
+    taper = np.hanning(window).astype(np.float32)
+    bands = _band_matrix(rate, n_fft)
+    # One-sided Parseval: band power becomes the mean square of the windowed signal in that band
+    scale = 2.0 / (n_fft * float((taper ** 2).sum()))
+    count = max(0, (audio.frames - window) // hop + 1)
+    levels = np.full((count, len(CENTERS)), -np.inf, dtype=np.float32)
+    chunk_frames = hop * (FRAMES_PER_CHUNK - 1) + window
+    try:
+        for start, chunk in audio.chunks(chunk_frames, overlap=window - hop):
+            first = start // hop
+            mono = chunk.mean(axis=1)
+            if len(mono) < window:
+                break
+            frames = np.lib.stride_tricks.sliding_window_view(mono, window)[::hop][:count - first]
+            power = np.abs(np.fft.rfft(frames * taper, n_fft, axis=1)) ** 2 @ bands
+            with np.errstate(divide="ignore"):
+                levels[first:first + len(frames)] = 10 * np.log10(power * scale)
+    finally:
+        audio.close()
+    return {"file": os.path.basename(path), "sample_rate": rate,
+            "duration_seconds": round(audio.duration, 2), "levels": levels}
+
+
+def _regions(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) frame ranges of consecutive True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def compare(a: np.ndarray, b: np.ndarray) -> Optional[Dict[str, Any]]:
+    """Where two stems' band levels (frames x bands) are both relevant and close together."""
+    relevant = []
+    for levels in (a, b):
+        finite = levels[np.isfinite(levels)]
+        reference = float(np.percentile(finite, 99)) if finite.size else ACTIVE_DB
+        relevant.append(levels >= max(ACTIVE_DB, reference - RELEVANT_DB))
+    both = relevant[0] & relevant[1]
+    with np.errstate(invalid="ignore"):
+        clash = both & (np.abs(a - b) <= CLASH_DB)
+    frames = clash.sum(axis=0)
+    if not frames.any():
+        return None
+    either = (relevant[0] | relevant[1]).sum(axis=0)
+    top = [int(band) for band in np.argsort(frames)[::-1][:TOP_BANDS] if frames[band]]
+    bands = []
+    for band in top:
+        hits = clash[:, band]
+        difference = float((a[hits, band] - b[hits, band]).mean())
+        bands.append({"band": band_name(CENTERS[band]), "center_hz": round(float(CENTERS[band]), 1),
+                      "clash_pct": round(100.0 * frames[band] / max(1, either[band]), 1),
+                      "seconds": round(float(frames[band]) * HOP_SECONDS, 1),
+                      "louder": 0 if difference > 0 else 1, "difference_db": round(abs(difference), 1)})
+
+    # Time regions: the top bands clashing, short gaps merged
+    hits = clash[:, top].any(axis=1)
+    bursts = _regions(hits)
+    gap = int(round(MERGE_SECONDS / HOP_SECONDS))
+    filled = hits.copy()
+    for (_, end), (start, _) in zip(bursts, bursts[1:]):
+        if start - end <= gap:
+            filled[end:start] = True
+    regions = [(start, end) for start, end in _regions(filled) if (end - start) * HOP_SECONDS >= MIN_REGION_SECONDS]
+    return {
+        "score": round(100.0 * float(clash[:, top].mean()), 2),
+        "bands": bands,
+        "burst_seconds": round(float(np.mean([end - start for start, end in bursts])) * HOP_SECONDS, 2),
+        "regions": [{"start": round(start * HOP_SECONDS, 1), "end": round(end * HOP_SECONDS, 1)}
+                    for start, end in sorted(regions, key=lambda r: r[0] - r[1])[:3]],
+    }
+
+
+def stem_paths(paths: List[str]) -> List[str]:
+    """Audio files given directly or found in the given folders (not recursive)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if is_audio_file(name))
+        else:
+            found.append(path)
+    return found
+
+
+def analyze_masking(paths: List[str], workers: Optional[int] = None) -> Dict[str, Any]:
+    """Band levels of every stem in parallel, then a clash report for every pair."""
+    started = time.perf_counter()
+    stems = stem_paths(paths)
+    if len(stems) < 2:
+        raise ValueError("Masking analysis needs at least two stems")
+    if workers is not None:
+        workers = max(1, min(int(workers), os.cpu_count() or 1))
+    if workers == 1 or (workers is None and (os.cpu_count() or 1) == 1):
+        analyses = [band_levels(path) for path in stems]
+    else:
+        # Stems are independent and FFT-heavy; each one's band levels come back small (frames x 28)
+        # Fresh interpreters rather than forks of the (threaded) server process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            analyses = list(pool.map(band_levels, stems))
+
+    frames = max(len(stem["levels"]) for stem in analyses)
+    levels = [np.pad(stem["levels"], ((0, frames - len(stem["levels"])), (0, 0)), constant_values=-np.inf)
+              for stem in analyses]
+    names = [stem["file"] for stem in analyses]
+    pairs = []
+    for i in range(len(levels)):
+        for j in range(i + 1, len(levels)):
+            result = compare(levels[i], levels[j])
+            if result:
+                for band in result["bands"]:
+                    band["louder"] = names[(i, j)[band["louder"]]]
+                pairs.append(dict(result, stems=[names[i], names[j]]))
+    pairs.sort(key=lambda pair: pair["score"], reverse=True)
+
+    elapsed = time.perf_counter() - started
+    audio_seconds = sum(stem["duration_seconds"] for stem in analyses)
+    return {
+        "stems": [{key: stem[key] for key in ("file", "sample_rate", "duration_seconds")} for stem in analyses],
+        "pairs": pairs,
+        "analysis_seconds": round(elapsed, 3),
+        "realtime_factor": round(audio_seconds / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def summarize(report: Dict[str, Any]) -> str:
+    """Worst clashing pairs, for an LLM prompt."""
+    lines = [f"Masking analysis of {len(report['stems'])} stems: " + ", ".join(s["file"] for s in report["stems"]) + "."]
+    if not report["pairs"]:
+        lines.append("No two stems are loud in the same frequency bands at the same time.")
+    for pair in report["pairs"][:MAX_PAIRS]:
+        a, b = pair["stems"]
+        bands = "; ".join(f"{band['band']} ({band['clash_pct']}% of the time either plays there, "
+                          f"{band['louder']} louder by {band['difference_db']} dB)" for band in pair["bands"])
+        lines.append(f"{a} vs {b}: clash score {pair['score']}, bands {bands}.")
+        # Short bursts (kick hits) suggest sidechain, long stretches suggest EQ
+        regions = ", ".join(f"{_clock(r['start'])}-{_clock(r['end'])}" for r in pair["regions"])
+        lines.append(f"  Overlaps last {pair['burst_seconds']} s on average"
+                     + (f"; longest stretches at {regions}." if regions else "."))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find frequency masking between exported stems")
+    parser.add_argument("paths", nargs="+", help="stem files or a folder of stems")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = parser.parse_args()
+    result = analyze_masking(args.paths, args.workers)
+    print(summarize(result))
+    print(f">> Analyzed in {result['analysis_seconds']}s ({result['realtime_factor']}x real time)")
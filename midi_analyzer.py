@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Streaming MIDI file analyzer for Profesor Ableton
+Estimates key, tempo map, note density, velocity spread and per-track
+pitch ranges without turning the whole file into mido message lists
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+import mido  # type: ignore
+
+from music_theory import NOTE_NAMES, note_name
+
+# Krumhansl-Kessler key profiles, index 0 = tonic
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+KEY_NAMES = [f"{n} major" for n in NOTE_NAMES] + [f"{n} minor" for n in NOTE_NAMES]
+
+DEFAULT_TEMPO = 500000  # microseconds per beat (120 BPM)
+DRUM_CHANNEL = 9  # General MIDI channel 10
+MAX_TEMPO_MAP_ENTRIES = 64
+
+
+def _build_key_matrix() -> np.ndarray:
+    """Rotated, centered and normalized key profiles (24 x 12)."""
+    rows = [np.roll(MAJOR_PROFILE, k) for k in range(12)]
+    rows += [np.roll(MINOR_PROFILE, k) for k in range(12)]
+    matrix = np.array(rows)
+    matrix = matrix - matrix.mean(axis=1, keepdims=True)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+KEY_MATRIX = _build_key_matrix()
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-1 of file contents, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_varlen(data, pos: int) -> Tuple[int, int]:
+    """Read a MIDI variable-length quantity, return (value, new position)."""
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def _key_signature_name(payload: bytes) -> str:
+    """Decode a key signature meta event (sharps/flats + mode)."""
+    sharps = payload[0] - 256 if payload[0] > 127 else payload[0]
+    minor = len(payload) > 1 and payload[1] == 1
+    tonic = (7 * sharps + (9 if minor else 0)) % 12
+    return f"{NOTE_NAMES[tonic]} {'minor' if minor else 'major'}"
+
+
+class _MidiColumns:
+    """Compact growable columns filled while streaming through the tracks."""
+
+    def __init__(self):
+        self.start = array("q")
+        self.end = array("q")
+        self.pitch = array("B")
+        self.velocity = array("B")
+        self.channel = array("B")
+        self.track = array("H")
+        self.tempo_tick = array("q")
+        self.tempo = array("q")
+        self.time_signatures: List[Tuple[int, int, int]] = []
+        self.key_signatures: List[Tuple[int, str]] = []
+        self.track_names: List[str] = []
+
+    def add_note(self, start: int, end: int, pitch: int, velocity: int, channel: int, track: int):
+        self.start.append(start)
+        self.end.append(end)
+        self.pitch.append(pitch)
+        self.velocity.append(velocity)
+        self.channel.append(channel)
+        self.track.append(track)
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        return {
+            "start": np.frombuffer(self.start, dtype=np.int64),
+            "end": np.frombuffer(self.end, dtype=np.int64),
+            "pitch": np.frombuffer(self.pitch, dtype=np.uint8),
+            "velocity": np.frombuffer(self.velocity, dtype=np.uint8),
+            "channel": np.frombuffer(self.channel, dtype=np.uint8),
+            "track": np.frombuffer(self.track, dtype=np.uint16),
+        }
+
+
+def _parse_track(data, pos: int, end: int, track_index: int, cols: _MidiColumns) -> int:
+    """Stream one MTrk chunk into the columns, return the last tick."""
+    tick = 0
+    status = 0
+    name = ""
+    open_notes: Dict[int, Tuple[int, int]] = {}  # (channel << 7 | pitch) -> (start, velocity)
+
+    while pos < end:
+        delta, pos = _read_varlen(data, pos)
+        tick += delta
+        byte = data[pos]
+        if byte >= 0x80:
+            event = byte
+            pos += 1
+        elif status:
+            event = status  # running status
+        else:
+            raise ValueError(f"Running status without a status byte in track {track_index}")
+
+        if event == 0xFF:
+            meta_type = data[pos]
+            length, pos = _read_varlen(data, pos + 1)
+            payload = data[pos:pos + length]
+            pos += length
+            if meta_type == 0x51 and length == 3:
+                cols.tempo_tick.append(tick)
+                cols.tempo.append((payload[0] << 16) | (payload[1] << 8) | payload[2])
+            elif meta_type == 0x03 and not name:
+                name = payload.decode("latin-1").strip()
+            elif meta_type == 0x58 and length >= 2:
+                cols.time_signatures.append((tick, payload[0], 2 ** payload[1]))
+            elif meta_type == 0x59 and length >= 1:
+                cols.key_signatures.append((tick, _key_signature_name(payload)))
+            elif meta_type == 0x2F:
+                break
+        elif event in (0xF0, 0xF7):
+            length, pos = _read_varlen(data, pos)
+            pos += length
+        else:
+            status = event
+            kind = event & 0xF0
+            if kind in (0xC0, 0xD0):
+                pos += 1
+                continue
+            note = data[pos]
+            velocity = data[pos + 1]
+            pos += 2
+            if kind == 0x90 or kind == 0x80:
+                key = ((event & 0x0F) << 7) | note
+                previous = open_notes.pop(key, None)
+                if previous is not None:
+                    cols.add_note(previous[0], tick, note, previous[1], event & 0x0F, track_index)
+                if kind == 0x90 and velocity > 0:
+                    open_notes[key] = (tick, velocity)
+
+    # Close notes that never got a note_off
+    for key, (start, velocity) in open_notes.items():
+        cols.add_note(start, tick, key & 0x7F, velocity, key >> 7, track_index)
+    cols.track_names.append(name)
+    return tick
+
+
+def _tempo_map(cols: _MidiColumns, ticks_per_beat: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return change ticks, tempos (us/beat) and seconds at each change."""
+    ticks = np.frombuffer(cols.tempo_tick, dtype=np.int64)
+    tempos = np.frombuffer(cols.tempo, dtype=np.int64)
+    order = np.argsort(ticks, kind="stable")
+    ticks, tempos = ticks[order], tempos[order]
+    # Keep the last tempo written at any given tick
+    if len(ticks):
+        keep = np.append(ticks[1:] != ticks[:-1], True)
+        ticks, tempos = ticks[keep], tempos[keep]
+    if not len(ticks) or ticks[0] != 0:
+        ticks = np.insert(ticks, 0, 0)
+        tempos = np.insert(tempos, 0, DEFAULT_TEMPO)
+    seconds_per_tick = tempos / 1e6 / ticks_per_beat
+    change_seconds = np.concatenate(([0.0], np.cumsum(np.diff(ticks) * seconds_per_tick[:-1])))
+    return ticks, tempos, change_seconds
+
+
+def _ticks_to_seconds(values: np.ndarray, ticks: np.ndarray, tempos: np.ndarray,
+                      change_seconds: np.ndarray, ticks_per_beat: int) -> np.ndarray:
+    """Vectorized tick -> seconds conversion through the tempo map."""
+    idx = np.searchsorted(ticks, values, side="right") - 1
+    return change_seconds[idx] + (values - ticks[idx]) * (tempos[idx] / 1e6 / ticks_per_beat)
+
+
+def estimate_key(pitch_weights: np.ndarray) -> List[Tuple[str, float]]:
+    """Rank the 24 keys by correlation with a pitch-class histogram."""
+    if not pitch_weights.any():
+        return []
+    centered = pitch_weights - pitch_weights.mean()
+    norm = np.linalg.norm(centered)
+    if norm == 0:
+        return []
+    scores = KEY_MATRIX @ (centered / norm)
+    order = np.argsort(scores)[::-1]
+    return [(KEY_NAMES[i], float(scores[i])) for i in order]
+
+
+def analyze_file(path: str) -> Dict[str, Any]:
+    """Parse a Standard MIDI File and compute its statistics."""
+    cols = _MidiColumns()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:4] != b"MThd":
+            raise ValueError(f"Not a Standard MIDI File: {os.path.basename(path)}")
+        header_length = int.from_bytes(data[4:8], "big")
+        midi_format = int.from_bytes(data[8:10], "big")
+        division = int.from_bytes(data[12:14], "big")
+        pos = 8 + header_length
+        last_tick = 0
+        track_index = 0
+        while pos + 8 <= len(data):
+            chunk_type = data[pos:pos + 4]
+            chunk_length = int.from_bytes(data[pos + 4:pos + 8], "big")
+            chunk_end = min(pos + 8 + chunk_length, len(data))
+            if chunk_type == b"MTrk":
+                last_tick = max(last_tick, _parse_track(data, pos + 8, chunk_end, track_index, cols))
+                track_index += 1
+            pos = chunk_end
+
+    notes = cols.to_numpy()
+    if division & 0x8000:
+        # SMPTE timing: ticks are a fixed fraction of a second, tempo events don't apply
+        fps = 256 - (division >> 8)
+        ticks_per_beat = 480
+        seconds_per_tick = 1.0 / (fps * (division & 0xFF))
+        tempo_ticks = np.array([0], dtype=np.int64)
+        tempos = np.array([int(seconds_per_tick * 1e6 * ticks_per_beat)], dtype=np.int64)
+        change_seconds = np.array([0.0])
+    else:
+        ticks_per_beat = division
+        tempo_ticks, tempos, change_seconds = _tempo_map(cols, ticks_per_beat)
+
+    def to_seconds(values):
+        return _ticks_to_seconds(values, tempo_ticks, tempos, change_seconds, ticks_per_beat)
+
+    start_s = to_seconds(notes["start"])
+    end_s = to_seconds(notes["end"])
+    duration = float(to_seconds(np.array([last_tick], dtype=np.int64))[0])
+    pitch = notes["pitch"].astype(np.int64)
+    velocity = notes["velocity"].astype(np.float64)
+    count = len(pitch)
+
+    # Key estimate from duration-weighted pitch classes, drums excluded
+    tonal = notes["channel"] != DRUM_CHANNEL
+    pitch_weights = np.bincount(pitch[tonal] % 12, weights=(end_s - start_s)[tonal] + 1e-3, minlength=12)
+    ranked = estimate_key(pitch_weights)
+
+    # Tempo map (capped so huge files with tempo ramps stay compact)
+    tempo_map = [{"time": round(float(s), 3), "bpm": round(mido.tempo2bpm(int(t)), 2)}
+                 for s, t in zip(change_seconds[:MAX_TEMPO_MAP_ENTRIES], tempos[:MAX_TEMPO_MAP_ENTRIES])]
+
+    numerator, denominator = 4, 4
+    if cols.time_signatures:
+        _, numerator, denominator = min(cols.time_signatures)
+    ticks_per_bar = ticks_per_beat * numerator * 4 / denominator
+
+    density: Dict[str, Any] = {"notes_per_second": 0.0, "peak_notes_per_second": 0, "notes_per_bar": 0.0}
+    if count and duration > 0:
+        per_second = np.bincount(start_s.astype(np.int64))
+        bars = max(1.0, last_tick / ticks_per_bar)
+        density = {
+            "notes_per_second": round(count / duration, 2),
+            "peak_notes_per_second": int(per_second.max()),
+            "notes_per_bar": round(count / bars, 2),
+        }
+
+    velocity_stats: Dict[str, Any] = {}
+    if count:
+        p10, p50, p90 = np.percentile(velocity, [10, 50, 90])
+        velocity_stats = {
+            "mean": round(float(velocity.mean()), 1),
+            "std": round(float(velocity.std()), 1),
+            "min": int(velocity.min()),
+            "max": int(velocity.max()),
+            "p10": int(p10), "p50": int(p50), "p90": int(p90),
+            "histogram": np.bincount(notes["velocity"] >> 4, minlength=8).tolist(),
+        }
+
+    track_ranges = []
+    track_ids = notes["track"]
+    for index, name in enumerate(cols.track_names):
+        mask = track_ids == index
+        if not mask.any():
+            continue
+        track_pitch = pitch[mask]
+        low, high = int(track_pitch.min()), int(track_pitch.max())
+        track_ranges.append({
+            "track": index,
+            "name": name or f"Track {index + 1}",
+            "notes": int(mask.sum()),
+            "lowest": note_name(low), "highest": note_name(high),
+            "lowest_midi": low, "highest_midi": high,
+            "drums": bool((notes["channel"][mask] == DRUM_CHANNEL).all()),
+        })
+
+    return {
+        "file": os.path.basename(path),
+        "format": midi_format,
+        "ticks_per_beat": ticks_per_beat,
+        "tracks": len(cols.track_names),
+        "duration_seconds": round(duration, 2),
+        "notes": count,
+        "key": {
+            "name": ranked[0][0] if ranked else None,
+            "confidence": round(ranked[0][1], 3) if ranked else 0.0,
+            "alternatives": [{"name": n, "score": round(s, 3)} for n, s in ranked[1:4]],
+            "declared": cols.key_signatures[0][1] if cols.key_signatures else None,
+        },
+        "tempo_map": tempo_map,
+        "tempo_changes": len(tempos),
+        "time_signature": f"{numerator}/{denominator}",
+        "density": density,
+        "velocity": velocity_stats,
+        "track_ranges": track_ranges,
+    }
+
+
+def summarize(result: Dict[str, Any]) -> str:
+    """Compact text summary suitable for an LLM prompt."""
+    minutes, seconds = divmod(int(round(result["duration_seconds"])), 60)
+    lines = [f"MIDI file '{result['file']}': {minutes}:{seconds:02d} long, "
+             f"{result['tracks']} tracks, {result['notes']} notes."]
+
+    key = result["key"]
+    if key["name"]:
+        line = f"Key estimate: {key['name']} (confidence {key['confidence']:.2f}"
+        if key["alternatives"]:
+            alt = key["alternatives"][0]
+            line += f"; next: {alt['name']} {alt['score']:.2f}"
+        line += ")."
+        if key["declared"]:
+            line += f" Declared key signature: {key['declared']}."
+        lines.append(line)
+
+    bpms = [entry["bpm"] for entry in result["tempo_map"]]
+    if len(bpms) > 1:
+        lines.append(f"Tempo: starts at {bpms[0]} BPM, {result['tempo_changes']} changes "
+                     f"({min(bpms)}-{max(bpms)} BPM). Time signature {result['time_signature']}.")
+    else:
+        lines.append(f"Tempo: {bpms[0]} BPM. Time signature {result['time_signature']}.")
+
+    density = result["density"]
+    lines.append(f"Density: {density['notes_per_second']} notes/s average, "
+                 f"{density['peak_notes_per_second']} peak, {density['notes_per_bar']} notes/bar.")
+
+    velocity = result["velocity"]
+    if velocity:
+        lines.append(f"Velocity: mean {velocity['mean']}, range {velocity['min']}-{velocity['max']}, "
+                     f"middle 80% {velocity['p10']}-{velocity['p90']}.")
+
+    if result["track_ranges"]:
+        parts = []
+        for track in result["track_ranges"]:
+            kind = " drums" if track["drums"] else f" {track['lowest']}-{track['highest']}"
+            parts.append(f"{track['name']}{kind} ({track['notes']} notes)")
+        lines.append("Tracks: " + "; ".join(parts) + ".")
+    return "\n".join(lines)
+
+
+class MidiAnalyzer:
+    """MIDI analysis with results cached by file content hash."""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size or int(os.getenv("MIDI_CACHE_SIZE", "32"))
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, path: str) -> Dict[str, Any]:
+        """Analyze a .mid file, reusing cached results for identical content."""
+        digest = file_digest(path)
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                print(f">> MIDI analysis cache hit: {os.path.basename(path)}")
+                return cached
+
+        print(f">> Analyzing MIDI file: {path}")
+        result = analyze_file(path)
+        with self._lock:
+            self._cache[digest] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python midi_analyzer.py file.mid [file2.mid ...]")
+        sys.exit(1)
+    analyzer = MidiAnalyzer()
+    for midi_path in sys.argv[1:]:
+        print(summarize(analyzer.analyze(midi_path)))
+        print()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Live MIDI input analysis for Profesor Ableton
+A MIDI source (hardware port via mido, or a .mid file replayed in real
+time) pushes note events into a preallocated ring buffer; a background
+thread turns them into the held chord, timing against the grid and
+velocity statistics with constant work per event. The server reads the
+latest state to answer "what chord am I playing?" or "am I rushing?".
+"""
+
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, Callable
+
+import numpy as np
+import mido  # type: ignore
+
+from midi_analyzer import DRUM_CHANNEL
+from midi_transform import parse_grid
+from music_theory import identify_chord, note_name
+
+EVENT_DTYPE = np.dtype([("time", "f8"), ("note", "u1"), ("velocity", "u1"), ("channel", "u1"), ("on", "?")])
+RING_CAPACITY = 4096
+WINDOW = 64  # notes in the timing and velocity statistics
+RESET_BEATS = 8  # a pause this long starts a new phrase (new timing anchor)
+RUSH_MS = 12.0  # average deviation beyond this is rushing/dragging
+FOLLOW = 0.25  # share of each deviation the grid follows, so tempo drift shows as a steady offset
+
+# Only present-tense questions about the user's own playing are answered live ("am I rushing?",
+# "what chord am I playing?", "how's my timing right now?"); advice questions go to the providers
+PLAYING_NOW = re.compile(
+    r"\b(?:am i|i'?m|i am)\s+(?:\w+\s+)?(?:playing|rushing|dragging|holding|hitting|in time|on time|ahead|behind|late|early)\b"
+    r"|\bmy\s+(?:playing|timing|velocity|velocities|dynamics)\b.*\b(?:right now|now|currently|at the moment)\b"
+    r"|\bhow(?:'s|\s+is)\s+my\s+(?:playing|timing|velocity|velocities|dynamics)\b", re.IGNORECASE)
+ADVICE = re.compile(r"\b(?:should|why|could|would|how\s+(?:do|does|can|to|should|would))\b", re.IGNORECASE)
+TIMING_QUESTION = re.compile(r"\b(rush\w*|drag\w*|in time|on time|timing|behind|ahead|late|early|tight)\b",
+                             re.IGNORECASE)
+VELOCITY_QUESTION = re.compile(r"\b(velocity|velocities|dynamics|hard|soft|hitting)\b", re.IGNORECASE)
+
+
+class RingBuffer:
+    """Fixed-size event ring, one writer (the MIDI source) and one reader (the analyzer)."""
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.events = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.capacity = capacity
+        self.written = 0  # events pushed so far; slots below it are complete
+        self.ready = threading.Event()
+
+    def push(self, t: float, note: int, velocity: int, channel: int, on: bool):
+        self.events[self.written % self.capacity] = (t, note, velocity, channel, on)
+        self.written += 1
+        self.ready.set()
+
+    def read(self, position: int):
+        """Events from `position` on, the new position and how many were overwritten unread."""
+        end = self.written
+        dropped = max(0, end - position - self.capacity)
+        position += dropped
+        return self.events[np.arange(position, end) % self.capacity], end, dropped
+
+
+class LiveAnalyzer:
+    """Held notes, timing deviation from the grid and velocity stats, updated per event."""
+
+    def __init__(self, bpm: float = 120.0, grid: str = "1/16"):
+        self.held = np.zeros(128, dtype=bool)
+        self.deviations = np.zeros(WINDOW)
+        self.velocities = np.zeros(WINDOW)
+        self.configure(bpm, grid)
+        self.reset()
+
+    def configure(self, bpm: Optional[float] = None, grid: Optional[str] = None):
+        if bpm is not None:
+            self.bpm = float(bpm)
+        if grid is not None:
+            self.grid = grid
+            self.grid_beats = parse_grid(grid)
+
+    def reset(self):
+        self.held[:] = False
+        self.notes = 0
+        self.anchor: Optional[float] = None
+        self.last_on = 0.0
+        self.chord: Optional[Dict[str, str]] = None
+
+    def feed(self, events: np.ndarray):
+        for t, note, velocity, channel, on in events.tolist():
+            if on:
+                self._note_on(t, note, velocity, channel)
+            elif channel != DRUM_CHANNEL and self.held[note]:
+                self.held[note] = False
+                self._update_chord()
+
+    def _note_on(self, t: float, note: int, velocity: int, channel: int):
+        beat = 60.0 / self.bpm
+        if self.anchor is None or t - self.last_on > RESET_BEATS * beat:
+            self.anchor = t  # new phrase: its first note defines the grid
+        self.last_on = t
+        step = beat * self.grid_beats
+        steps = (t - self.anchor) / step
+        deviation = (steps - round(steps)) * step
+        self.anchor += deviation * FOLLOW
+        slot = self.notes % WINDOW
+        self.deviations[slot] = deviation * 1000.0
+        self.velocities[slot] = velocity
+        self.notes += 1
+        if channel != DRUM_CHANNEL:
+            self.held[note] = True
+            self._update_chord()
+
+    def _update_chord(self):
+        pitches = np.flatnonzero(self.held).tolist()
+        if len({p % 12 for p in pitches}) >= 2:
+            found = identify_chord(pitches)
+            self.chord = found[0] if found else {"symbol": None, "notes": " ".join(note_name(p) for p in pitches)}
+        elif not pitches:
+            self.chord = None
+
+    def state(self) -> Dict[str, Any]:
+        count = min(self.notes, WINDOW)
+        held = [note_name(p) for p in np.flatnonzero(self.held)]
+        timing: Dict[str, Any] = {"bpm": self.bpm, "grid": self.grid}
+        velocity: Dict[str, Any] = {}
+        if count:
+            deviations, velocities = self.deviations[:count], self.velocities[:count]
+            mean = float(deviations.mean())
+            timing.update(mean_ms=round(mean, 1), spread_ms=round(float(deviations.std()), 1),
+                          verdict="rushing" if mean < -RUSH_MS else "dragging" if mean > RUSH_MS else "on the grid")
+            velocity = {"mean": round(float(velocities.mean()), 1), "std": round(float(velocities.std()), 1),
+                        "min": int(velocities.min()), "max": int(velocities.max())}
+        return {"held": held, "chord": self.chord, "notes": self.notes, "timing": timing, "velocity": velocity}
+
+
+# -- Sources -------------------------------------------------------------------
+
+class PortSource:
+    """Hardware/virtual MIDI input port (needs a mido backend such as python-rtmidi)."""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.port = None
+
+    def start(self, push: Callable):
+        self.port = mido.open_input(self.name, callback=push)
+        print(f">> Listening to MIDI input {self.port.name}")
+
+    def stop(self):
+        if self.port is not None:
+            self.port.close()
+            self.port = None
+
+
+class FileSource:
+    """Replays a .mid file in real time (speed 2 = twice as fast), for testing without hardware."""
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self._stop = threading.Event()
+
+    def start(self, push: Callable):
+        midi = mido.MidiFile(self.path)
+        self._stop.clear()
+        threading.Thread(target=self._play, args=(midi, push), daemon=True).start()
+        print(f">> Replaying {self.path} as MIDI input")
+
+    def _play(self, midi: "mido.MidiFile", push: Callable):
+        while not self._stop.is_set():
+            # Sleep until each message's due time, so lateness doesn't accumulate
+            due = time.monotonic()
+            for msg in midi:
+                due += msg.time / self.speed
+                if self._stop.wait(max(0.0, due - time.monotonic())):
+                    return
+                if not msg.is_meta:
+                    push(msg)
+            if not self.loop:
+                return
+
+    def stop(self):
+        self._stop.set()
+
+
+class MidiInput:
+    """Source -> ring buffer -> analyzer thread; state() is the latest published snapshot."""
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.buffer = RingBuffer(capacity)
+        self.analyzer = LiveAnalyzer()
+        self.source = None
+        self.dropped = 0
+        self._snapshot: Dict[str, Any] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _push(self, msg):
+        if msg.type == "note_on" or msg.type == "note_off":
+            self.buffer.push(time.monotonic(), msg.note, msg.velocity, msg.channel,
+                             msg.type == "note_on" and msg.velocity > 0)
+
+    def start(self, source, bpm: Optional[float] = None, grid: Optional[str] = None):
+        self.stop()
+        self.analyzer.configure(bpm, grid)
+        self.analyzer.reset()
+        self.dropped = 0
+        self._snapshot = self.analyzer.state()
+        self._running = True
+        self._thread = threading.Thread(target=self._analyze, args=(self.buffer.written,), daemon=True)
+        self._thread.start()
+        try:
+            source.start(self._push)
+        except Exception:
+            self._running = False
+            raise
+        self.source = source
+
+    def stop(self):
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
+        self._running = False
+        self.buffer.ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _analyze(self, position: int):
+        while self._running:
+            self.buffer.ready.wait(0.5)
+            self.buffer.ready.clear()
+            events, position, dropped = self.buffer.read(position)
+            if dropped:
+                self.dropped += dropped
+                print(f">> MIDI input analyzer fell behind - {dropped} events skipped")
+            if len(events):
+                self.analyzer.feed(events)
+                self._snapshot = self.analyzer.state()  # replaced whole, readers never see a half update
+
+    def state(self) -> Dict[str, Any]:
+        return dict(self._snapshot, running=self._running, dropped=self.dropped,
+                    source=type(self.source).__name__ if self.source else None)
+
+    def answer(self, question: str) -> Optional[str]:
+        """Answer about what is being played right now, None if the question is not about that."""
+        if not self._running or ADVICE.search(question) or not PLAYING_NOW.search(question):
+            return None
+        state = self._snapshot
+        if TIMING_QUESTION.search(question):
+            timing = state.get("timing", {})
+            if "mean_ms" not in timing:
+                return "I haven't heard any notes yet - play something!"
+            direction = "ahead of" if timing["mean_ms"] < 0 else "behind"
+            return (f"You're {timing['verdict']}: on average {abs(timing['mean_ms']):.0f} ms {direction} the "
+                    f"{timing['grid']} grid at {timing['bpm']:g} BPM, spread {timing['spread_ms']:.0f} ms "
+                    f"over the last {min(state['notes'], WINDOW)} notes.")
+        if VELOCITY_QUESTION.search(question):
+            velocity = state.get("velocity")
+            if not velocity:
+                return "I haven't heard any notes yet - play something!"
+            return (f"Velocity averages {velocity['mean']:.0f} (spread {velocity['std']:.0f}, "
+                    f"range {velocity['min']}-{velocity['max']}) over the last {min(state['notes'], WINDOW)} notes.")
+        chord = state.get("chord")
+        if not state.get("held"):
+            return "Nothing is held right now."
+        if not chord:
+            return f"You're holding {' '.join(state['held'])}."
+        if not chord.get("symbol"):
+            return f"You're holding {chord['notes']} - not a standard chord."
+        return f"You're playing {chord['symbol']} ({chord['name']}, {chord['inversion']}): {chord['notes']}."
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Batch MIDI transformations for Profesor Ableton
+Loads .mid files into NumPy note columns, applies vectorized transforms
+(transpose, key change, scale snap, quantize, swing/groove, humanize,
+velocity curves) and writes them back with every other event untouched.
+Folders are processed in parallel across a process pool.
+"""
+
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+import mido  # type: ignore
+
+from midi_analyzer import DRUM_CHANNEL, estimate_key
+from music_theory import SCALES, parse_key
+
+MIDI_EXTENSIONS = (".mid", ".midi")
+OUTPUT_FOLDER = "transformed"
+INLINE_FILES = 8  # fewer files than this are not worth starting processes for
+
+# Per-step timing offsets (fraction of a grid step) and velocity factors, repeating
+GROOVES = {
+    "mpc-16": {"grid": "1/16", "timing": (0.0, 0.16), "velocity": (1.0, 0.85)},
+    "shuffle-8": {"grid": "1/8", "timing": (0.0, 0.33), "velocity": (1.0, 0.9)},
+    "laid-back": {"grid": "1/16", "timing": (0.04, 0.1, 0.06, 0.12), "velocity": (1.0, 0.88, 0.95, 0.85)},
+    "push": {"grid": "1/16", "timing": (-0.04, -0.02, -0.05, -0.02), "velocity": (1.0, 0.9, 0.97, 0.9)},
+    "hip-hop": {"grid": "1/16", "timing": (0.0, 0.22, 0.02, 0.25), "velocity": (1.0, 0.75, 0.9, 0.7)},
+}
+
+
+def parse_grid(grid) -> float:
+    """Grid length in beats: '1/16' -> 0.25, '1/8t' -> triplet eighth, or a number of beats."""
+    if isinstance(grid, (int, float)):
+        beats = float(grid)
+    else:
+        text = str(grid).strip().lower()
+        triplet = text.endswith("t")
+        text = text.rstrip("t")
+        if "/" in text:
+            numerator, denominator = text.split("/", 1)
+            beats = 4.0 * float(numerator) / float(denominator)
+        else:
+            beats = float(text)
+        if triplet:
+            beats *= 2.0 / 3.0
+    if beats <= 0:
+        raise ValueError(f"Grid must be positive: {grid}")
+    return beats
+
+
+def compile_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a transform spec up front, so a bad value fails before any file is touched."""
+    known = {"transpose", "to_key", "scale", "quantize", "strength", "swing", "groove", "groove_strength",
+             "humanize", "humanize_velocity", "seed", "velocity_curve", "velocity_range"}
+    unknown = set(spec) - known
+    if unknown:
+        raise ValueError(f"Unknown transforms: {', '.join(sorted(unknown))}")
+    compiled = dict(spec)
+    if spec.get("to_key"):
+        compiled["to_key"] = parse_key(spec["to_key"])
+    if spec.get("scale"):
+        compiled["scale"] = parse_key(spec["scale"])
+    if spec.get("quantize"):
+        compiled["quantize"] = parse_grid(spec["quantize"])
+    if spec.get("groove"):
+        if spec["groove"] not in GROOVES:
+            raise ValueError(f"Unknown groove: {spec['groove']} (try {', '.join(GROOVES)})")
+    if spec.get("swing") is not None and not 50 <= float(spec["swing"]) <= 75:
+        raise ValueError("Swing is a percentage from 50 (straight) to 75")
+    if spec.get("velocity_range") is not None:
+        low, high = (int(v) for v in spec["velocity_range"])
+        if not 1 <= low <= high <= 127:
+            raise ValueError("Velocity range must be within 1..127")
+        compiled["velocity_range"] = (low, high)
+    return compiled
+
+
+# -- Loading and saving ------------------------------------------------------
+
+def load_notes(mid: "mido.MidiFile") -> Tuple[Dict[str, np.ndarray], List[List[Tuple[int, Any]]]]:
+    """Note columns (absolute ticks) plus every non-note event per track."""
+    start, end, pitch, velocity, channel, track_ids = [], [], [], [], [], []
+    others: List[List[Tuple[int, Any]]] = []
+    for index, track in enumerate(mid.tracks):
+        tick = 0
+        kept: List[Tuple[int, Any]] = []
+        open_notes: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+        def close(key, at):
+            begun, vel = open_notes.pop(key)
+            start.append(begun)
+            end.append(at)
+            pitch.append(key[1])
+            velocity.append(vel)
+            channel.append(key[0])
+            track_ids.append(index)
+
+        for msg in track:
+            tick += msg.time
+            if msg.type in ("note_on", "note_off"):
+                key = (msg.channel, msg.note)
+                if key in open_notes:
+                    close(key, tick)
+                if msg.type == "note_on" and msg.velocity > 0:
+                    open_notes[key] = (tick, msg.velocity)
+            elif msg.type != "end_of_track":
+                kept.append((tick, msg))
+        for key in list(open_notes):
+            close(key, tick)
+        others.append(kept)
+
+    notes = {
+        "start": np.array(start, dtype=np.int64),
+        "end": np.array(end, dtype=np.int64),
+        "pitch": np.array(pitch, dtype=np.int64),
+        "velocity": np.array(velocity, dtype=np.float64),
+        "channel": np.array(channel, dtype=np.int64),
+        "track": np.array(track_ids, dtype=np.int64),
+    }
+    return notes, others
+
+
+def build_tracks(mid: "mido.MidiFile", notes: Dict[str, np.ndarray], others: List[List[Tuple[int, Any]]]):
+    """Replace the tracks of `mid` with the transformed notes merged back into the kept events."""
+    start = np.maximum(notes["start"], 0)
+    end = np.maximum(notes["end"], start + 1)
+    pitch = np.clip(notes["pitch"], 0, 127)
+    velocity = np.clip(np.rint(notes["velocity"]), 1, 127).astype(np.int64)
+    mid.tracks = []
+    for index, kept in enumerate(others):
+        # At the same tick: note-offs, then other events (program, CC), then note-ons
+        events = [(tick, 1, msg) for tick, msg in kept]
+        mask = notes["track"] == index
+        channels, pitches = notes["channel"][mask].tolist(), pitch[mask].tolist()
+        for begin, stop, ch, note, vel in zip(start[mask].tolist(), end[mask].tolist(), channels, pitches,
+                                              velocity[mask].tolist()):
+            events.append((begin, 2, ("note_on", ch, note, vel)))
+            events.append((stop, 0, ("note_off", ch, note, 64)))
+        events.sort(key=lambda e: (e[0], e[1]))
+        track = mido.MidiTrack()
+        previous = 0
+        for tick, _, event in events:
+            # Built once with the final delta time; values are already clipped, so mido's checks are skipped
+            if isinstance(event, tuple):
+                kind, ch, note, vel = event
+                track.append(mido.Message(kind, skip_checks=True, channel=ch, note=note, velocity=vel,
+                                          time=tick - previous))
+            else:
+                track.append(event.copy(skip_checks=True, time=tick - previous))
+            previous = tick
+        track.append(mido.MetaMessage("end_of_track", time=0))
+        mid.tracks.append(track)
+
+
+# -- Transforms (all vectorized over the note columns) -----------------------
+
+def transpose(notes: Dict[str, np.ndarray], semitones: int, tonal: np.ndarray):
+    notes["pitch"] = np.where(tonal, notes["pitch"] + int(semitones), notes["pitch"])
+
+
+def detect_key(notes: Dict[str, np.ndarray], tonal: np.ndarray) -> Optional[Tuple[int, str]]:
+    """Most likely key from duration-weighted pitch classes (as midi_analyzer does)."""
+    weights = np.bincount(notes["pitch"][tonal] % 12, weights=(notes["end"] - notes["start"])[tonal] + 1.0,
+                          minlength=12)
+    ranked = estimate_key(weights)
+    return parse_key(ranked[0][0]) if ranked else None
+
+
+def change_key(notes: Dict[str, np.ndarray], target: Tuple[int, str], tonal: np.ndarray):
+    """Move to the target key by the nearest shift; major <-> minor also moves the 3rd, 6th and 7th."""
+    current = detect_key(notes, tonal)
+    if current is None:
+        return
+    root, scale = target
+    shift = (root - current[0]) % 12
+    if shift > 6:
+        shift -= 12
+    transpose(notes, shift, tonal)
+    if current[1] != scale and {current[1], scale} <= {"major", "minor"}:
+        degrees, step = ((4, 9, 11), -1) if scale == "minor" else ((3, 8, 10), 1)
+        moved = tonal & np.isin((notes["pitch"] - root) % 12, degrees)
+        notes["pitch"] = np.where(moved, notes["pitch"] + step, notes["pitch"])
+
+
+def _snap_table(intervals) -> np.ndarray:
+    """Offset to the nearest scale tone for each of the 12 pitch classes (ties go down)."""
+    table = np.zeros(12, dtype=np.int64)
+    for pc in range(12):
+        table[pc] = min((d for d in range(-6, 7) if (pc + d) % 12 in intervals), key=lambda d: (abs(d), d))
+    return table
+
+
+def snap_to_scale(notes: Dict[str, np.ndarray], key: Tuple[int, str], tonal: np.ndarray):
+    root, scale = key
+    table = _snap_table(SCALES[scale])
+    offsets = table[(notes["pitch"] - root) % 12]
+    notes["pitch"] = np.where(tonal, notes["pitch"] + offsets, notes["pitch"])
+
+
+def quantize(notes: Dict[str, np.ndarray], grid_ticks: float, strength: float = 1.0):
+    """Pull note starts toward the grid; lengths are kept."""
+    start = notes["start"]
+    shift = np.rint((np.rint(start / grid_ticks) * grid_ticks - start) * strength).astype(np.int64)
+    notes["start"] = start + shift
+    notes["end"] = notes["end"] + shift
+
+
+def apply_groove(notes: Dict[str, np.ndarray], grid_ticks: float, timing, velocity, strength: float = 1.0):
+    """Offset notes by their step in the groove cycle and scale their velocity."""
+    timing = np.asarray(timing, dtype=np.float64)
+    factors = np.asarray(velocity, dtype=np.float64)
+    steps = np.rint(notes["start"] / grid_ticks).astype(np.int64)
+    phase = steps % len(timing)
+    shift = np.rint(timing[phase] * grid_ticks * strength).astype(np.int64)
+    notes["start"] = notes["start"] + shift
+    notes["end"] = notes["end"] + shift
+    notes["velocity"] = notes["velocity"] * (1.0 + strength * (factors[phase % len(factors)] - 1.0))
+
+
+def humanize(notes: Dict[str, np.ndarray], ticks_per_beat: int, timing: float, velocity: float,
+             rng: np.random.Generator):
+    """Gaussian jitter: `timing` in beats (std), `velocity` in velocity steps (std), both clipped at 2 std."""
+    count = len(notes["start"])
+    if timing:
+        std = timing * ticks_per_beat
+        shift = np.rint(np.clip(rng.normal(0.0, std, count), -2 * std, 2 * std)).astype(np.int64)
+        notes["start"] = notes["start"] + shift
+        notes["end"] = notes["end"] + shift
+    if velocity:
+        notes["velocity"] = notes["velocity"] + np.clip(rng.normal(0.0, velocity, count), -2 * velocity, 2 * velocity)
+
+
+def velocity_curve(notes: Dict[str, np.ndarray], gamma: float = 1.0, low: int = 1, high: int = 127):
+    """Map velocities through a power curve into [low, high]; gamma < 1 lifts quiet notes."""
+    normalized = np.clip(notes["velocity"], 1, 127) / 127.0
+    notes["velocity"] = low + (high - low) * normalized ** float(gamma)
+
+
+def apply_transforms(notes: Dict[str, np.ndarray], ticks_per_beat: int, spec: Dict[str, Any], seed: int = 0):
+    """Run a compiled spec: pitch first, then timing, then velocity."""
+    tonal = notes["channel"] != DRUM_CHANNEL  # drum notes are sounds, not pitches
+    if spec.get("transpose"):
+        transpose(notes, int(spec["transpose"]), tonal)
+    if spec.get("to_key"):
+        change_key(notes, spec["to_key"], tonal)
+    if spec.get("scale"):
+        snap_to_scale(notes, spec["scale"], tonal)
+
+    if spec.get("quantize"):
+        quantize(notes, spec["quantize"] * ticks_per_beat, float(spec.get("strength", 1.0)))
+    if spec.get("swing") is not None:
+        grid = spec.get("quantize") or parse_grid("1/16")  # swings the quantize grid, 16ths by default
+        apply_groove(notes, grid * ticks_per_beat, (0.0, 2 * float(spec["swing"]) / 100 - 1), (1.0,))
+    if spec.get("groove"):
+        groove = GROOVES[spec["groove"]]
+        apply_groove(notes, parse_grid(groove["grid"]) * ticks_per_beat, groove["timing"], groove["velocity"],
+                     float(spec.get("groove_strength", 1.0)))
+    if spec.get("humanize") or spec.get("humanize_velocity"):
+        rng = np.random.default_rng([int(spec.get("seed", 0)), seed])
+        humanize(notes, ticks_per_beat, float(spec.get("humanize") or 0), float(spec.get("humanize_velocity") or 0), rng)
+
+    if spec.get("velocity_curve") is not None or spec.get("velocity_range") is not None:
+        low, high = spec.get("velocity_range") or (1, 127)
+        velocity_curve(notes, float(spec.get("velocity_curve") or 1.0), low, high)
+
+
+# -- Files -------------------------------------------------------------------
+
+def transform_file(path: str, out_path: str, spec: Dict[str, Any]) -> int:
+    """Transform one file (compiled spec); returns the number of notes written."""
+    mid = mido.MidiFile(path)
+    if mid.type == 2:
+        raise ValueError("MIDI format 2 (independent patterns) is not supported")
+    notes, others = load_notes(mid)
+    # Same file + same seed = same humanization, in any worker
+    apply_transforms(notes, mid.ticks_per_beat, spec, seed=zlib.crc32(os.path.basename(path).encode("utf-8")))
+    build_tracks(mid, notes, others)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    mid.save(out_path)
+    return len(notes["start"])
+
+
+def _transform_job(job: Tuple[str, str, Dict[str, Any]]) -> Tuple[str, Optional[int], Optional[str]]:
+    path, out_path, spec = job
+    try:
+        return path, transform_file(path, out_path, spec), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def collect_jobs(paths: List[str], out_dir: Optional[str]) -> List[Tuple[str, str]]:
+    """(input, output) pairs; folders are walked, keeping their layout under the output folder."""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            target = out_dir or os.path.join(path, OUTPUT_FOLDER)
+            for root, dirs, files in os.walk(path):
+                # Earlier outputs are not inputs
+                dirs[:] = [d for d in dirs if d != OUTPUT_FOLDER
+                           and os.path.abspath(os.path.join(root, d)) != os.path.abspath(target)]
+                for name in sorted(files):
+                    if name.lower().endswith(MIDI_EXTENSIONS):
+                        source = os.path.join(root, name)
+                        jobs.append((source, os.path.join(target, os.path.relpath(source, path))))
+        elif os.path.isfile(path):
+            target = out_dir or os.path.join(os.path.dirname(path), OUTPUT_FOLDER)
+            jobs.append((path, os.path.join(target, os.path.basename(path))))
+        else:
+            raise FileNotFoundError(f"MIDI file or folder not found: {path}")
+    return jobs
+
+
+def transform_files(paths: List[str], spec: Dict[str, Any], out_dir: Optional[str] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Transform files and folders in parallel; returns counts and failures."""
+    compiled = compile_spec(spec)
+    if not any(v is not None and v != "" for v in compiled.values()):
+        raise ValueError("No transforms given")
+    jobs = [(source, target, compiled) for source, target in collect_jobs(paths, out_dir)]
+    if workers is not None:
+        workers = max(1, min(int(workers), os.cpu_count() or 1))
+    started = time.time()
+    if len(jobs) < INLINE_FILES or workers == 1:
+        results = [_transform_job(job) for job in jobs]
+    else:
+        # Spawned, not forked: the server calls this from a tpool thread of a process full of threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            chunk = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+            results = list(pool.map(_transform_job, jobs, chunksize=chunk))
+
+    failed = [{"file": path, "error": error} for path, _, error in results if error]
+    return {
+        "files": len(jobs),
+        "written": len(jobs) - len(failed),
+        "notes": sum(count for _, count, _ in results if count),
+        "failed": failed,
+        "output": sorted({os.path.dirname(target) for _, target, _ in jobs})[:5],
+        "seconds": round(time.time() - started, 2),
+    }
+
+
+def summarize(result: Dict[str, Any]) -> str:
+    lines = [f"Transformed {result['written']}/{result['files']} MIDI files ({result['notes']} notes) "
+             f"in {result['seconds']}s"]
+    if result["output"]:
+        lines.append(f"Output: {', '.join(result['output'])}")
+    for failure in result["failed"][:5]:
+        lines.append(f"Failed {os.path.basename(failure['file'])}: {failure['error']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Quantize, groove, humanize, transpose MIDI files in bulk")
+    parser.add_argument("paths", nargs="+", help=".mid files or folders")
+    parser.add_argument("--out", help=f"output folder (default: '{OUTPUT_FOLDER}' next to the input)")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--transpose", type=int, help="semitones")
+    parser.add_argument("--to-key", help="e.g. 'D minor' (detects the current key)")
+    parser.add_argument("--scale", help="snap pitches to a scale, e.g. 'C minor pentatonic'")
+    parser.add_argument("--quantize", help="grid, e.g. 1/16 or 1/8t")
+    parser.add_argument("--strength", type=float, help="quantize strength 0..1")
+    parser.add_argument("--swing", type=float, help="swing percent, 50 = straight")
+    parser.add_argument("--groove", choices=sorted(GROOVES))
+    parser.add_argument("--groove-strength", type=float)
+    parser.add_argument("--humanize", type=float, help="timing jitter in beats, e.g. 0.02")
+    parser.add_argument("--humanize-velocity", type=float, help="velocity jitter, e.g. 8")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--velocity-curve", type=float, help="gamma, < 1 lifts quiet notes")
+    parser.add_argument("--velocity-range", type=int, nargs=2, metavar=("LOW", "HIGH"))
+    args = vars(parser.parse_args())
+
+    options = {k: args.pop(k) for k in ("paths", "out", "workers")}
+    transforms = {k: v for k, v in args.items() if v is not None}
+    print(summarize(transform_files(options["paths"], transforms, options["out"], options["workers"])))
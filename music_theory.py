@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Music theory engine for Profesor Ableton
+Lookup tables for note names/MIDI numbers, every scale and mode in every
+key, chord spellings with inversions and chord recognition from pitch sets,
+all built once at import. answer() handles theory questions locally, so
+they never reach a paid provider.
+"""
+
+import math
+import re
+from typing import Optional, Dict, List, Tuple
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+LETTERS = "CDEFGAB"
+NATURAL = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+ACCIDENTALS = {"bb": -2, "b": -1, "": 0, "#": 1, "##": 2}
+ACCIDENTAL_NAMES = {v: k for k, v in ACCIDENTALS.items()}
+MAJOR_STEPS = (0, 2, 4, 5, 7, 9, 11)
+ROOTS = ["C", "C#", "Db", "D", "D#", "Eb", "E", "F", "F#", "Gb", "G", "G#", "Ab", "A", "A#", "Bb", "B"]
+FLAT_ROOTS = {"Bb", "Eb", "Ab", "Db"}  # recognized chords on these roots are named with flats
+
+# Scales and modes as degrees relative to the major scale; spelling follows from the degrees
+SCALE_DEGREES = {
+    "major": "1 2 3 4 5 6 7",
+    "minor": "1 2 b3 4 5 b6 b7",
+    "dorian": "1 2 b3 4 5 6 b7",
+    "phrygian": "1 b2 b3 4 5 b6 b7",
+    "lydian": "1 2 3 #4 5 6 7",
+    "mixolydian": "1 2 3 4 5 6 b7",
+    "locrian": "1 b2 b3 4 b5 b6 b7",
+    "harmonic minor": "1 2 b3 4 5 b6 7",
+    "melodic minor": "1 2 b3 4 5 6 7",
+    "phrygian dominant": "1 b2 3 4 5 b6 b7",
+    "major pentatonic": "1 2 3 5 6",
+    "minor pentatonic": "1 b3 4 5 b7",
+    "blues": "1 b3 4 b5 5 b7",
+    "whole tone": "1 2 3 #4 #5 b7",
+    "diminished": "1 2 b3 4 b5 b6 6 7",
+}
+SCALE_ALIASES = {
+    "ionian": "major", "aeolian": "minor", "natural minor": "minor",
+    "pentatonic major": "major pentatonic", "pentatonic minor": "minor pentatonic",
+    "pentatonic": "major pentatonic", "minor blues": "blues",
+}
+
+# Chord symbol suffix -> (long name, degrees)
+CHORDS = {
+    "": ("major", "1 3 5"),
+    "m": ("minor", "1 b3 5"),
+    "dim": ("diminished", "1 b3 b5"),
+    "aug": ("augmented", "1 3 #5"),
+    "sus2": ("suspended 2nd", "1 2 5"),
+    "sus4": ("suspended 4th", "1 4 5"),
+    "5": ("power chord", "1 5"),
+    "6": ("major sixth", "1 3 5 6"),
+    "m6": ("minor sixth", "1 b3 5 6"),
+    "7": ("dominant seventh", "1 3 5 b7"),
+    "maj7": ("major seventh", "1 3 5 7"),
+    "m7": ("minor seventh", "1 b3 5 b7"),
+    "mMaj7": ("minor major seventh", "1 b3 5 7"),
+    "m7b5": ("half-diminished seventh", "1 b3 b5 b7"),
+    "dim7": ("diminished seventh", "1 b3 b5 bb7"),
+    "aug7": ("augmented seventh", "1 3 #5 b7"),
+    "7sus4": ("dominant seventh suspended 4th", "1 4 5 b7"),
+    "add9": ("added ninth", "1 3 5 9"),
+    "madd9": ("minor added ninth", "1 b3 5 9"),
+    "9": ("dominant ninth", "1 3 5 b7 9"),
+    "maj9": ("major ninth", "1 3 5 7 9"),
+    "m9": ("minor ninth", "1 b3 5 b7 9"),
+}
+CHORD_ALIASES = {"maj": "", "M": "", "min": "m", "-": "m", "°": "dim", "+": "aug", "M7": "maj7", "Δ7": "maj7",
+                 "min7": "m7", "-7": "m7", "ø": "m7b5", "ø7": "m7b5", "°7": "dim7", "sus": "sus4", "dom7": "7"}
+CHORD_BY_NAME = {name: suffix for suffix, (name, _) in CHORDS.items()}
+CHORD_BY_NAME.update({"major triad": "", "minor triad": "m", "seventh": "7", "dominant 7th": "7",
+                      "major 7th": "maj7", "minor 7th": "m7", "diminished 7th": "dim7", "half diminished": "m7b5"})
+INVERSIONS = ["root position", "first inversion", "second inversion", "third inversion", "fourth inversion"]
+
+
+def _degree(degree: str) -> Tuple[int, int]:
+    """'b3' -> (letter steps 2, semitones 3)."""
+    accidental, number = re.fullmatch(r"(bb|b|##|#)?(\d+)", degree).groups()
+    steps = int(number) - 1
+    accidental = accidental or ""
+    return steps, MAJOR_STEPS[steps % 7] + 12 * (steps // 7) + ACCIDENTALS[accidental]
+
+
+def _spell(root: str, steps: int, semitones: int) -> str:
+    """Note `steps` letters and `semitones` above `root`, e.g. ('F#', 2, 3) -> 'A'."""
+    letter = LETTERS[(LETTERS.index(root[0]) + steps) % 7]
+    pitch = (NATURAL[root[0]] + ACCIDENTALS[root[1:]] + semitones) % 12
+    offset = (pitch - NATURAL[letter] + 6) % 12 - 6
+    return letter + ACCIDENTAL_NAMES.get(offset, "")
+
+
+def _intervals(degrees: str) -> Tuple[int, ...]:
+    return tuple(_degree(d)[1] for d in degrees.split())
+
+
+def pitch_class(name: str) -> int:
+    return (NATURAL[name[0]] + ACCIDENTALS[name[1:]]) % 12
+
+
+SCALES: Dict[str, Tuple[int, ...]] = {name: _intervals(degrees) for name, degrees in SCALE_DEGREES.items()}
+SCALE_SPELLINGS: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    (root, scale): tuple(_spell(root, *_degree(d)) for d in degrees.split())
+    for root in ROOTS for scale, degrees in SCALE_DEGREES.items()
+}
+CHORD_SPELLINGS: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    (root, suffix): tuple(_spell(root, *_degree(d)) for d in degrees.split())
+    for root in ROOTS for suffix, (_, degrees) in CHORDS.items()
+}
+
+
+def _mask(pitch_classes) -> int:
+    mask = 0
+    for pc in pitch_classes:
+        mask |= 1 << (pc % 12)
+    return mask
+
+
+# Pitch-class set (12-bit mask) -> every (root pc, chord suffix) with exactly those notes
+CHORD_BY_MASK: Dict[int, List[Tuple[int, str]]] = {}
+for _suffix, (_, _degrees) in CHORDS.items():
+    for _root in range(12):
+        CHORD_BY_MASK.setdefault(_mask(_root + i for i in _intervals(_degrees)), []).append((_root, _suffix))
+
+MIDI_NAMES = [f"{NOTE_NAMES[n % 12]}{n // 12 - 1}" for n in range(128)]
+MIDI_FREQUENCIES = [440.0 * 2 ** ((n - 69) / 12) for n in range(128)]
+NAME_TO_MIDI: Dict[str, int] = {f"{root}{octave}": (octave + 1) * 12 + pitch_class(root)
+                                for root in ROOTS + ["Cb", "B#", "E#", "Fb"] for octave in range(-1, 10)
+                                if 0 <= (octave + 1) * 12 + pitch_class(root) <= 127}
+
+
+def note_name(pitch: int) -> str:
+    """MIDI note number to name, e.g. 60 -> C4."""
+    return f"{NOTE_NAMES[pitch % 12]}{pitch // 12 - 1}"
+
+
+def normalize_root(name: str) -> str:
+    name = name.replace("♯", "#").replace("♭", "b")
+    return name[:1].upper() + name[1:].lower()
+
+
+def _preferred(pc: int, flats: bool = False) -> str:
+    sharp = NOTE_NAMES[pc]
+    if flats and len(sharp) == 2:
+        return LETTERS[(LETTERS.index(sharp[0]) + 1) % 7] + "b"
+    return sharp
+
+
+def parse_key(name: str) -> Tuple[int, str]:
+    """'D minor' -> (2, 'minor'); the scale defaults to major."""
+    parts = name.strip().split(None, 1)
+    if not parts:
+        raise ValueError("Empty key name")
+    root = normalize_root(parts[0])
+    if root[:1] not in NATURAL or root[1:] not in ACCIDENTALS:
+        raise ValueError(f"Unknown key root: {parts[0]}")
+    scale = parts[1].strip().lower() if len(parts) > 1 else "major"
+    scale = SCALE_ALIASES.get(scale, scale)
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale: {scale} (try {', '.join(SCALES)})")
+    return pitch_class(root), scale
+
+
+def scale_notes(root: str, scale: str) -> Tuple[str, ...]:
+    root, scale = normalize_root(root), SCALE_ALIASES.get(scale.lower(), scale.lower())
+    if (root, scale) not in SCALE_SPELLINGS:
+        # Rare spellings (E#, Cb...) go through their common enharmonic
+        root = _preferred(pitch_class(root), flats="b" in root)
+    return SCALE_SPELLINGS[(root, scale)]
+
+
+def chord_notes(root: str, suffix: str) -> Tuple[str, ...]:
+    root, suffix = normalize_root(root), CHORD_ALIASES.get(suffix, suffix)
+    if (root, suffix) not in CHORD_SPELLINGS:
+        root = _preferred(pitch_class(root), flats="b" in root)
+    return CHORD_SPELLINGS[(root, suffix)]
+
+
+def identify_chord(pitches: List[int]) -> List[Dict[str, str]]:
+    """Chords with exactly these pitch classes; the lowest pitch decides the inversion (MIDI numbers)."""
+    if not pitches:
+        return []
+    bass = min(pitches) % 12
+    matches = []
+    for root, suffix in CHORD_BY_MASK.get(_mask(pitches), []):
+        name = _preferred(root, _preferred(root, True) in FLAT_ROOTS)
+        notes = CHORD_SPELLINGS[(name, suffix)]
+        position = [pitch_class(n) for n in notes].index(bass)
+        # Slash bass in its plain spelling (Ebdim7/D, not /Dbb)
+        symbol = f"{name}{suffix}" + (f"/{_preferred(bass, '#' not in name)}" if position else "")
+        matches.append({"symbol": symbol, "name": f"{name} {CHORDS[suffix][0]}",
+                        "inversion": INVERSIONS[position], "notes": " ".join(notes)})
+    # Root position first, then simpler chords
+    matches.sort(key=lambda m: (m["inversion"] != "root position", len(m["symbol"])))
+    return matches
+
+
+def describe_notes(pitches: List[int]) -> str:
+    """MIDI numbers -> names and frequencies, plus the chord they form (explain_midi)."""
+    lines = [f"{p} = {MIDI_NAMES[p]} ({MIDI_FREQUENCIES[p]:.2f} Hz)" for p in pitches if 0 <= p <= 127]
+    if len(set(p % 12 for p in pitches)) >= 2:
+        chords = identify_chord(pitches)
+        if chords:
+            best = chords[0]
+            lines.append(f"Together: {best['symbol']} ({best['name']}, {best['inversion']})")
+    return "\n".join(lines)
+
+
+# -- Questions -----------------------------------------------------------------
+
+ROOT = r"([A-Ga-g](?:##|bb|#|b)?)"
+SCALE_NAMES = "|".join(sorted((re.escape(n) for n in list(SCALES) + list(SCALE_ALIASES)), key=len, reverse=True))
+SCALE_QUERY = re.compile(rf"(?<![\w#]){ROOT}\s+({SCALE_NAMES})\b(?!\s+(?:chord|triad))(\s+(?:scale|mode|key)\b)?",
+                         re.IGNORECASE)
+SCALE_TRIGGER = re.compile(r"\b(notes?|scales?|modes?|spell|degrees)\b", re.IGNORECASE)
+CHORD_TRIGGER = re.compile(r"\b(notes?|spell|what|which|play|inversions?|voicing|intervals?)\b", re.IGNORECASE)
+# Nothing but the scale (or chord) itself: "F# dorian?", "what is the G mixolydian"
+BARE_QUESTION = re.compile(r"[\W_]*(?:what(?:'s|\s+is|\s+are)?(?:\s+the|\s+an?)?)?[\W_]*", re.IGNORECASE)
+CHORD_SUFFIXES = "|".join(sorted((re.escape(s) for s in list(CHORDS) + list(CHORD_ALIASES) if s), key=len, reverse=True))
+CHORD_SYMBOL = re.compile(rf"(?<![\w#/])([A-G](?:#|b)?)({CHORD_SUFFIXES})?(?:/([A-G](?:#|b)?))?(?:\s+(chord|triad))?"
+                          r"(?![\w#+°/-])")
+CHORD_LONG = re.compile(rf"(?<![\w#]){ROOT}\s+({'|'.join(sorted(map(re.escape, CHORD_BY_NAME), key=len, reverse=True))})"
+                        r"\s+(?:chord|triad)", re.IGNORECASE)
+INVERSION_QUERY = re.compile(r"\b(first|second|third|1st|2nd|3rd)\s+inversion", re.IGNORECASE)
+IDENTIFY_QUERY = re.compile(r"\b(what|which|name|identify)\b.*\bchord\b", re.IGNORECASE)
+MIDI_NUMBERS = re.compile(r"(?<![\w.])(\d{1,3})(?![\w.])")
+NOTE_LIST = re.compile(r"(?<![\w#])([A-G](?:#|b|♯|♭)?)(-?\d)?(?![\w#])")
+MIDI_QUERY = re.compile(r"\bmidi\s+(note|number|pitch)|\bnote\s+number|\bwhat\s+note\b", re.IGNORECASE)
+FREQUENCY_QUERY = re.compile(r"\b(frequency|hz|hertz)\b", re.IGNORECASE)
+HERTZ = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)\s*(hz|hertz|khz)\b", re.IGNORECASE)
+CHORD_WORD = re.compile(r"\bchords?\b", re.IGNORECASE)
+# Harmony advice ("what should come after Am?") needs a provider, not a chord spelling
+ADVICE_QUERY = re.compile(r"\b(should|after|progressions?|next)\b", re.IGNORECASE)
+NOTE_WITH_OCTAVE = re.compile(r"(?<![\w#])([A-G](?:#|b|♯|♭)?-?\d)(?![\w#])")
+ORDINALS = {"first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3}
+
+
+def _answer_identify(question: str) -> Optional[str]:
+    tail = question.split("chord", 1)[-1] if "chord" in question.lower() else question
+    numbers = [int(n) for n in MIDI_NUMBERS.findall(tail) if int(n) <= 127]
+    if len(numbers) >= 2:
+        pitches = numbers
+        listed = "-".join(str(n) for n in numbers)
+    else:
+        names = NOTE_LIST.findall(tail)
+        if len(names) < 2:
+            return None
+        # Without octaves, notes are stacked upward from the first one
+        pitches, previous = [], -1
+        for name, octave in names:
+            pc = pitch_class(normalize_root(name))
+            pitch = NAME_TO_MIDI.get(f"{normalize_root(name)}{octave}") if octave else None
+            if pitch is None:
+                pitch = pc + 60
+                while pitch <= previous:
+                    pitch += 12
+            pitches.append(pitch)
+            previous = pitch
+        listed = " ".join(normalize_root(n) + o for n, o in names)
+    chords = identify_chord(pitches)
+    if not chords:
+        return f"{listed} ({' '.join(MIDI_NAMES[p] for p in pitches)}) is not a standard chord I know."
+    best, others = chords[0], chords[1:]
+    answer = f"{listed} = {best['notes']}: {best['symbol']} ({best['name']}, {best['inversion']})"
+    if others:
+        answer += "\nAlso readable as: " + ", ".join(f"{c['symbol']} ({c['name']})" for c in others)
+    return answer
+
+
+def _answer_chord(root: str, suffix: str, question: str, bass: Optional[str] = None) -> str:
+    notes = chord_notes(root, suffix)
+    suffix = CHORD_ALIASES.get(suffix, suffix)
+    name, degrees = CHORDS[suffix]
+    symbol = f"{normalize_root(root)}{suffix}"
+    if bass:
+        bass = normalize_root(bass)
+        classes = [pitch_class(n) for n in notes]
+        if pitch_class(bass) in classes:
+            n = classes.index(pitch_class(bass))
+            voiced = notes[n:] + notes[:n]
+            return f"{symbol}/{bass} ({normalize_root(root)} {name}, {INVERSIONS[n]}): {' '.join(voiced)}"
+        return f"{symbol}/{bass} ({normalize_root(root)} {name} over {bass} in the bass): {bass} {' '.join(notes)}"
+    answer = f"{symbol} ({normalize_root(root)} {name}): {' '.join(notes)} - intervals {degrees}"
+    inversion = INVERSION_QUERY.search(question)
+    if inversion:
+        n = ORDINALS[inversion.group(1).lower()]
+        if n < len(notes):
+            voiced = notes[n:] + notes[:n]
+            return f"{symbol} {INVERSIONS[n]}: {' '.join(voiced)} ({voiced[0]} in the bass, written {symbol}/{voiced[0]})"
+    if len(notes) > 2:
+        answer += "\nInversions: " + ", ".join(
+            f"{INVERSIONS[i].split()[0]} {' '.join(notes[i:] + notes[:i])}" for i in range(1, len(notes)))
+    return answer
+
+
+def _answer_midi(question: str) -> Optional[str]:
+    named = NOTE_WITH_OCTAVE.findall(question)
+    if named:
+        key = normalize_root(re.match(r"[A-Ga-g](?:#|b|♯|♭)?", named[0]).group()) + re.search(r"-?\d$", named[0]).group()
+        pitch = NAME_TO_MIDI.get(key)
+        if pitch is not None:
+            return (f"{key} = MIDI note {pitch}, {MIDI_FREQUENCIES[pitch]:.2f} Hz "
+                    f"(Ableton shows it as {NOTE_NAMES[pitch % 12]}{pitch // 12 - 2})")
+    hertz = HERTZ.search(question)
+    if hertz:
+        # A frequency, not a note number: "my kick is 50 hz" -> nearest note
+        frequency = float(hertz.group(1)) * (1000 if hertz.group(2).lower() == "khz" else 1)
+        if not MIDI_QUERY.search(question) or frequency <= 0:
+            return None
+        exact = 69 + 12 * math.log2(frequency / 440.0)
+        pitch = int(round(exact))
+        if not 0 <= pitch <= 127:
+            return None
+        cents = int(round((exact - pitch) * 100))
+        return (f"{frequency:g} Hz is closest to {MIDI_NAMES[pitch]} (MIDI note {pitch}, {MIDI_FREQUENCIES[pitch]:.2f} Hz"
+                f"{f', {cents:+d} cents' if cents else ''}; Ableton shows it as {NOTE_NAMES[pitch % 12]}{pitch // 12 - 2})")
+    numbers = [int(n) for n in MIDI_NUMBERS.findall(question) if int(n) <= 127]
+    if len(numbers) == 1 and MIDI_QUERY.search(question):
+        pitch = numbers[0]
+        middle = " - middle C" if pitch == 60 else ""
+        return (f"MIDI note {pitch} = {MIDI_NAMES[pitch]}{middle}, {MIDI_FREQUENCIES[pitch]:.2f} Hz "
+                f"(Ableton shows it as {NOTE_NAMES[pitch % 12]}{pitch // 12 - 2})")
+    return None
+
+
+def answer(question: str) -> Optional[str]:
+    """Exact answer to a recognizable theory question, None for anything else."""
+    text = question.replace("♯", "#").replace("♭", "b")
+    if ADVICE_QUERY.search(text):
+        return None
+
+    if IDENTIFY_QUERY.search(text) and not CHORD_LONG.search(text):
+        identified = _answer_identify(text)
+        if identified:
+            return identified
+
+    long_form = CHORD_LONG.search(text)
+    if long_form:
+        return _answer_chord(long_form.group(1), CHORD_BY_NAME[long_form.group(2).lower()], text)
+
+    for scale in SCALE_QUERY.finditer(text):
+        root, name = scale.group(1), SCALE_ALIASES.get(scale.group(2).lower(), scale.group(2).lower())
+        # Lowercase roots only count when unambiguous: "a minor scale", "f# dorian" - not "a minor problem"
+        if root[0].islower() and name in ("major", "minor") and not scale.group(3):
+            continue
+        if SCALE_TRIGGER.search(text) or BARE_QUESTION.fullmatch(text[:scale.start()] + text[scale.end():]):
+            notes = scale_notes(root, name)
+            return f"{normalize_root(root)} {name}: {' '.join(notes)} - degrees {SCALE_DEGREES[name]}"
+
+    for symbol in CHORD_SYMBOL.finditer(text):
+        root, suffix, bass, word = symbol.group(1), symbol.group(2) or "", symbol.group(3), symbol.group(4)
+        # A bare capital letter is only a chord when the question says so; so is a bare slash ("the A/B button")
+        if not (suffix or bass or word) or (bass and not suffix and not word and not CHORD_WORD.search(text)):
+            continue
+        if CHORD_TRIGGER.search(text) or BARE_QUESTION.fullmatch(text[:symbol.start()] + text[symbol.end():]):
+            return _answer_chord(root, suffix, text, bass)
+
+    if MIDI_QUERY.search(text) or FREQUENCY_QUERY.search(text):
+        return _answer_midi(text)
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for q in sys.argv[1:] or ["What notes are in F# dorian?", "what chord is 62-65-69", "Spell Bbm7",
+                              "What is the second inversion of C major chord?", "what midi number is A4",
+                              "which chord is E G C", "notes of the Eb harmonic minor scale"]:
+        started = time.perf_counter()
+        result = answer(q)
+        print(f"{q}\n  {result}  [{(time.perf_counter() - started) * 1e6:.0f} us]")
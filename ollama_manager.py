@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Ollama model lifecycle for Profesor Ableton
+Preloads and warms the configured model, keeps it resident while it is used,
+unloads it under memory pressure and decides per request whether there is
+enough free RAM to run it at all (or only a smaller model)
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Dict
+
+import psutil
+import requests
+
+MB = 1024 * 1024
+CHECK_INTERVAL = 5.0
+
+
+class OllamaManager:
+    """Tracks which Ollama models are resident and admits requests by available RAM."""
+
+    def __init__(self, base_url: str, model: str):
+        self.base_url = base_url
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self.configure(model)
+
+    def configure(self, model: str):
+        """(Re)read settings from the environment; also used on config reload."""
+        self.model = model
+        self.small_model = os.getenv("OLLAMA_SMALL_MODEL", "")
+        self.memory_save = os.getenv("MEMORY_SAVE_MODE") == "true"
+        # Ollama unloads a model by itself after this much idle time; 0 = right after each answer
+        self.keep_alive = "0" if self.memory_save else os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+        self.min_free = int(os.getenv("OLLAMA_MIN_FREE_MB", "2048")) * MB
+
+    def _post(self, payload: dict, timeout: float) -> bool:
+        try:
+            response = requests.post(f"{self.base_url}/api/generate", json=payload, timeout=timeout)
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def resident(self) -> Dict[str, int]:
+        """Models currently loaded by Ollama -> bytes they occupy."""
+        try:
+            response = requests.get(f"{self.base_url}/api/ps", timeout=1)
+            return {m["name"]: m.get("size", 0) for m in response.json().get("models", [])}
+        except (requests.exceptions.RequestException, ValueError):
+            return {}
+
+    def model_size(self, model: str) -> int:
+        """Approximate RAM a model needs when loaded (its size on disk), 0 if unknown."""
+        with self._lock:
+            if model in self._sizes:
+                return self._sizes[model]
+        try:
+            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            sizes = {m["name"]: m.get("size", 0) for m in response.json().get("models", [])}
+        except (requests.exceptions.RequestException, ValueError):
+            return 0
+        with self._lock:
+            self._sizes.update(sizes)
+            return self._sizes.get(model, 0)
+
+    def admit(self) -> Optional[str]:
+        """Model to use for the next request, or None when RAM is too low for Ollama."""
+        available = psutil.virtual_memory().available
+        resident = self.resident()
+        for model in (self.model, self.small_model):
+            if not model:
+                continue
+            need = 0 if model in resident else self.model_size(model)
+            if available - need >= self.min_free:
+                if model != self.model:
+                    print(f">> Low memory: using smaller Ollama model {model}")
+                return model
+        print(f">> Low memory ({available // MB} MB free): skipping Ollama")
+        return None
+
+    def preload(self):
+        """Load and warm the model so the first question skips the model load."""
+        model = self.admit()
+        if model is None:
+            return
+        print(f">> Preloading Ollama model {model}...")
+        started = time.time()
+        # One generated token also warms the runner, not just the weights
+        if self._post({"model": model, "prompt": "Hi", "keep_alive": self.keep_alive,
+                       "options": {"num_predict": 1}}, timeout=300):
+            print(f"OK Ollama model {model} ready in {time.time() - started:.1f}s")
+        else:
+            print(f">> Could not preload {model} - is 'ollama serve' running?")
+
+    def unload(self, model: str):
+        """Ask Ollama to drop a model from memory now."""
+        if self._post({"model": model, "keep_alive": 0}, timeout=10):
+            print(f">> Unloaded Ollama model {model}")
+
+    def _watch(self):
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            if psutil.virtual_memory().available >= self.min_free:
+                continue
+            for model in self.resident():
+                if model in (self.model, self.small_model):
+                    print(">> Memory pressure: giving RAM back to Ableton")
+                    self.unload(model)
+
+    def start(self):
+        """Preload (unless in memory save mode) and start the memory-pressure watcher."""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        if not self.memory_save:
+            threading.Thread(target=self.preload, daemon=True).start()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+OSC control bridge from Profesor Ableton to Ableton Live
+Sends AbletonOSC-style messages over a single UDP socket; a background
+sender thread batches queued messages into OSC bundles
+"""
+
+import os
+import queue
+import socket
+import threading
+from typing import Optional, Any, List, Tuple
+
+from pythonosc import osc_bundle_builder, osc_message_builder  # type: ignore
+
+# Keep datagrams well under typical MTU-fragmentation limits
+MAX_DATAGRAM_SIZE = 8192
+
+
+class AbletonOSCBridge:
+    """Non-blocking OSC sender for AbletonOSC (https://github.com/ideoforms/AbletonOSC)."""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
+        self.host = host or os.getenv("ABLETON_OSC_HOST", "127.0.0.1")
+        self.port = port or int(os.getenv("ABLETON_OSC_PORT", "11000"))
+        # 0 = only bundle what is already queued; >0 waits that long for more messages
+        self.batch_window = float(os.getenv("OSC_BATCH_WINDOW_MS", "0")) / 1000
+        self.max_batch = int(os.getenv("OSC_MAX_BATCH", "64"))
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._queue: "queue.Queue[Optional[Tuple[str, Tuple[Any, ...]]]]" = queue.Queue(
+            maxsize=int(os.getenv("OSC_QUEUE_SIZE", "1024")))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False  # stop() closes the socket for good
+
+        # Counters for diagnostics
+        self.sent_messages = 0
+        self.sent_packets = 0
+        self.dropped_messages = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background sender thread (idempotent)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("OSC bridge was stopped")
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="osc-sender", daemon=True)
+            self._thread.start()
+            print(f"OK OSC bridge sending to {self.host}:{self.port}")
+
+    def stop(self, timeout: float = 1.0):
+        """Flush queued messages and stop the sender thread; later sends are refused."""
+        with self._lock:
+            self._closed = True
+        if self.running:
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._socket.close()
+
+    def send(self, address: str, *args: Any) -> bool:
+        """Queue one OSC message. Never blocks; returns False if the queue is full or the bridge was stopped."""
+        if self._closed:
+            self.dropped_messages += 1
+            return False
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait((address, args))
+            return True
+        except queue.Full:
+            self.dropped_messages += 1
+            print(f"ERROR OSC queue full - dropped {address}")
+            return False
+
+    def send_many(self, messages: List[Tuple[str, Tuple[Any, ...]]]) -> bool:
+        """Queue several messages; they are sent in order, usually as one bundle."""
+        return all([self.send(address, *args) for address, args in messages])
+
+    # -- AbletonOSC actions -------------------------------------------------
+
+    def create_track(self, kind: str = "audio", index: int = -1, name: Optional[str] = None,
+                     track_count: Optional[int] = None) -> bool:
+        """Create an audio or MIDI track; the name is only set when the new track's index is known.
+
+        Appending (index -1) puts the track at `track_count`, the number of tracks before it.
+        """
+        if kind not in ("audio", "midi"):
+            raise ValueError(f"Unknown track type: {kind}")
+        messages = [(f"/live/song/create_{kind}_track", (int(index),))]
+        target = int(index) if index >= 0 else track_count
+        if name and target is not None:
+            messages.append(("/live/track/set/name", (int(target), str(name))))
+        return self.send_many(messages)
+
+    def set_tempo(self, bpm: float) -> bool:
+        """Set song tempo in BPM."""
+        bpm = float(bpm)
+        if not 20.0 <= bpm <= 999.0:
+            raise ValueError(f"Tempo out of range (20-999 BPM): {bpm}")
+        return self.send("/live/song/set/tempo", bpm)
+
+    def fire_clip(self, track: int, clip: int) -> bool:
+        """Launch the clip slot at (track, scene)."""
+        return self.send("/live/clip_slot/fire", int(track), int(clip))
+
+    def set_device_parameter(self, track: int, device: int, parameter: int, value: float) -> bool:
+        """Set a device parameter value."""
+        return self.send("/live/device/set/parameter/value", int(track), int(device), int(parameter), float(value))
+
+    # -- Sender thread ------------------------------------------------------
+
+    def _run(self):
+        """Drain the queue, bundling whatever arrived together."""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    if self.batch_window > 0:
+                        item = self._queue.get(timeout=self.batch_window)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Tuple[Any, ...]]]):
+        """Send a batch as plain messages or size-limited bundles, preserving order."""
+        messages = []
+        for address, args in batch:
+            try:
+                builder = osc_message_builder.OscMessageBuilder(address=address)
+                for arg in args:
+                    builder.add_arg(arg)
+                messages.append(builder.build())
+            except Exception as e:
+                print(f"ERROR OSC message {address} could not be built: {e}")
+
+        start = 0
+        while start < len(messages):
+            size = 16  # "#bundle\0" + timetag
+            end = start
+            while end < len(messages) and (end == start or size + 4 + messages[end].size <= MAX_DATAGRAM_SIZE):
+                size += 4 + messages[end].size
+                end += 1
+            if end - start == 1:
+                dgram = messages[start].dgram
+            else:
+                bundle = osc_bundle_builder.OscBundleBuilder(osc_bundle_builder.IMMEDIATELY)
+                for message in messages[start:end]:
+                    bundle.add_content(message)
+                dgram = bundle.build().dgram
+            try:
+                self._socket.sendto(dgram, (self.host, self.port))
+                self.sent_packets += 1
+                self.sent_messages += end - start
+            except OSError as e:
+                print(f"ERROR OSC send failed: {e}")
+            start = end
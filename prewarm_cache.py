@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pre-generate answers for Profesor Ableton
+Reads a question file (one question per line, # for comments) and answers
+the questions concurrently with the configured providers, each within its
+own requests-per-minute limit, writing into the server's answer store.
+Questions already in the store are skipped, so an interrupted run simply
+continues when started again.
+
+    python prewarm_cache.py questions.txt --workers 6 --rpm groq=30 --rpm claude=50
+"""
+
+import argparse
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from dotenv import find_dotenv, load_dotenv
+
+from ai_provider import AIProvider
+from answer_store import question_key
+from question_classifier import classify
+
+ai: AIProvider  # built in main(), after .env is loaded
+
+# Free/entry tier limits; override with --rpm provider=N (0 = no limit)
+DEFAULT_RPM = {"ollama": 0, "groq": 30, "grok": 60, "claude": 50, "openai": 60}
+LABELS = {"ollama": "Ollama", "grok": "Grok", "groq": "Groq", "claude": "Claude", "openai": "OpenAI"}
+FAILURE_PAUSE = 20.0  # a provider that failed (rate limit, outage) is rested this long
+BUILTIN_QUESTIONS = [
+    # The GUI's quick question buttons
+    "What is EQ?", "How to use compressor?", "Explain reverb", "Tempo automation",
+    # Topics covered by the offline answers
+    "How do I open arrangement view?", "How to use EQ in Ableton?", "What is session view?",
+    "How to use delay?", "What is MIDI?",
+]
+
+
+class RateLimiter:
+    """Spaces one provider's requests to stay under its requests-per-minute limit."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.next_free = 0.0
+        self.lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        return max(0.0, self.next_free - time.monotonic())
+
+    def reserve(self) -> float:
+        """Claim the next slot; returns how long to sleep before using it."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + self.interval
+            return start - now
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.next_free = max(self.next_free, time.monotonic() + seconds)
+
+
+def read_questions(paths: List[str], builtin: bool) -> List[str]:
+    questions = list(BUILTIN_QUESTIONS) if builtin else []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            questions.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith("#"))
+    # Same question in other words/order is one store entry
+    unique: Dict[str, str] = {}
+    for q in questions:
+        key = question_key(q)[0]
+        if key and key not in unique:
+            unique[key] = q
+    return list(unique.values())
+
+
+class Prewarmer:
+    """Worker threads pull questions and send each to the provider free soonest."""
+
+    def __init__(self, providers: List[str], rpm: Dict[str, float], workers: int, timeout: float):
+        self.providers = providers
+        self.limiters = {p: RateLimiter(rpm.get(p, DEFAULT_RPM.get(p, 0))) for p in providers}
+        self.workers = workers
+        self.timeout = timeout
+        self.todo: "queue.Queue[str]" = queue.Queue()
+        self.stop = threading.Event()
+        self.done = 0
+        self.failed: List[str] = []
+        self.lock = threading.Lock()
+
+    def _pick(self, tried: List[str]) -> Optional[str]:
+        candidates = [p for p in self.providers if p not in tried]
+        if not candidates:
+            return None
+        # Configured order breaks ties, so the first provider gets the most work
+        return min(candidates, key=lambda p: self.limiters[p].wait_time())
+
+    def answer(self, question: str) -> Optional[str]:
+        plan = classify(question)
+        tried: List[str] = []
+        while not self.stop.is_set():
+            provider = self._pick(tried)
+            if provider is None:
+                return None
+            tried.append(provider)
+            limiter = self.limiters[provider]
+            if self.stop.wait(limiter.reserve()):
+                return None
+            answer = getattr(ai, f"ask_{provider}")(question, self.timeout, plan["max_tokens"], plan["strong"], self.stop)
+            if answer:
+                ai.answers.put(question, f">> [{LABELS[provider]}] {answer}", provider)
+                return provider
+            limiter.pause(FAILURE_PAUSE)
+        return None
+
+    def _work(self, total: int):
+        while not self.stop.is_set():
+            try:
+                question = self.todo.get_nowait()
+            except queue.Empty:
+                return
+            provider = self.answer(question)
+            with self.lock:
+                if provider:
+                    self.done += 1
+                    print(f"OK [{self.done}/{total}] {provider}: {question}")
+                elif not self.stop.is_set():
+                    self.failed.append(question)
+                    print(f"ERROR No provider answered: {question}")
+
+    def run(self, questions: List[str]):
+        for q in questions:
+            self.todo.put(q)
+        threads = [threading.Thread(target=self._work, args=(len(questions),), daemon=True)
+                   for _ in range(min(self.workers, len(questions)))]
+        for t in threads:
+            t.start()
+        try:
+            while any(t.is_alive() for t in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("\n>> Interrupted - answers so far are saved, run again to continue")
+            self.stop.set()
+            for t in threads:
+                t.join(timeout=self.timeout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate answers into the Profesor Ableton answer store")
+    parser.add_argument("files", nargs="*", help="question files, one question per line")
+    parser.add_argument("--builtin", action="store_true", help="also answer the GUI quick questions and offline topics")
+    parser.add_argument("--providers", help="comma separated providers (default: AI_PROVIDERS)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests (default 4)")
+    parser.add_argument("--rpm", action="append", default=[], metavar="PROVIDER=N",
+                        help="requests per minute for a provider, 0 = unlimited")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per provider call")
+    parser.add_argument("--force", action="store_true", help="re-answer questions already in the store")
+    args = parser.parse_args()
+
+    # Same settings as the server, without starting any of it (OSC, sample index, cassette)
+    global ai
+    load_dotenv(find_dotenv())
+    ai = AIProvider()
+    if not ai.answers.enabled:
+        print("ERROR Answer store is disabled (ANSWER_CACHE_DAYS=0)")
+        return 1
+    rpm: Dict[str, float] = {}
+    for item in args.rpm:
+        name, _, value = item.partition("=")
+        try:
+            rpm[name.strip().lower()] = float(value)
+        except ValueError:
+            parser.error(f"--rpm expects PROVIDER=N, got {item!r}")
+    providers = [p.strip() for p in args.providers.split(",")] if args.providers else ai.providers
+    providers = [p for p in providers if p in LABELS]
+    if not providers:
+        print("ERROR No providers configured")
+        return 1
+
+    questions = read_questions(args.files, args.builtin)
+    if not args.force:
+        stored = ai.answers.fresh_keys()
+        skipped = len(questions)
+        questions = [q for q in questions if question_key(q)[0] not in stored]
+        skipped -= len(questions)
+        if skipped:
+            print(f">> {skipped} questions already in the store")
+    if not questions:
+        print("OK Nothing to do")
+        return 0
+
+    print(f">> Answering {len(questions)} questions with {', '.join(providers)} ({args.workers} workers)")
+    started = time.time()
+    prewarmer = Prewarmer(providers, rpm, args.workers, args.timeout)
+    prewarmer.run(questions)
+    print(f"OK {prewarmer.done} answers stored in {time.time() - started:.0f}s, "
+          f"{ai.answers.count()} in {ai.answers.path}")
+    if prewarmer.failed:
+        print(f">> {len(prewarmer.failed)} questions without an answer - run again to retry them")
+    return 0 if not prewarmer.failed and not prewarmer.stop.is_set() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
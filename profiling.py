@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling hooks for the Profesor Ableton server
+Samples a fraction of command calls with cProfile, diffs tracemalloc
+snapshots around them and watches the eventlet hub for blocking calls.
+Everything is written to disk for offline analysis (snakeviz, pstats).
+When profiling is off the only cost is one attribute check per command.
+"""
+
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from typing import Optional, Dict, Any
+
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 25
+WATCHDOG_TICK = 0.05
+
+
+class Profiler:
+    """Runtime-switchable sampling profiler, allocation tracer and hub-block watchdog."""
+
+    def __init__(self, out_dir: Optional[str] = None):
+        self.out_dir = out_dir or os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "profiles")
+        self.enabled = False
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+        self.trace_allocations = os.getenv("PROFILE_TRACEMALLOC") == "true"
+        self.block_ms = float(os.getenv("PROFILE_BLOCK_MS", "200"))
+
+        self.sampled = 0
+        self.hub_blocks = 0
+        self._busy = threading.Lock()  # only one cProfile can be active at a time
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._hub_tick = 0.0
+        self._ticking = False
+        self._hub_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  trace_allocations: Optional[bool] = None, block_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Change settings at runtime; returns the resulting status."""
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        if block_ms is not None:
+            self.block_ms = float(block_ms)
+        if trace_allocations is not None:
+            self.trace_allocations = bool(trace_allocations)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+        if self.enabled and self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._snapshot = tracemalloc.take_snapshot()
+        elif not (self.enabled and self.trace_allocations) and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._snapshot = None
+        if self.enabled and self.block_ms > 0:
+            self._start_watchdog()
+        print(f">> Profiling {'on' if self.enabled else 'off'}: {self.status()}")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "tracemalloc": tracemalloc.is_tracing(),
+            "block_ms": self.block_ms,
+            "sampled": self.sampled,
+            "hub_blocks": self.hub_blocks,
+            "out_dir": os.path.abspath(self.out_dir),
+        }
+
+    def _path(self, name: str) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        return os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.sampled:04d}-{name}")
+
+    # -- Sampling ----------------------------------------------------------
+
+    def profiled(self, func):
+        """Decorator: profile a sampled fraction of calls while enabled."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or random.random() >= self.sample_rate:
+                return func(*args, **kwargs)
+            if not self._busy.acquire(blocking=False):
+                return func(*args, **kwargs)
+            try:
+                return self._run_profiled(func, args, kwargs)
+            finally:
+                self._busy.release()
+        return wrapper
+
+    def _run_profiled(self, func, args, kwargs):
+        data = args[-1] if args else None
+        action = data.get("action") if isinstance(data, dict) else None
+        name = f"{func.__name__}-{action or 'call'}"
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            path = self._path(name)
+            self.sampled += 1
+            try:
+                profile.dump_stats(path + ".prof")
+                if tracemalloc.is_tracing():
+                    self._dump_allocations(path + ".alloc.txt")
+                print(f">> Profiled {name} ({elapsed * 1000:.0f} ms) -> {path}.prof")
+            except OSError as e:
+                print(f"ERROR Could not write profile: {e}")
+
+    def _dump_allocations(self, path: str):
+        """Top allocation growth since the previous sampled call."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.compare_to(self._snapshot, "lineno") if self._snapshot else snapshot.statistics("lineno")
+        self._snapshot = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced: {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n")
+            for stat in stats[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+
+    def dump_snapshot(self) -> Optional[str]:
+        """Write a full tracemalloc snapshot (load with tracemalloc.Snapshot.load)."""
+        if not tracemalloc.is_tracing():
+            return None
+        path = self._path("snapshot.tracemalloc")
+        tracemalloc.take_snapshot().dump(path)
+        return path
+
+    # -- Hub watchdog ------------------------------------------------------
+
+    def _start_watchdog(self):
+        """Green thread ticks on the hub; an OS thread notices when the ticks stop."""
+        if self._ticking:
+            return
+        import eventlet  # type: ignore
+
+        self._hub_thread_id = threading.get_ident()
+        self._hub_tick = time.monotonic()
+        self._ticking = True
+
+        def tick():
+            # Stops with profiling, so nothing runs while it is off
+            while self.enabled and self.block_ms > 0:
+                self._hub_tick = time.monotonic()
+                eventlet.sleep(WATCHDOG_TICK)
+            self._ticking = False
+
+        eventlet.spawn(tick)
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch_hub, daemon=True)
+            self._watchdog.start()
+
+    def _watch_hub(self):
+        reported = 0.0
+        while True:
+            time.sleep(WATCHDOG_TICK)
+            if not (self._ticking and self.enabled and self.block_ms > 0):
+                continue
+            last = self._hub_tick
+            blocked = (time.monotonic() - last) * 1000
+            if blocked < self.block_ms or last == reported:
+                continue
+            reported = last  # one report per block
+            self.hub_blocks += 1
+            frame = sys._current_frames().get(self._hub_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "(no stack)\n"
+            print(f"TIMEOUT Hub blocked for {blocked:.0f} ms+ - stack in {self.out_dir}/hub_blocks.log")
+            try:
+                os.makedirs(self.out_dir, exist_ok=True)
+                with open(os.path.join(self.out_dir, "hub_blocks.log"), "a", encoding="utf-8") as f:
+                    f.write(f"--- {time.strftime('%Y-%m-%d %H:%M:%S')} hub blocked > {blocked:.0f} ms\n{stack}\n")
+            except OSError as e:
+                print(f"ERROR Could not write hub block report: {e}")
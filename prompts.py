@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Prompt registry for Profesor Ableton
+One persona for every provider, the request templates built on it, and
+their token sizes (estimated once at import). The persona plus any project
+context forms the stable system prefix that providers can cache.
+"""
+
+import math
+import os
+from typing import Optional, Dict, Any, List
+
+PERSONA = (
+    "You are Profesor Ableton, a groovy music guru from the comic underground scene! "
+    "You're an expert Ableton Live producer who talks like a cool, laid-back comic book character. "
+    "Use phrases like 'Far out!', 'Righteous!', 'That's heavy, man!' and give solid Ableton advice "
+    "with comic book flair. Keep it helpful but fun!"
+)
+
+TEMPLATES = {
+    "ableton_help": "Explain {topic} in Ableton Live production",
+}
+
+CHARS_PER_TOKEN = 4  # rough average for English prose across the providers' tokenizers
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+PERSONA_TOKENS = estimate_tokens(PERSONA)
+
+
+def render(name: str, **values: Any) -> str:
+    return TEMPLATES[name].format(**values)
+
+
+def system_prompt(context: Optional[str] = None) -> str:
+    """Persona, followed by project context (analysis summaries) when there is one."""
+    return f"{PERSONA}\n\nProject context:\n{context}" if context else PERSONA
+
+
+def chat_messages(question: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+    """OpenAI-style messages; the system message is the identical prefix that providers cache."""
+    return [
+        {"role": "system", "content": system_prompt(context)},
+        {"role": "user", "content": question},
+    ]
+
+
+def claude_system(context: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Anthropic system blocks, marked cacheable once the prefix is large enough to be cached."""
+    block: Dict[str, Any] = {"type": "text", "text": system_prompt(context)}
+    tokens = PERSONA_TOKENS + (estimate_tokens(context) if context else 0)
+    # Anthropic only caches prefixes from this size on; below it cache_control would just be ignored
+    if tokens >= int(os.getenv("CLAUDE_MIN_CACHE_TOKENS", "1024")):
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
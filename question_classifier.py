@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Question complexity classifier for Profesor Ableton
+Keyword features plus a small linear model (NumPy, no network) sort each
+question into a tier that sets the answer length and whether the provider's
+fast or strong model is used
+"""
+
+import math
+import re
+from typing import Dict, Any
+
+import numpy as np
+
+TIERS = ("quick", "standard", "deep")
+MAX_TOKENS = {"quick": 200, "standard": 500, "deep": 1200}
+STRONG_TIERS = {"deep"}
+
+DEFINITION = re.compile(r"\b(what is|what's|what are|define|definition|meaning of|explain|što je|sta je|šta je)\b")
+HOW_TO = re.compile(r"\b(how (do|to|can|should)|kako|steps?|step by step|korak|tutorial|guide|set up|setup)\b")
+DEEP_TOPICS = re.compile(
+    r"\b(mix(ing)?|miks|master(ing)?|sidechain|side-chain|gain staging|sound design|arrang\w*|"
+    r"routing|resampl\w*|automation|phase|stereo|frequenc\w*|low end|headroom|loudness|lufs|"
+    r"parallel|multiband|synthesis|modulation|max for live|m4l|workflow|chain)\b")
+REASONING = re.compile(
+    r"\b(why|zašto|zasto|compare|comparison|difference|vs|versus|better|best way|should i|"
+    r"problem|fix|muddy|harsh|clipping|distort\w*|troubleshoot|improve)\b")
+
+# Rows: features from _features(); columns: TIERS
+WEIGHTS = np.array([
+    # quick standard deep
+    [-2.0, 0.5, 1.6],    # length (log words, ~1 at 40 words)
+    [2.0, 0.0, -1.0],    # definition cue
+    [-0.5, 1.5, 0.3],    # how-to cue
+    [-1.5, 0.3, 2.5],    # deep topics (0..1)
+    [-1.0, 0.3, 1.5],    # reasoning cue
+    [-1.0, 0.2, 1.2],    # several questions in one
+    [-1.0, 0.3, 1.0],    # analysis context attached
+    [1.5, 0.0, -1.0],    # very short question
+], dtype=np.float64)
+BIAS = np.array([0.3, 0.5, -0.8], dtype=np.float64)
+
+
+def _features(question: str, has_context: bool) -> np.ndarray:
+    text = question.lower()
+    words = len(text.split())
+    return np.array([
+        math.log1p(words) / math.log(41),
+        bool(DEFINITION.search(text)),
+        bool(HOW_TO.search(text)),
+        min(len(DEEP_TOPICS.findall(text)), 3) / 3,
+        bool(REASONING.search(text)),
+        text.count("?") > 1 or text.count(" and ") > 1,
+        has_context,
+        words <= 6,
+    ], dtype=np.float64)
+
+
+def classify(question: str, has_context: bool = False) -> Dict[str, Any]:
+    """Tier, output-token cap and model tier for a question."""
+    scores = _features(question, has_context) @ WEIGHTS + BIAS
+    probs = np.exp(scores - scores.max())
+    probs /= probs.sum()
+    tier = TIERS[int(np.argmax(probs))]
+    return {
+        "tier": tier,
+        "max_tokens": MAX_TOKENS[tier],
+        "strong": tier in STRONG_TIERS,
+        "confidence": round(float(probs.max()), 2),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    for q in sys.argv[1:] or ["What is EQ?", "How to use compressor?",
+                              "Why does my mix sound muddy in the low end and how should I fix the sidechain routing?"]:
+        print(f"{classify(q)}  {q}")
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Sample library indexer for Profesor Ableton
+Walks sample folders, extracts audio features from memory-mapped WAV/AIFF
+data and answers "find me a punchy kick" with vectorized nearest-neighbour
+search over the stored feature matrix
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from audio_io import AudioFile, is_audio_file
+
+INDEX_VERSION = 2
+
+# Only the start of long files is used for timbre features
+MAX_ANALYSIS_SECONDS = 10.0
+FFT_SIZE = 2048
+LOW_CUTOFF_HZ = 150.0
+
+FEATURES = ["duration", "rms_db", "peak_db", "centroid_hz", "attack_ms", "low_ratio"]
+F_DURATION, F_RMS, F_PEAK, F_CENTROID, F_ATTACK, F_LOW = range(len(FEATURES))
+
+# Words that steer the search: feature -> target in standard deviations
+DESCRIPTORS: Dict[str, Dict[int, float]] = {
+    "punchy": {F_ATTACK: -1.5, F_PEAK: 1.0, F_LOW: 0.5},
+    "snappy": {F_ATTACK: -1.5, F_DURATION: -1.0},
+    "short": {F_DURATION: -1.5}, "tight": {F_DURATION: -1.0, F_ATTACK: -1.0},
+    "long": {F_DURATION: 1.5}, "sustained": {F_DURATION: 1.5, F_ATTACK: 0.5},
+    "bright": {F_CENTROID: 1.5}, "crisp": {F_CENTROID: 1.5, F_ATTACK: -0.5},
+    "dark": {F_CENTROID: -1.5}, "warm": {F_CENTROID: -1.0, F_LOW: 0.5},
+    "deep": {F_LOW: 1.5, F_CENTROID: -1.0}, "boomy": {F_LOW: 1.5, F_DURATION: 0.5},
+    "sub": {F_LOW: 2.0, F_CENTROID: -1.5},
+    "loud": {F_RMS: 1.5}, "fat": {F_RMS: 1.0, F_LOW: 1.0},
+    "soft": {F_RMS: -1.5, F_ATTACK: 0.5}, "quiet": {F_RMS: -1.5},
+    "thin": {F_LOW: -1.5, F_CENTROID: 1.0},
+}
+
+# Name keywords, matched as whole words of the path below the scanned folder (short ones may add an "s")
+CATEGORY_ALIASES = {
+    "kick": ("kick", "kik", "bd", "bassdrum"),
+    "snare": ("snare", "snr", "sd"),
+    "hat": ("hat", "hh", "hihat"), "hihat": ("hat", "hh", "hihat"),
+    "clap": ("clap", "clp"),
+    "perc": ("perc",), "tom": ("tom",), "cymbal": ("cymbal", "crash", "ride"),
+    "bass": ("bass",), "vocal": ("vocal", "vox"), "fx": ("fx", "sfx"),
+}
+HINT_BONUS = 1e6
+STOP_WORDS = {"a", "an", "the", "me", "find", "some", "sample", "samples", "sound", "sounds", "like", "with", "and", "for", "give", "i", "need", "want", "one"}
+
+
+def _db(value: float) -> float:
+    return float(20 * np.log10(max(value, 1e-9)))
+
+
+def extract_features(path: str) -> np.ndarray:
+    """Compute the feature vector of one audio file."""
+    audio = AudioFile(path)
+    try:
+        count = min(audio.frames, int(MAX_ANALYSIS_SECONDS * audio.sample_rate))
+        mono = audio.read(0, count).mean(axis=1) if count else np.zeros(1, dtype=np.float32)
+    finally:
+        audio.close()
+
+    peak = float(np.abs(mono).max())
+    rms = float(np.sqrt(np.mean(mono.astype(np.float64) ** 2)))
+
+    # Average magnitude spectrum over Hann-windowed frames, computed in one batch
+    frames = len(mono) // FFT_SIZE
+    if frames:
+        batch = mono[:frames * FFT_SIZE].reshape(frames, FFT_SIZE) * np.hanning(FFT_SIZE).astype(np.float32)
+    else:
+        batch = np.pad(mono, (0, FFT_SIZE - len(mono)))[None, :]
+    spectrum = np.abs(np.fft.rfft(batch, axis=1)).mean(axis=0)
+    freqs = np.fft.rfftfreq(FFT_SIZE, 1.0 / audio.sample_rate)
+    total = float(spectrum.sum())
+    centroid = float((freqs * spectrum).sum() / total) if total > 0 else 0.0
+    power = spectrum ** 2
+    low_ratio = float(power[freqs < LOW_CUTOFF_HZ].sum() / power.sum()) if total > 0 else 0.0
+
+    # Attack: 10% -> 90% of peak on a 1 ms max-envelope
+    hop = max(1, audio.sample_rate // 1000)
+    windows = len(mono) // hop
+    attack_ms = 0.0
+    if windows and peak > 0:
+        envelope = np.abs(mono[:windows * hop]).reshape(windows, hop).max(axis=1)
+        start = int(np.argmax(envelope >= 0.1 * peak))
+        reach = int(np.argmax(envelope >= 0.9 * peak))
+        attack_ms = float(max(0, reach - start) * hop * 1000 / audio.sample_rate)
+
+    return np.array([audio.duration, _db(rms), _db(peak), centroid, attack_ms, low_ratio], dtype=np.float32)
+
+
+def _search_space(features: np.ndarray) -> np.ndarray:
+    """Map raw features to a space where distances make sense (log scales for time/frequency)."""
+    space = features.astype(np.float64, copy=True)
+    space[:, F_DURATION] = np.log10(space[:, F_DURATION] + 1e-3)
+    space[:, F_CENTROID] = np.log10(space[:, F_CENTROID] + 1.0)
+    space[:, F_ATTACK] = np.log10(space[:, F_ATTACK] + 0.1)
+    return space
+
+
+class SampleIndex:
+    """On-disk feature index of sample folders with incremental rescans."""
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = index_path or os.path.join(os.getenv("COPILOT_CACHE_DIR", ".copilot_cache"), "samples.npz")
+        self.paths: List[str] = []
+        self.mtimes = np.zeros(0, dtype=np.float64)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.features = np.zeros((0, len(FEATURES)), dtype=np.float32)
+        self.offsets = np.zeros(0, dtype=np.int64)  # length of the scanned folder prefix of each path
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()  # one scan at a time; each builds on the previous result
+        self._prepare()
+        self.load()
+
+    def _prepare(self):
+        """Precompute the normalized search matrix and lowercase names."""
+        space = _search_space(self.features) if len(self.features) else np.zeros((0, len(FEATURES)))
+        self._mean = space.mean(axis=0) if len(space) else np.zeros(len(FEATURES))
+        std = space.std(axis=0) if len(space) else np.ones(len(FEATURES))
+        self._std = np.where(std > 1e-9, std, 1.0)
+        self._normalized = ((space - self._mean) / self._std).astype(np.float32)
+        # All names in one string so keyword filters are a single regex pass; camelCase is split into words
+        names = [re.sub(r"(?<=[a-z])(?=[A-Z])", " ", p[offset:]).lower()
+                 for p, offset in zip(self.paths, self.offsets.tolist())]
+        lengths = np.fromiter((len(n) + 1 for n in names), dtype=np.int64, count=len(names))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+        # Replaced as a whole, so a query keeps a consistent copy while a scan swaps in a new one
+        self._name_index: Tuple[str, np.ndarray, Dict[str, np.ndarray]] = ("\n".join(names), starts, {})
+
+    @staticmethod
+    def _name_mask(name_index: Tuple[str, np.ndarray, Dict[str, np.ndarray]], word: str) -> np.ndarray:
+        """Rows whose name has a word starting with the word (or one of its aliases)."""
+        names, starts, masks = name_index
+        mask = masks.get(word)
+        if mask is None:
+            # "hat" must not match "what" or "hatch", but "kick" may match "kicks" and "kickdrum"
+            aliases = CATEGORY_ALIASES.get(word, (word,))
+            pattern = re.compile("|".join(r"(?<![a-z])" + re.escape(a) + (r"s?(?![a-z])" if len(a) <= 3 else "")
+                                          for a in aliases))
+            positions = np.fromiter((m.start() for m in pattern.finditer(names)), dtype=np.int64)
+            mask = np.zeros(len(starts), dtype=bool)
+            mask[np.searchsorted(starts, positions, side="right") - 1] = True
+            masks[word] = mask
+        return mask
+
+    def load(self):
+        """Load the index from disk if present."""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with np.load(self.index_path) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return
+                paths = bytes(data["paths"]).decode("utf-8").split("\n") if len(data["paths"]) else []
+                mtimes, sizes, features = data["mtimes"], data["sizes"], data["features"]
+                offsets = data["offsets"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"ERROR Could not read sample index: {e}")
+            return
+        with self._lock:
+            self.paths, self.mtimes, self.sizes, self.features = paths, mtimes, sizes, features
+            self.offsets = offsets
+            self._prepare()
+        print(f">> Sample index loaded: {len(paths)} files")
+
+    def save(self):
+        """Write the index atomically."""
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        encoded = np.frombuffer("\n".join(self.paths).encode("utf-8"), dtype=np.uint8)
+        tmp_path = self.index_path + ".tmp.npz"
+        np.savez(tmp_path, version=INDEX_VERSION, paths=encoded,
+                 mtimes=self.mtimes, sizes=self.sizes, features=self.features, offsets=self.offsets)
+        os.replace(tmp_path, self.index_path)
+
+    def scan(self, folders: List[str], workers: int = 4) -> Dict[str, int]:
+        """Walk folders and re-analyze only new or changed files."""
+        with self._scan_lock:
+            return self._scan(folders, workers)
+
+    def _scan(self, folders: List[str], workers: int) -> Dict[str, int]:
+        started = time.time()
+        with self._lock:
+            paths, mtimes, sizes, features, offsets = self.paths, self.mtimes, self.sizes, self.features, self.offsets
+        known = {path: i for i, path in enumerate(paths)}
+
+        found: List[Tuple[str, float, int, int]] = []
+        for folder in folders:
+            offset = len(os.path.join(os.path.abspath(os.path.expanduser(folder)), ""))
+            for root, _, files in os.walk(os.path.expanduser(folder)):
+                for name in files:
+                    if is_audio_file(name):
+                        path = os.path.abspath(os.path.join(root, name))
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        found.append((path, stat.st_mtime, stat.st_size, offset))
+
+        # Files outside the scanned folders stay in the index untouched
+        roots = tuple(os.path.join(os.path.abspath(os.path.expanduser(f)), "") for f in folders)
+        found_paths = {item[0] for item in found}
+        keep_rows = [row for path, row in known.items() if not path.startswith(roots)]
+        keep_offsets = offsets[keep_rows].tolist()
+        removed = sum(1 for path in known if path.startswith(roots) and path not in found_paths)
+
+        kept_outside = len(keep_rows)
+        todo = []
+        for path, mtime, size, offset in found:
+            row = known.get(path)
+            if row is not None and mtimes[row] == mtime and sizes[row] == size:
+                keep_rows.append(row)
+                keep_offsets.append(offset)
+            else:
+                todo.append((path, mtime, size, offset))
+
+        def analyze(item):
+            try:
+                return item, extract_features(item[0])
+            except Exception as e:
+                print(f"ERROR Skipping {item[0]}: {e}")
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = [(item, vector) for item, vector in pool.map(analyze, todo) if vector is not None]
+
+        keep = np.array(keep_rows, dtype=np.int64)
+        new_paths = [paths[i] for i in keep_rows] + [item[0] for item, _ in results]
+        new_mtimes = np.concatenate([mtimes[keep], np.array([item[1] for item, _ in results], dtype=np.float64)])
+        new_sizes = np.concatenate([sizes[keep], np.array([item[2] for item, _ in results], dtype=np.int64)])
+        new_vectors = np.array([vector for _, vector in results], dtype=np.float32).reshape(-1, len(FEATURES))
+        new_features = np.concatenate([features[keep], new_vectors])
+        new_offsets = np.array(keep_offsets + [item[3] for item, _ in results], dtype=np.int64)
+
+        with self._lock:
+            self.paths, self.mtimes, self.sizes, self.features = new_paths, new_mtimes, new_sizes, new_features
+            self.offsets = new_offsets
+            self._prepare()
+        self.save()
+
+        stats = {"files": len(new_paths), "analyzed": len(results), "unchanged": len(keep_rows) - kept_outside,
+                 "removed": removed, "seconds": round(time.time() - started, 2)}
+        print(f"OK Sample scan: {stats}")
+        return stats
+
+    def query(self, text: str = "", like: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rank samples by descriptor words and/or similarity to a reference file."""
+        with self._lock:
+            normalized, paths, features = self._normalized, self.paths, self.features
+            mean, std, name_index = self._mean, self._std, self._name_index
+        if not len(paths):
+            return []
+
+        target = np.zeros(len(FEATURES), dtype=np.float32)
+        weights = np.zeros(len(FEATURES), dtype=np.float32)
+        if like:
+            reference = _search_space(extract_features(like)[None, :])[0]
+            target[:] = (reference - mean) / std
+            weights[:] = 1.0
+
+        mask = np.ones(len(paths), dtype=bool)
+        hints = np.zeros(len(paths), dtype=np.int32)
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if word in DESCRIPTORS:
+                for feature, value in DESCRIPTORS[word].items():
+                    target[feature] = value
+                    weights[feature] = 1.0
+            elif word in CATEGORY_ALIASES:
+                mask &= self._name_mask(name_index, word)
+            elif word not in STOP_WORDS and len(word) > 2:
+                # Other words only rank: "warmth" prefers paths containing it but filters nothing out
+                hints += self._name_mask(name_index, word)
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        if weights.any():
+            distance = (((normalized[candidates] - target) ** 2) * weights).sum(axis=1)
+        else:
+            distance = -features[candidates, F_RMS]  # no descriptors: loudest first
+        # Each matched hint word outranks any feature distance
+        distance = distance.astype(np.float64) - hints[candidates] * HINT_BONUS
+        limit = min(limit, len(candidates))
+        top = np.argpartition(distance, limit - 1)[:limit]
+        top = top[np.argsort(distance[top])]
+
+        results = []
+        for i in candidates[top]:
+            row = features[i]
+            results.append({
+                "path": paths[i],
+                "name": os.path.basename(paths[i]),
+                **{name: round(float(row[k]), 3) for k, name in enumerate(FEATURES)},
+            })
+        return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """One line per sample for chat output."""
+    if not results:
+        return "No matching samples found - index your sample folders first (index_samples)."
+    lines = [f"Found {len(results)} samples:"]
+    for r in results:
+        lines.append(f"- {r['name']}: {r['duration']:.2f}s, attack {r['attack_ms']:.0f} ms, "
+                     f"RMS {r['rms_db']:.1f} dBFS, centroid {r['centroid_hz']:.0f} Hz  ({r['path']})")
+    return "\n".join(lines)
+
+
+def sample_folders() -> List[str]:
+    """Folders from SAMPLE_FOLDERS (separated like PATH)."""
+    return [f for f in os.getenv("SAMPLE_FOLDERS", "").split(os.pathsep) if f.strip()]
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = SampleIndex()
+    if len(sys.argv) > 1 and sys.argv[1] == "scan":
+        index.scan(sys.argv[2:] or sample_folders())
+    elif len(sys.argv) > 1:
+        query = " ".join(sys.argv[1:])
+        t = time.perf_counter()
+        found = index.query(query)
+        print(format_results(found))
+        print(f">> Query took {(time.perf_counter() - t) * 1000:.1f} ms over {len(index.paths)} files")
+    else:
+        print("Usage: python sample_indexer.py scan [folder ...] | python sample_indexer.py punchy kick")
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from pythonosc import dispatcher, osc_server, udp_client  # type: ignore
+
+from osc_bridge import AbletonOSCBridge
+from ableton_state import AbletonState
+
+# Stand-in for AbletonOSC: answers the state mirror's requests like a small Live set would
+TRACKS = ["Drums", "Bass", "Keys"]
+DEVICES = {0: ["Drum Rack", "Glue Compressor"], 1: ["Operator", "EQ Eight"], 2: ["Wavetable"]}
+requests = []
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_ableton_state():
+    requests.clear()
+    clients = {}
+
+    def send(address, args):
+        # The mirror's port is only known once it has bound it
+        if state.port not in clients:
+            clients[state.port] = udp_client.SimpleUDPClient("127.0.0.1", state.port)
+        clients[state.port].send_message(address, args)
+
+    def reply(address, *args):
+        requests.append((address, args))
+        if address == "/live/test":
+            send("/live/test", "ok")
+        elif address == "/live/song/get/num_tracks":
+            send(address, len(TRACKS))
+        elif address == "/live/song/get/track_names":
+            send(address, TRACKS)
+        elif address == "/live/song/start_listen/tempo":
+            send("/live/song/get/tempo", 124.0)
+        elif address == "/live/view/start_listen/selected_track":
+            send("/live/view/get/selected_track", 1)
+        elif address == "/live/track/get/devices/name":
+            send(address, [args[0]] + DEVICES.get(args[0], []))
+        elif address == "/live/view/get/selected_clip":
+            send(address, [1, 0])
+        elif address == "/live/clip/get/name":
+            send(address, [args[0], args[1], "Bassline"])
+        elif address in ("/live/song/create_audio_track", "/live/song/create_midi_track"):
+            TRACKS.insert(args[0] if 0 <= args[0] <= len(TRACKS) else len(TRACKS), "Audio")
+        elif address == "/live/track/set/name":
+            TRACKS[args[0]] = args[1]
+
+    handler = dispatcher.Dispatcher()
+    handler.set_default_handler(reply)
+    fake = osc_server.ThreadingOSCUDPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    print(f"✅ Fake AbletonOSC listening on 127.0.0.1:{fake.server_address[1]}")
+
+    bridge = AbletonOSCBridge("127.0.0.1", fake.server_address[1])
+    state = AbletonState(bridge, "127.0.0.1", 0)
+    try:
+        state.start()
+
+        # Heartbeat -> connect -> subscribe -> full state
+        assert wait_for(lambda: state.selected_clip and state.selected_clip.get("name")), state.snapshot()
+        assert wait_for(lambda: all(t.get("devices") for t in state.tracks.values())), state.snapshot()
+        subscriptions = {address for address, _ in requests}
+        assert "/live/song/start_listen/tempo" in subscriptions
+        assert sum(1 for address, _ in requests if address == "/live/track/start_listen/name") == len(TRACKS)
+        print(state.summary())
+
+        # Deltas pushed by the listeners
+        started = time.perf_counter()
+        send("/live/song/get/tempo", 128.0)
+        send("/live/track/get/mute", [0, 1])
+        send("/live/song/get/is_playing", 1)
+        assert wait_for(lambda: state.song.get("is_playing") == 1)
+        print(f"⚡ Delta applied in {(time.perf_counter() - started) * 1000:.2f} ms")
+        assert state.song["tempo"] == 128.0 and state.tracks[0]["mute"] == 1
+        summary = state.summary()
+        assert "128 BPM" in summary and "playing" in summary
+        assert "Selected track 2 'Bass': Operator, EQ Eight" in summary, summary
+        assert "Selected clip 'Bassline'" in summary, summary
+
+        # A track added in Live shows up on the next track count
+        TRACKS.append("Vocals")
+        DEVICES[3] = []
+        send("/live/song/get/num_tracks", len(TRACKS))
+        assert wait_for(lambda: len(state.tracks) == 4)
+
+        # Two appends in a burst: each waits for Live's new track count and names its own track
+        created = []
+        workers = [threading.Thread(target=lambda n=n: created.append(state.create_track("audio", -1, n)))
+                   for n in ("AI Vox", "AI Pad")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert sorted(created) == [4, 5], created
+        assert wait_for(lambda: sorted(TRACKS[4:]) == ["AI Pad", "AI Vox"]), TRACKS
+
+        # Summaries are only rebuilt after a change
+        started = time.perf_counter()
+        for _ in range(1000):
+            state.summary()
+        print(f"⚡ Cached summary: {(time.perf_counter() - started) * 1000:.3f} µs/call")
+    finally:
+        TRACKS[3:] = []
+        DEVICES.pop(3, None)
+        state.stop()
+        bridge.stop()
+        fake.shutdown()
+        fake.server_close()
+
+
+if __name__ == "__main__":
+    print("🤖 Testing Ableton state mirror against a local fake AbletonOSC...")
+    test_ableton_state()
+    print("\n✅ Test completed!")
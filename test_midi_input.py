@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+
+import mido  # type: ignore
+import numpy as np
+
+from midi_input import EVENT_DTYPE, FileSource, LiveAnalyzer, MidiInput, RingBuffer
+
+SIXTEENTH = 0.125  # seconds at 120 BPM
+
+# Questions about what is being played right now, with a fragment of the expected answer
+LIVE = [
+    ("what chord am I playing?", "Am7"),
+    ("What am I playing right now?", "Am7"),
+    ("what notes am I holding", "Am7"),
+    ("am I rushing?", "grid at 120 BPM"),
+    ("am I playing in time?", "grid at 120 BPM"),
+    ("how's my timing right now?", "grid at 120 BPM"),
+    ("am I hitting the keys too hard?", "Velocity averages"),
+    ("how is my velocity?", "Velocity averages"),
+]
+
+# General questions that only mention chords, timing or velocity: these go to a provider
+NOT_LIVE = [
+    "What chord should I play after Am?",
+    "What notes should I play in D minor?",
+    "How do I fix my timing in Ableton?",
+    "How do I make my drums groove more?",
+    "Why is my velocity ignored by Simpler?",
+    "What chord is C E G?",
+    "my drums are rushing in the mix, how can I fix that?",
+]
+
+
+def make_events(rows):
+    return np.array([tuple(row) for row in rows], dtype=EVENT_DTYPE)
+
+
+def test_timing_and_velocity():
+    analyzer = LiveAnalyzer(bpm=120, grid="1/16")
+    # Each 16th comes 6 ms sooner than the last: the grid follows slowly, so the average stays ahead
+    analyzer.feed(make_events([(i * (SIXTEENTH - 6e-3), 60, 80 + i, 0, True) for i in range(16)]))
+    state = analyzer.state()
+    assert state["notes"] == 16
+    assert state["timing"]["verdict"] == "rushing", state["timing"]
+    assert state["velocity"]["min"] == 80 and state["velocity"]["max"] == 95
+
+    analyzer.reset()
+    analyzer.feed(make_events([(100.0 + i * SIXTEENTH, 60, 100, 0, True) for i in range(8)]))
+    assert analyzer.state()["timing"]["verdict"] == "on the grid"
+
+
+def test_chord_tracking():
+    analyzer = LiveAnalyzer()
+    analyzer.feed(make_events([(0.0, note, 90, 0, True) for note in (57, 60, 64, 67)]))
+    assert analyzer.state()["chord"]["symbol"] == "Am7"
+    analyzer.feed(make_events([(0.5, 67, 0, 0, False)]))
+    assert analyzer.state()["chord"]["symbol"] == "Am"
+    analyzer.feed(make_events([(0.5, note, 0, 0, False) for note in (57, 60, 64)]))
+    assert analyzer.state()["held"] == [] and analyzer.state()["chord"] is None
+
+
+def test_ring_buffer_overflow():
+    ring = RingBuffer(capacity=8)
+    for i in range(20):
+        ring.push(float(i), 60, 100, 0, True)
+    events, position, dropped = ring.read(0)
+    assert (position, dropped) == (20, 12)
+    assert events["time"].tolist() == [float(i) for i in range(12, 20)]
+
+
+def test_questions_with_file_source():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "am7.mid")
+        mid = mido.MidiFile(ticks_per_beat=480)
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        track.append(mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(120), time=0))
+        for note in (57, 60, 64, 67):
+            track.append(mido.Message("note_on", note=note, velocity=90, time=0))
+        mid.save(path)
+
+        live = MidiInput()
+        assert live.answer("what am I playing?") is None  # not running yet
+        live.start(FileSource(path), bpm=120)
+        try:
+            deadline = time.monotonic() + 5
+            while len(live.state().get("held", [])) < 4 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert live.state()["source"] == "FileSource"
+            for question, expected in LIVE:
+                result = live.answer(question)
+                assert result and expected in result, (question, result)
+            for question in NOT_LIVE:
+                assert live.answer(question) is None, (question, live.answer(question))
+        finally:
+            live.stop()
+        assert live.answer("what am I playing?") is None
+
+
+if __name__ == "__main__":
+    print("🤖 Testing live MIDI input...")
+    test_timing_and_velocity()
+    test_chord_tracking()
+    test_ring_buffer_overflow()
+    test_questions_with_file_source()
+    print("\n✅ Test completed!")
@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+import mido  # type: ignore
+import numpy as np
+
+from midi_transform import INLINE_FILES, apply_transforms, compile_spec, load_notes, transform_files
+
+TICKS = 480  # per beat; a 1/16 step is 120 ticks
+C_MAJOR = [60, 62, 64, 65, 67, 69, 71, 72]
+
+
+def make_notes(starts, pitches, length=100):
+    count = len(starts)
+    return {
+        "start": np.array(starts, dtype=np.int64),
+        "end": np.array(starts, dtype=np.int64) + length,
+        "pitch": np.array(pitches, dtype=np.int64),
+        "velocity": np.full(count, 100.0),
+        "channel": np.zeros(count, dtype=np.int64),
+        "track": np.zeros(count, dtype=np.int64),
+    }
+
+
+def test_quantize():
+    notes = make_notes([0, 130, 236, 371], [60] * 4)
+    apply_transforms(notes, TICKS, compile_spec({"quantize": "1/16"}))
+    assert notes["start"].tolist() == [0, 120, 240, 360]
+    assert (notes["end"] - notes["start"]).tolist() == [100] * 4  # lengths kept
+
+    notes = make_notes([130], [60])
+    apply_transforms(notes, TICKS, compile_spec({"quantize": "1/16", "strength": 0.5}))
+    assert notes["start"].tolist() == [125]
+
+
+def test_swing():
+    # 60% swing delays every second 16th by 20% of a step, on-beat notes stay
+    notes = make_notes([0, 120, 240, 360], [60] * 4)
+    apply_transforms(notes, TICKS, compile_spec({"swing": 60}))
+    assert notes["start"].tolist() == [0, 144, 240, 384]
+
+    notes = make_notes([0, 240, 480, 720], [60] * 4)
+    apply_transforms(notes, TICKS, compile_spec({"quantize": "1/8", "swing": 75}))
+    assert notes["start"].tolist() == [0, 360, 480, 840]
+
+
+def test_change_key():
+    notes = make_notes(range(0, 8 * TICKS, TICKS), C_MAJOR, length=400)
+    apply_transforms(notes, TICKS, compile_spec({"to_key": "D major"}))
+    assert notes["pitch"].tolist() == [p + 2 for p in C_MAJOR]
+
+    # Major -> minor also lowers the 3rd, 6th and 7th
+    notes = make_notes(range(0, 8 * TICKS, TICKS), C_MAJOR, length=400)
+    apply_transforms(notes, TICKS, compile_spec({"to_key": "C minor"}))
+    assert notes["pitch"].tolist() == [60, 62, 63, 65, 67, 68, 70, 72]
+
+
+def save_bass(path):
+    """Four slightly late C major notes on a bass program."""
+    mid = mido.MidiFile(ticks_per_beat=TICKS)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message("program_change", program=33, time=0))
+    previous = 0
+    for start, pitch in zip([0, 130, 236, 371], C_MAJOR):
+        track.append(mido.Message("note_on", note=pitch, velocity=90, time=start - previous))
+        track.append(mido.Message("note_off", note=pitch, velocity=0, time=100))
+        previous = start + 100
+    mid.save(path)
+
+
+def test_transform_files():
+    with tempfile.TemporaryDirectory() as folder:
+        save_bass(os.path.join(folder, "bass.mid"))
+
+        result = transform_files([folder], {"quantize": "1/16", "transpose": 12}, workers=64)
+        assert result["written"] == 1 and not result["failed"], result
+        out = mido.MidiFile(os.path.join(folder, "transformed", "bass.mid"))
+        notes, others = load_notes(out)
+        assert notes["start"].tolist() == [0, 120, 240, 360]
+        assert notes["pitch"].tolist() == [p + 12 for p in C_MAJOR[:4]]
+        assert others[0][0][1].program == 33  # other events survive
+
+        # The output folder is not picked up as input on the next run
+        assert transform_files([folder], {"transpose": 1})["files"] == 1
+
+
+def test_transform_files_in_processes():
+    # Enough files to go through the process pool instead of inline
+    with tempfile.TemporaryDirectory() as folder:
+        count = INLINE_FILES + 2
+        for i in range(count):
+            save_bass(os.path.join(folder, f"bass{i}.mid"))
+
+        cpu_count = os.cpu_count
+        os.cpu_count = lambda: 2  # workers are capped at the core count; use the pool on one core too
+        try:
+            result = transform_files([folder], {"quantize": "1/16"}, workers=2)
+        finally:
+            os.cpu_count = cpu_count
+        assert result["written"] == count and not result["failed"], result
+        assert result["notes"] == 4 * count
+        for i in range(count):
+            notes, _ = load_notes(mido.MidiFile(os.path.join(folder, "transformed", f"bass{i}.mid")))
+            assert notes["start"].tolist() == [0, 120, 240, 360]
+
+
+if __name__ == "__main__":
+    print("🤖 Testing MIDI transforms...")
+    test_quantize()
+    test_swing()
+    test_change_key()
+    test_transform_files()
+    test_transform_files_in_processes()
+    print("\n✅ Test completed!")
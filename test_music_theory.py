@@ -0,0 +1,59 @@
+from music_theory import answer, identify_chord, scale_notes, chord_notes
+
+# Questions the theory engine must answer, with a fragment of the expected answer
+THEORY = [
+    ("What notes are in D dorian?", "D E F G A B C"),
+    ("F# minor scale", "F# G# A B C# D E"),
+    ("what notes are in Am7?", "A C E G"),
+    ("Cmaj7 chord", "C E G B"),
+    ("what's the first inversion of a G chord?", "B D G"),
+    ("what notes are in the C/E chord?", "first inversion"),
+    ("Dm7/G chord notes", "over G in the bass"),
+    ("what chord is C E G", "C (C major, root position)"),
+    ("which chord is 57 60 64", "Am"),
+    ("midi note 60", "middle C"),
+    ("what frequency is A4", "440.00 Hz"),
+    ("what note is 440 hz", "A4"),
+    ("what note is the kick tuned to? my kick is 50 hz", "G1"),
+]
+
+# Ordinary questions that merely mention letters, numbers or theory words: these go to a provider
+NOT_THEORY = [
+    "What does the A/B button do in Ableton?",
+    "In the key of E minor, what chord should come after Am?",
+    "What chord should I play after Am?",
+    "what chord comes next after G?",
+    "Give me a chord progression in C major",
+    "set tempo to 120 bpm in midi",
+    "EQ for kick in E minor",
+    "E chord sounds weird",
+    "I have a minor problem with my mix",
+    "should I cut 200 hz on the vocal?",
+    "How do I route track 1 to track 2?",
+    "How do I use a compressor?",
+]
+
+
+def test_theory_answers():
+    for question, expected in THEORY:
+        result = answer(question)
+        assert result and expected in result, (question, result)
+
+
+def test_not_theory():
+    for question in NOT_THEORY:
+        assert answer(question) is None, (question, answer(question))
+
+
+def test_tables():
+    assert scale_notes("Eb", "major") == ("Eb", "F", "G", "Ab", "Bb", "C", "D")
+    assert chord_notes("F#", "m7b5") == ("F#", "A", "C", "E")
+    assert identify_chord([64, 67, 72])[0]["symbol"] == "C/E"
+
+
+if __name__ == "__main__":
+    print("🤖 Testing the theory engine...")
+    test_theory_answers()
+    test_not_theory()
+    test_tables()
+    print("\n✅ Test completed!")
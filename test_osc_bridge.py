@@ -0,0 +1,75 @@
+import threading
+import time
+
+from pythonosc import dispatcher, osc_server  # type: ignore
+
+from osc_bridge import AbletonOSCBridge
+
+# Stand-in for AbletonOSC: records every message it receives
+received = []
+
+
+def record(address, *args):
+    received.append((time.perf_counter(), address, args))
+
+
+def test_osc_bridge(count=500):
+    received.clear()
+    handler = dispatcher.Dispatcher()
+    handler.set_default_handler(record)
+    server = osc_server.BlockingOSCUDPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    print(f"✅ Fake AbletonOSC listening on 127.0.0.1:{port}")
+
+    bridge = AbletonOSCBridge("127.0.0.1", port)
+    try:
+        # Burst of messages tagged with a sequence number
+        sent_at = {}
+        start = time.perf_counter()
+        for seq in range(count):
+            sent_at[seq] = time.perf_counter()
+            bridge.send("/test/seq", seq)
+        enqueue_time = time.perf_counter() - start
+
+        # Real actions go through the same queue
+        bridge.set_tempo(128)
+        bridge.create_track("midi", 2, "AI Bass")
+        bridge.create_track("audio", -1, "AI Vox", track_count=5)  # appended: named at index 5
+        bridge.fire_clip(0, 1)
+        bridge.set_device_parameter(1, 0, 3, 0.5)
+
+        deadline = time.time() + 5
+        while len(received) < count + 7 and time.time() < deadline:
+            time.sleep(0.01)
+
+        sequence = [args[0] for _, address, args in received if address == "/test/seq"]
+        actions = [address for _, address, _ in received if address != "/test/seq"]
+        assert sequence == list(range(count)), "messages arrived out of order or were lost"
+        assert actions == ["/live/song/set/tempo", "/live/song/create_midi_track",
+                           "/live/track/set/name", "/live/song/create_audio_track",
+                           "/live/track/set/name", "/live/clip_slot/fire",
+                           "/live/device/set/parameter/value"], actions
+
+        assert [args for _, address, args in received if address == "/live/track/set/name"] == [(2, "AI Bass"), (5, "AI Vox")]
+
+        # A stopped bridge refuses messages instead of restarting on its closed socket
+        idle = AbletonOSCBridge("127.0.0.1", port)
+        idle.stop()
+        assert idle.send("/test/seq", -1) is False and not idle.running
+
+        latencies = sorted((t - sent_at[args[0]]) * 1000 for t, address, args in received if address == "/test/seq")
+        print(f"📩 {bridge.sent_messages} messages in {bridge.sent_packets} packets")
+        print(f"⚡ Enqueue: {enqueue_time * 1e6 / count:.1f} µs/message")
+        print(f"⏱️ Latency p50 {latencies[len(latencies) // 2]:.2f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms, max {latencies[-1]:.2f} ms")
+    finally:
+        bridge.stop()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    print("🤖 Testing OSC bridge against a local fake receiver...")
+    test_osc_bridge()
+    print("\n✅ Test completed!")
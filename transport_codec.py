@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Optional binary payload codec for Profesor Ableton's Socket.IO events
+Clients offer codecs in the connect auth; payloads for clients that chose
+MessagePack travel as one binary attachment, zlib-compressed above a size
+threshold. Everyone else keeps getting plain JSON.
+"""
+
+import os
+import zlib
+from typing import Any, List, Optional
+
+try:
+    import msgpack  # type: ignore
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# First byte of every binary payload
+FLAG_PLAIN = 0
+FLAG_ZLIB = 1
+
+COMPRESS_LEVEL = 1  # fastest; answers are text and compress well even at level 1
+
+
+def supported_codecs() -> List[str]:
+    """Codecs this side can speak, preferred first."""
+    return [MSGPACK, JSON] if MSGPACK_AVAILABLE else [JSON]
+
+
+def client_auth() -> dict:
+    """Auth payload a client sends on connect to offer its codecs."""
+    return {"codecs": supported_codecs()}
+
+
+def negotiate(auth: Optional[dict]) -> str:
+    """Pick the codec for a client from its connect auth; old clients send none and get JSON."""
+    offered = (auth or {}).get("codecs") if isinstance(auth, dict) else None
+    if MSGPACK_AVAILABLE and isinstance(offered, list) and MSGPACK in offered:
+        return MSGPACK
+    return JSON
+
+
+def encode(payload: Any, threshold: Optional[int] = None) -> bytes:
+    """MessagePack payload with a flag byte, compressed when larger than `threshold` bytes.
+
+    The default threshold is TRANSPORT_COMPRESS_THRESHOLD, read on each call so .env loaded after import applies.
+    """
+    if threshold is None:
+        threshold = int(os.getenv("TRANSPORT_COMPRESS_THRESHOLD", "1024"))
+    body = msgpack.packb(payload, use_bin_type=True)
+    if len(body) > threshold:
+        compressed = zlib.compress(body, COMPRESS_LEVEL)
+        if len(compressed) < len(body):
+            return bytes((FLAG_ZLIB,)) + compressed
+    return bytes((FLAG_PLAIN,)) + body
+
+
+def decode(data: Any) -> Any:
+    """Inverse of encode(); JSON payloads (already decoded by Socket.IO) pass through."""
+    if not isinstance(data, (bytes, bytearray)):
+        return data
+    body = bytes(data[1:])
+    if data[0] == FLAG_ZLIB:
+        body = zlib.decompress(body)
+    elif data[0] != FLAG_PLAIN:
+        raise ValueError(f"Unknown payload flag {data[0]}")
+    return msgpack.unpackb(body, raw=False)